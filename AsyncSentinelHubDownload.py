@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:26:52 2026
+
+@author: yan-s
+"""
+
+from SentinelHubDownload import SentinelHubDownload
+
+import asyncio
+import logging
+import aiohttp
+from sentinelhub import MimeType, SentinelHubSession
+from sentinelhub.decoding import decode_data
+from sentinelhub.exceptions import DownloadFailedException
+
+
+class Throttle:
+    """Limit of requests at the same time & pause of every request after a 429 response."""
+
+    def __init__(self, limit):
+        """Set the number of requests at the same time."""
+        self.semaphore = asyncio.Semaphore(limit)
+        self.resumeAt = 0.0
+
+    def pause(self, seconds):
+        """Hold every next request for seconds (Retry-After of a 429 response)."""
+        loop = asyncio.get_running_loop()
+        self.resumeAt = max(self.resumeAt, loop.time() + seconds)
+
+    async def wait(self):
+        """Wait for the end of the pause, if any."""
+        delay = self.resumeAt - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Token:
+    """OAuth headers of one SentinelHubSession shared by every request, renewed before expiry or on 401."""
+
+    def __init__(self, config):
+        """Set the config, authentication is only done by the first request."""
+        self.config = config
+        self.shSession = None
+        self.current = None
+        self.lock = asyncio.Lock()
+
+    async def headers(self):
+        """Return the authorization headers (sentinelhub fetches a new token shortly before expires_at)."""
+        async with self.lock:
+            if self.shSession is None:
+                self.shSession = await asyncio.to_thread(SentinelHubSession, config=self.config)
+            self.current = await asyncio.to_thread(lambda: self.shSession.session_headers)
+            return self.current
+
+    async def renew(self, rejected):
+        """Authenticate again if headers rejected (401) are still the current ones."""
+        async with self.lock:
+            # Requests rejected at the same time renew the token once
+            if rejected == self.current:
+                self.shSession = await asyncio.to_thread(SentinelHubSession, config=self.config)
+                self.current = None
+
+
+class AsyncSentinelHubDownload(SentinelHubDownload):
+    """Download satellite DATA with asyncio & aiohttp instead of threads :
+
+0) __init__() : Initialise parent class SentinelHubDownload().
+1) fetch() : Do one request, retry failed ones with backoff, pause everything on 429 (at most -
+maxRateLimited seconds) & renew the token on 401.
+2) fetchTiles() : Download every tile at the same time & paste each one as soon as received.
+3) fetchScene() : Download a composite scene (one request or tiles) & write it in the stack.
+4) retrieveAsync() : Use the raster cache, else download in one request, in tiles or as a composite, concurrently.
+5) retrieveMany() : Retrieve rasters of several downloaders in one event loop.
+6) session() : Open an aiohttp session pooling downloadWorkers connections.
+7) downloadTiles() : Same as SentinelHubDownload.downloadTiles(), with asyncio.
+8) retrieve() : Same as SentinelHubDownload.retrieve(), with asyncio.
+
+Note : Requests are built by sentinelhub (SentinelHubRequest) and only sent here, -
+through one pooled aiohttp session of at most downloadWorkers connections, -
+authenticated by one Token (shared by every downloader of the event loop).
+Set downloadBackend = 'asyncio' in VariableGlobal to use it.
+    """
+
+    # Seconds a request may be held by 429 responses (Retry-After) before it fails
+    maxRateLimited = 600.0
+
+    def __init__(self):
+        """Initialise parent class SentinelHubDownload()."""
+        SentinelHubDownload.__init__(self)
+
+    async def fetch(self, session, throttle, request):
+        """Send the request of a SentinelHubRequest & return the decoded image."""
+        download = request.download_list[0]
+        delay, failures, renewed, limited = self.retryBackoff, 0, False, 0.0
+        while True:
+            async with throttle.semaphore:
+                await throttle.wait()
+                authorization = await self.token.headers()
+                try:
+                    async with session.post(download.url, json=download.post_values,
+                                            headers={**download.headers, **authorization}) as response:
+                        # Neither 429 (up to maxRateLimited seconds) nor the first 401 count as retries
+                        if response.status == 429:
+                            # Retry-After is given in milliseconds, hold every request
+                            seconds = float(response.headers.get('Retry-After', 1000)) / 1000
+                            limited += seconds
+                            if limited > self.maxRateLimited:
+                                raise DownloadFailedException(f'Request rate limited for more than '
+                                                              f'{self.maxRateLimited} s')
+                            logging.warning(f'Rate limited, every request paused {seconds} s')
+                            throttle.pause(seconds)
+                            continue
+                        if response.status == 401 and not renewed:
+                            # Token expired (long batch runs) : authenticate again
+                            logging.warning('Token rejected, authentication renewed')
+                            await self.token.renew(authorization)
+                            renewed = True
+                            continue
+                        response.raise_for_status()
+                        content = await response.read()
+                    # Decoding in a thread, other requests go on meanwhile
+                    return await asyncio.to_thread(decode_data, content, MimeType.TIFF)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = e
+            failures += 1
+            if failures > self.downloadRetries:
+                raise DownloadFailedException(f'Request not downloaded after {self.downloadRetries} retries')
+            logging.warning(f'Request failed ({error}), retry in {delay} s')
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    async def fetchTiles(self, session, throttle, paste=None, timeInterval=None):
+        """Download every tile of self.tiles (during timeInterval) at the same time, -
+paste(index, data) each one when received (default : pasteTile(), in the .tiff file).
+        """
+        paste = paste or self.pasteTile
+
+        async def fetchTile(index, bbox, size):
+            # Only tiles being downloaded (at most downloadWorkers) are in memory
+            paste(index, await self.fetch(session, throttle, self.request(bbox, size, timeInterval=timeInterval)))
+
+        await asyncio.gather(*[fetchTile(index, bbox, size) for index, (_, _, bbox, size) in enumerate(self.tiles)])
+
+    async def fetchScene(self, session, throttle, stack, index, timeInterval):
+        """Download the scene of timeInterval & write it in stack (as soon as received)."""
+        if max(self.sentinelSize) <= self.maxTilePixels:
+            image = await self.fetch(session, throttle, self.request(self.sentinelBBox, self.sentinelSize,
+                                                                     timeInterval=timeInterval))
+            stack.put(index, image)
+        else:
+            await self.fetchTiles(session, throttle,
+                                  lambda tile, data: stack.put(index, data, *self.tiles[tile][:2]), timeInterval)
+
+    async def retrieveAsync(self, session, throttle):
+        """Use the raster cache, else download in one request, in tiles or as a composite, concurrently."""
+        self.rasterPath = self.rasterCache.get(self)
+        if self.rasterPath:
+            return
+        if self.compositeScenes:
+            # Every scene at the same time, written in the stack on disk as they come
+            stack = self.compositeStack()
+            await asyncio.gather(*[self.fetchScene(session, throttle, stack, index, timeInterval)
+                                   for index, timeInterval in enumerate(self.sceneIntervals())])
+            await asyncio.to_thread(self.saveComposite, stack)
+            return
+        if max(self.sentinelSize) <= self.maxTilePixels:
+            image = await self.fetch(session, throttle,
+                                     self.request(self.sentinelBBox, self.sentinelSize))
+            # Files written in a thread, other downloads go on meanwhile
+            await asyncio.to_thread(self.saveRaster, image)
+        else:
+            # Tiles written straight into the .tiff file, never mosaicked in memory
+            self.tileParameters()
+            await self.fetchTiles(session, throttle)
+            await asyncio.to_thread(self.saveMosaic)
+        if self.preview:
+            # Overview computed in a thread, plotted here (GUI backends need the main thread)
+            self.showPreview(await asyncio.to_thread(self.previewImage))
+
+    @staticmethod
+    def retrieveMany(downloaders):
+        """Retrieve rasters of downloaders (sentinelParameters() done) in one event loop.
+
+Return a [list] of exceptions (None if retrieved), in the same order.
+Settings (credentials, downloadWorkers...) of the first downloader are used for all.
+        """
+        if not downloaders:
+            return []
+        first = downloaders[0]
+
+        async def gatherAll():
+            # One token for every request, none if everything is already downloaded
+            token = Token(first.config())
+            for downloader in downloaders:
+                downloader.token = token
+            async with first.session() as session:
+                throttle = Throttle(first.downloadWorkers)
+                return await asyncio.gather(*[downloader.retrieveAsync(session, throttle)
+                                              for downloader in downloaders],
+                                            return_exceptions=True)
+
+        return asyncio.run(gatherAll())
+
+    def session(self):
+        """Return an aiohttp session pooling at most downloadWorkers connections."""
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.downloadWorkers))
+
+    def downloadTiles(self, paste=None, timeInterval=None):
+        """Same as SentinelHubDownload.downloadTiles(), with asyncio."""
+        async def fetchAll():
+            self.token = Token(self.config())
+            async with self.session() as session:
+                await self.fetchTiles(session, Throttle(self.downloadWorkers), paste, timeInterval)
+
+        return asyncio.run(fetchAll())
+
+    def retrieve(self):
+        """Use the raster cache, else download in one request or in tiles, with asyncio."""
+        error, = self.retrieveMany([self])
+        if error:
+            raise error
+
+
+if __name__ == '__main__':
+    print(AsyncSentinelHubDownload.__doc__)
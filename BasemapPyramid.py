@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:34:09 2026
+
+@author: yan-s
+"""
+
+import os
+import logging
+import numpy as np
+
+
+class BasemapPyramid:
+    """Overviews (2x, 4x, 8x... downsampled) of a raster, cached beside its .tiff file :
+
+0) __init__() : Set path & full resolution array of the raster.
+1) build() : Compute missing overviews by 2 x 2 averaging, a few rows at a time.
+2) level() : Return the array of an overview (memory-mapped .npy file).
+3) window() : Return the crop of the overview matching an area & a number of pixels, with its extent.
+
+Note : Overviews are computed once per raster (overview_2.npy, overview_4.npy...), -
+down to minSize pixels, so a small map of a large raster only reads a few pixels.
+    """
+
+    # Smallest overview, in pixels (width or height)
+    minSize = 256
+    # Rows of an overview computed at once (bounds memory)
+    chunkRows = 512
+
+    def __init__(self, path, image):
+        """Set path of the .tiff file & its (height, width, bands) array."""
+        self.directory = os.path.dirname(path)
+        self.image = image
+
+    def levelPath(self, factor):
+        """Return path of the overview downsampled factor times."""
+        return os.path.join(self.directory, f'overview_{factor}.npy')
+
+    def factors(self):
+        """Return [1, 2, 4...] while the overview is at least minSize pixels."""
+        factors = [1]
+        while min(self.image.shape[:2]) // (factors[-1] * 2) >= self.minSize:
+            factors.append(factors[-1] * 2)
+        return factors
+
+    def build(self):
+        """Compute missing overviews, each from the previous one."""
+        previous = self.image
+        for factor in self.factors()[1:]:
+            path = self.levelPath(factor)
+            if not os.path.exists(path):
+                height, width = previous.shape[0] // 2, previous.shape[1] // 2
+                # Written under another name first, maps of a batch may share it
+                partPath = f'{path}.{os.getpid()}.part'
+                level = np.lib.format.open_memmap(partPath, mode='w+', dtype=previous.dtype,
+                                                  shape=(height, width) + previous.shape[2:])
+                for row in range(0, height, self.chunkRows):
+                    rows = min(self.chunkRows, height - row)
+                    block = previous[2 * row:2 * (row + rows), :2 * width]
+                    if previous.dtype == np.uint8:
+                        # Sum of the 4 pixels fits in uint16, rounded average
+                        total = block[0::2, 0::2].astype(np.uint16)
+                        total += block[1::2, 0::2]
+                        total += block[0::2, 1::2]
+                        total += block[1::2, 1::2]
+                        level[row:row + rows] = (total + 2) >> 2
+                    else:
+                        level[row:row + rows] = block.reshape(rows, 2, width, 2, -1).mean(axis=(1, 3))
+                level.flush()
+                del level
+                os.replace(partPath, path)
+                logging.debug(f'Overview 1/{factor} ({width} x {height} pixels) saved in "{path}"')
+            previous = self.level(factor)
+
+    def level(self, factor):
+        """Return the overview downsampled factor times (1 is the raster itself)."""
+        if factor == 1:
+            return self.image
+        return np.load(self.levelPath(factor), mmap_mode='r')
+
+    def window(self, extent, view, width, height):
+        """Return the crop of the right overview & its extent.
+
+extent -> [west, east, south, north] of the whole raster
+view -> [west, east, south, north] of the area shown
+width, height -> pixels of the area shown in the figure
+        """
+        rasterHeight, rasterWidth = self.image.shape[:2]
+        # Size of a pixel of the raster, in degrees
+        xPixel = (extent[1] - extent[0]) / rasterWidth
+        yPixel = (extent[3] - extent[2]) / rasterHeight
+        # Columns & rows of the view in the raster, rows go from North to South
+        columns = np.clip([(view[0] - extent[0]) / xPixel, (view[1] - extent[0]) / xPixel], 0, rasterWidth)
+        rows = np.clip([(extent[3] - view[3]) / yPixel, (extent[3] - view[2]) / yPixel], 0, rasterHeight)
+
+        # Largest overview with at least as many pixels as shown
+        ratio = min((columns[1] - columns[0]) / width, (rows[1] - rows[0]) / height)
+        factor = max([factor for factor in self.factors() if factor <= max(ratio, 1)])
+        if factor > 1 and not os.path.exists(self.levelPath(factor)):
+            self.build()
+        level = self.level(factor)
+
+        # Crop on whole pixels of the overview
+        c0, c1 = int(columns[0] // factor), int(min(np.ceil(columns[1] / factor), level.shape[1]))
+        r0, r1 = int(rows[0] // factor), int(min(np.ceil(rows[1] / factor), level.shape[0]))
+        logging.info(f'Basemap overview 1/{factor}, {c1 - c0} x {r1 - r0} pixels shown')
+        return level[r0:r1, c0:c1], [extent[0] + c0 * factor * xPixel,
+                                     extent[0] + c1 * factor * xPixel,
+                                     extent[3] - r1 * factor * yPixel,
+                                     extent[3] - r0 * factor * yPixel]
+
+
+if __name__ == '__main__':
+    print(BasemapPyramid.__doc__)
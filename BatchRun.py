@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:41:37 2026
+
+@author: yan-s
+"""
+
+from main import VariableGlobal
+from KmlCSV import KmlCSV
+from RasterCache import RasterCache
+from SentinelHubDownload import SentinelHubDownload
+from Profiler import Profiler
+
+import logging
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+
+def monthlyIntervals(start, end):
+    """Return [(first day, last day), ...] ('YYYY-MM-DD') of every month between start & end."""
+    first = date.fromisoformat(start).replace(day=1)
+    end = date.fromisoformat(end)
+    intervals = []
+    while first <= end:
+        following = (first + timedelta(days=32)).replace(day=1)
+        intervals.append((first.isoformat(), (following - timedelta(days=1)).isoformat()))
+        first = following
+    return intervals
+
+
+# Points, lines & polygons shared by every job of a rendering process, set by initRenderer()
+sharedPoints = None
+# PlotDATA of a rendering process, its figure is reused from one map to the next
+plotter = None
+
+
+def initRenderer(points, shapes, title, options):
+    """Initialise a rendering process : points, lines & polygons & command line options."""
+    global sharedPoints
+    sharedPoints = (points, shapes, title)
+    VariableGlobal.options.update(options)
+
+
+def renderJob(job):
+    """Render the map of one job (in a rendering process) & return its title."""
+    global plotter
+    from PlotDATA import PlotDATA
+    if plotter is None:
+        # PlotDATA without __init__ : points come from the parent process, not the .kml file
+        plotter = PlotDATA.__new__(PlotDATA)
+    # Settings of this job only, the figure is kept
+    VariableGlobal.__init__(plotter)
+    plotter.__dict__.update(job)
+    plotter.points, plotter.shapes, plotter.title = sharedPoints
+    plotter.csvPath = plotter.csvSrc
+    try:
+        plotter.renderMap()
+    except Exception:
+        # Start again from a new figure
+        plotter.close()
+        raise
+    return plotter.figTitle
+
+
+class BatchRun(VariableGlobal):
+    """Produce many maps (areas & time intervals) in one run :
+
+0) __init__() : Initialise parent class & build jobs (monthly maps of timeInterval/intervalTime if none).
+1) convert() : Read the .kml file once, shared by every map.
+2) download() : Download each distinct raster once, batchDownloads at a time (or with asyncio).
+3) render() : Render maps in batchRenders processes.
+4) exeSeq() : Act as an execution thread.
+
+Note : A job is a {dict} of variables of VariableGlobal to change, ex :
+{'BBox': [...], 'timeInterval': '2022-01-01', 'intervalTime': '2022-01-31', 'figTitle': '...'}.
+Jobs with the same BBox, resolution, time interval & evalscript share one download.
+    """
+
+    def __init__(self):
+        """Initialise parent class & build jobs."""
+        VariableGlobal.__init__(self)
+        self.jobs = [dict(job) for job in self.batchJobs]
+        if not self.jobs:
+            # One map per month of the whole time interval
+            for start, end in monthlyIntervals(self.timeInterval, self.intervalTime):
+                self.jobs.append({'timeInterval': start, 'intervalTime': end})
+        # Area shown by each job, in default titles when jobs show several areas
+        areas = [tuple(job.get('viewBBox') or job.get('BBox') or self.viewBBox or self.BBox) for job in self.jobs]
+        for job, area in zip(self.jobs, areas):
+            job.setdefault('timeInterval', self.timeInterval)
+            job.setdefault('intervalTime', self.intervalTime)
+            # Each map needs its own file name (& entry in the render cache)
+            title = f'{self.figTitle} {job["timeInterval"]}'
+            if len(set(areas)) > 1:
+                title += ' [' + ', '.join(f'{value:g}' for value in area) + ']'
+            job.setdefault('figTitle', title)
+            job.setdefault('xLabel', f'{job["timeInterval"]} - {job["intervalTime"]}')
+        titles = [job['figTitle'] for job in self.jobs]
+        duplicates = sorted({title for title in titles if titles.count(title) > 1})
+        if duplicates:
+            logging.error(f'Jobs of batchJobs would overwrite each other\'s map, give them different figTitle : {duplicates} !')
+            quit()
+        logging.warning(f'Start of batch : {len(self.jobs)} maps !')
+
+    def settings(self, job):
+        """Return a VariableGlobal with the variables of job."""
+        settings = VariableGlobal.__new__(VariableGlobal)
+        settings.__dict__.update(self.__dict__)
+        settings.__dict__.update(job)
+        return settings
+
+    def convert(self):
+        """Read the .kml file once (or its cache) for every map."""
+        self.points, self.shapes, self.title = None, None, None
+        if not self.csvSrc:
+            converter = KmlCSV()
+            self.points, self.shapes, self.title = converter.points, converter.shapes, converter.title
+
+    def download(self):
+        """Download distinct rasters of jobs, batchDownloads at a time.
+
+Set self.ready, the [list] of jobs whose raster is available.
+        """
+        cache = RasterCache(f'{self.workingDirectory}/{self.rasterDirectory}')
+        # Jobs by raster key, identical requests are downloaded once
+        byKey = {}
+        for job in self.jobs:
+            byKey.setdefault(cache.key(self.settings(job)), []).append(job)
+        logging.info(f'{len(self.jobs)} jobs, {len(byKey)} distinct rasters')
+
+        # Parameters are set here, downloads run concurrently (no console preview)
+        Downloader = SentinelHubDownload
+        if self.downloadBackend == 'asyncio':
+            from AsyncSentinelHubDownload import AsyncSentinelHubDownload as Downloader
+        downloaders = {}
+        for key, jobs in byKey.items():
+            downloader = Downloader()
+            downloader.__dict__.update(jobs[0])
+            downloader.preview = False
+            downloader.sentinelParameters()
+            downloaders[key] = downloader
+
+        if self.downloadBackend == 'asyncio':
+            # Every request in one event loop, downloadWorkers at the same time
+            errors = Downloader.retrieveMany(list(downloaders.values()))
+        else:
+            with ThreadPoolExecutor(max_workers=self.batchDownloads) as executor:
+                futures = [executor.submit(downloader.retrieve) for downloader in downloaders.values()]
+                errors = [future.exception() for future in futures]
+
+        self.ready = []
+        for key, error in zip(downloaders, errors):
+            jobs = byKey[key]
+            if error:
+                logging.error(f'Download failed for {[job["figTitle"] for job in jobs]} : {error}')
+            else:
+                self.ready.extend(jobs)
+
+    def render(self):
+        """Render maps of ready jobs in batchRenders processes."""
+        with ProcessPoolExecutor(max_workers=self.batchRenders, initializer=initRenderer,
+                                 initargs=(self.points, self.shapes, self.title,
+                                           dict(VariableGlobal.options))) as executor:
+            futures = [executor.submit(renderJob, job) for job in self.ready]
+            for future in as_completed(futures):
+                try:
+                    logging.info(f'Map "{future.result()}" done.')
+                    Profiler.of(self).count(maps=1)
+                except Exception as e:
+                    logging.error(f'Rendering failed : {e}')
+                    Profiler.of(self).count(failed=1)
+
+    def exeSeq(self):
+        """Trigger the execution sequence, each stage timed by Profiler."""
+        profiler = Profiler.of(self)
+        try:
+            profiler.stage(self.convert)
+            profiler.stage(self.download)
+            profiler.stage(self.render)
+        finally:
+            profiler.save()
+        logging.warning(f'End of batch : {len(self.ready)} maps out of {len(self.jobs)} !')
+
+
+if __name__ == '__main__':
+    print(BatchRun.__doc__)
@@ -0,0 +1,898 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:41 2026
+
+@author: yan-s
+"""
+
+from KmlCSV import placemarkReader, pointRows
+from PointTable import PointTable
+from ShapeTable import ShapeTable
+from VectorReader import Geometry
+from main import VariableGlobal
+from Profiler import Profiler, residentMB, peakMB
+
+import os
+import json
+import struct
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import multiprocessing
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from csv import writer
+from glob import glob
+from time import perf_counter
+from datetime import datetime
+
+
+# Results of the run, saved by --json (one {dict} per measure)
+RESULTS = []
+
+
+def record(benchmark, case, size, seconds, **values):
+    """Keep one measure of a benchmark (seconds & other values, ex: peakMB) for the .json report."""
+    RESULTS.append({'benchmark': benchmark, 'case': case, 'size': size,
+                    'seconds': round(seconds, 4), **values})
+
+
+def syntheticKML(path, count, folders=0, kinds=('Point',)):
+    """Write a googleEarth like .kml file with [count] Placemarks.
+
+folders -> int ; Placemarks by 1000 in <Folder> nested folders deep (0 : none)
+kinds -> tuple ; Geometries used in turn, of 'Point', 'LineString' & 'Polygon'
+    """
+    with open(path, 'w', encoding=('utf8')) as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<kml xmlns="http://www.opengis.net/kml/2.2">\n'
+                   '<Document>\n'
+                   '\t<name>Synthetic</name>\n'
+                   '\t<description>Benchmark</description>\n')
+        for i in range(count):
+            if folders and i % 1000 == 0:
+                file.write(''.join(f'<Folder><name>Folder {i // 1000}.{depth}</name>\n'
+                                   for depth in range(folders)))
+            lon = -16.9 + (i % 1000) * 0.0006
+            lat = 13.6 + (i // 1000 % 1000) * 0.0006
+            kind = kinds[i % len(kinds)]
+            if kind == 'Point':
+                geometry = ('\t\t<Point>\n'
+                            f'\t\t\t<coordinates>{lon:.10f},{lat:.10f},{i % 50}</coordinates>\n'
+                            '\t\t</Point>\n')
+            else:
+                # Square of 0.0005 degrees, closed for polygons
+                ring = [(lon, lat), (lon + 0.0005, lat), (lon + 0.0005, lat + 0.0005), (lon, lat + 0.0005)]
+                coordinates = ' '.join(f'{x:.10f},{y:.10f},0' for x, y in ring + ring[:1])
+                if kind == 'LineString':
+                    geometry = f'\t\t<LineString><coordinates>{coordinates}</coordinates></LineString>\n'
+                else:
+                    geometry = ('\t\t<Polygon><outerBoundaryIs><LinearRing><coordinates>'
+                                f'{coordinates}</coordinates></LinearRing></outerBoundaryIs></Polygon>\n')
+            file.write(f'\t<Placemark id="{i}">\n'
+                       f'\t\t<name>Place {i}</name>\n'
+                       f'{geometry}'
+                       '\t</Placemark>\n')
+            if folders and (i % 1000 == 999 or i == count - 1):
+                file.write('</Folder>\n' * folders)
+        file.write('</Document>\n</kml>\n')
+
+
+def syntheticCSV(path, count):
+    """Write a .csv file of [count] points ('Name', 'Longitude', 'Latitude', 'Altitude') in the default BBox."""
+    rng = np.random.default_rng(0)
+    names = [f'Place {i}' if i % 10 else f'PLACE {i}' for i in range(count)]
+    pd.DataFrame({'Name': names,
+                  'Longitude': rng.uniform(-16.9, -16.3, count).round(6),
+                  'Latitude': rng.uniform(13.6, 14.2, count).round(6),
+                  'Altitude': np.zeros(count)}).to_csv(path, index=False)
+
+
+def syntheticTIFF(path, size, dtype=np.uint8, chunkRows=1024):
+    """Write a size x size RGB .tiff file looking like a Sentinel-2 true color raster.
+
+Smooth land/water areas, pixel noise & a few white clouds, written by chunks of rows -
+in an uncompressed .tiff file (as sentinelhub does), so any size fits in memory.
+    """
+    import tifffile
+    rng = np.random.default_rng(3)
+    # Coarse field (1 value per 64 pixels) blown up : land & water areas
+    cells = size // 64 + 2
+    field = rng.random((cells, cells))
+    clouds = [(rng.uniform(0, size), rng.uniform(0, size), rng.uniform(size / 40, size / 10)) for _ in range(5)]
+    scale = np.iinfo(dtype).max / 255
+    image = tifffile.memmap(path, shape=(size, size, 3), dtype=dtype, photometric='rgb')
+    columns = np.arange(size)
+    for row in range(0, size, chunkRows):
+        rows = np.arange(row, min(row + chunkRows, size))
+        land = field[rows[:, None] // 64, columns[None, :] // 64] > 0.4
+        noise = rng.integers(0, 12, (len(rows), size, 1), dtype=np.uint8)
+        # Water dark blue, land green-brown
+        block = np.where(land[..., None], np.array([96, 110, 70], np.uint8), np.array([20, 45, 80], np.uint8)) + noise
+        for x, y, radius in clouds:
+            cloudy = (columns[None, :] - x) ** 2 + (rows[:, None] - y) ** 2 < radius ** 2
+            block[cloudy] = 235
+        image[row:row + len(rows)] = (block * scale).astype(dtype)
+    image.flush()
+    del image
+
+
+def syntheticShapefile(path, count):
+    """Write a Point shapefile (.shp, .shx & .dbf with a 'NAME' field) with [count] points."""
+    i = np.arange(count)
+    lon = -16.9 + (i % 1000) * 0.0006
+    lat = 13.6 + (i // 1000 % 1000) * 0.0006
+    # .shp & .shx headers, lengths in 16 bits words
+    def header(length):
+        return (struct.pack('>7i', 9994, 0, 0, 0, 0, 0, length // 2) +
+                struct.pack('<2i4d4d', 1000, 1, lon.min(), lat.min(), lon.max(), lat.max(), 0, 0, 0, 0))
+    records = np.zeros(count, dtype=[('number', '>i4'), ('length', '>i4'), ('type', '<i4'),
+                                     ('x', '<f8'), ('y', '<f8')])
+    records['number'], records['length'], records['type'] = i + 1, 10, 1
+    records['x'], records['y'] = lon, lat
+    base = os.path.splitext(path)[0]
+    with open(base + '.shp', 'wb') as file:
+        file.write(header(100 + 28 * count))
+        records.tofile(file)
+    index = np.zeros(count, dtype=[('offset', '>i4'), ('length', '>i4')])
+    index['offset'], index['length'] = 50 + 14 * i, 10
+    with open(base + '.shx', 'wb') as file:
+        file.write(header(100 + 8 * count))
+        index.tofile(file)
+    # .dbf : one character field of 20 bytes
+    with open(base + '.dbf', 'wb') as file:
+        file.write(struct.pack('<4BIHH20x', 3, 126, 10, 18, count, 65, 21))
+        file.write(struct.pack('<11sc4xBB14x', b'NAME', b'C', 20, 0) + b'\x0d')
+        names = np.array([f'Place {n}'.ljust(20).encode('utf8') for n in range(count)], dtype='S20')
+        rows = np.zeros(count, dtype=[('deleted', 'S1'), ('name', 'S20')])
+        rows['deleted'], rows['name'] = b' ', names
+        rows.tofile(file)
+        file.write(b'\x1a')
+
+
+def syntheticGeoJSON(path, count):
+    """Write a GeoJSON FeatureCollection with [count] Point features."""
+    with open(path, 'w', encoding=('utf8')) as file:
+        file.write('{"type": "FeatureCollection", "name": "Synthetic", "features": [\n')
+        for i in range(count):
+            lon = -16.9 + (i % 1000) * 0.0006
+            lat = 13.6 + (i // 1000 % 1000) * 0.0006
+            file.write(f'{"," if i else ""}{{"type": "Feature", "properties": {{"name": "Place {i}"}}, '
+                       f'"geometry": {{"type": "Point", "coordinates": [{lon:.10f}, {lat:.10f}, {i % 50}]}}}}\n')
+        file.write(']}\n')
+
+
+def legacyFilePrinter(path):
+    """Line slicing parser of KmlCSV.filePrinter() before the incremental parser (reference)."""
+    out = [["Name", "Longitude", "Latitude", "Altitude"]]
+    with open(path, 'r', encoding=('utf8')) as file:
+        line = []
+        for ligne in file:
+            if ligne[:8] == '\t\t<name>':
+                line.append(ligne[8:-8])
+            if ligne[:16] == '\t\t\t<coordinates>':
+                for i in ligne[16:-15].split(sep=','):
+                    line.append(i)
+            if len(line) >= 4:
+                out.append(line[-4:])
+                line = []
+    return out
+
+
+def streamingCount(path):
+    """Consume placemarkReader() without keeping anything."""
+    return sum(1 for _ in placemarkReader(path))
+
+
+def timeIt(function, *args):
+    """Return (seconds, result) of function(*args)."""
+    start = perf_counter()
+    result = function(*args)
+    return perf_counter() - start, result
+
+
+def peakMemory(function, *args):
+    """Return (seconds, peak MB allocated) of function(*args)."""
+    tracemalloc.start()
+    seconds, _ = timeIt(function, *args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def csvRoundTrip(path, csvPath):
+    """Former KmlCSV -> PlotDATA path : list of list, .csv file & pd.read_csv."""
+    with open(csvPath, 'w', newline='', encoding=('utf8')) as file:
+        writer(file).writerows(legacyFilePrinter(path))
+    return pd.read_csv(csvPath)
+
+
+def inProcessTable(path):
+    """KmlCSV -> PlotDATA path with a PointTable."""
+    return PointTable.fromRows(pointRows(path)).toDataFrame()
+
+
+def legacyPlot(plotter):
+    """Per row loop of PlotDATA.plot() before LabelCollection (reference)."""
+    # df & df2 as made by the former PlotDATA.listy()
+    df2 = plotter.df.iloc[plotter.categories['downward']]
+    df = plotter.df.drop(index=df2.index)
+    for idx, dat in df.iterrows():
+        if dat.Name.isupper():
+            plotter.ax.annotate(dat.Name, ((dat.Longitude + plotter.upperLonCorrection),
+                                (dat.Latitude + plotter.upperLatCorrection)), color=plotter.upperColor)
+        elif dat.Name in plotter.listyUp:
+            plotter.ax.annotate(dat.Name, ((dat.Longitude + plotter.upwardLonCorrection),
+                                (dat.Latitude + plotter.upwardLatCorrection)), color=plotter.upwardColor)
+        else:
+            plotter.ax.annotate(dat.Name, ((dat.Longitude + plotter.normalLonCorrection),
+                                (dat.Latitude + plotter.normalLatCorrection)), color=plotter.normalColor)
+        plotter.ax.scatter(dat.Longitude, dat.Latitude, zorder=1,
+                           alpha=0.8, color=plotter.arrowColor, s=10, marker='^')
+    for idx, dat in df2.iterrows():
+        plotter.ax.annotate(dat.Name, ((dat.Longitude + plotter.downwardLonCorrection),
+                            (dat.Latitude + plotter.downwardLatCorrection)), color=plotter.downwardColor)
+        plotter.ax.scatter(dat.Longitude, dat.Latitude, zorder=1,
+                           alpha=0.8, color=plotter.arrowColor, s=10, marker='v')
+
+
+def legacyListy(plotter):
+    """Per name concat/drop loop of PlotDATA.listy() before categories (reference)."""
+    df = plotter.df.copy()
+    df2 = pd.DataFrame({'Name': [], 'Longitude': [], 'Latitude': [], 'Altitude': []})
+    for i in plotter.listyDown:
+        x = df[df['Name'] == i].index.values.astype(int)[0]
+        df2 = pd.concat([df.loc[[x]], df2], ignore_index=True)
+        df.drop(index=x, inplace=True)
+    df.reset_index(inplace=True)
+    return df, df2
+
+
+def syntheticPlotter(count):
+    """Return a PlotDATA with [count] random points in its BBox, without any .kml file."""
+    from PlotDATA import PlotDATA
+    plotter = PlotDATA.__new__(PlotDATA)
+    VariableGlobal.__init__(plotter)
+    rng = np.random.default_rng(0)
+    names = np.array([f'Place {i}' if i % 10 else f'PLACE {i}' for i in range(count)], dtype=object)
+    lon = rng.uniform(plotter.BBox[0], plotter.BBox[2], count)
+    lat = rng.uniform(plotter.BBox[1], plotter.BBox[3], count)
+    plotter.points = PointTable(names, lon, lat, np.zeros(count))
+    plotter.df = plotter.points.toDataFrame()
+    plotter.listyUp = list(names[1::7])
+    plotter.listyDown = list(names[2::7])
+    # No lines nor polygons, every map rendered (maps of an earlier run not skipped)
+    plotter.shapes = ShapeTable()
+    plotter.renderCache = False
+    return plotter
+
+
+def renderPlot(plotter, plot):
+    """Time plot(plotter) & drawing of the figure."""
+    fig, plotter.ax = plt.subplots(figsize=(plotter.figSize), dpi=plotter.dpi)
+    plotter.layers = []
+    plotter.ax.set_xlim(plotter.BBox[0], plotter.BBox[2])
+    plotter.ax.set_ylim(plotter.BBox[1], plotter.BBox[3])
+    plotter.listy()
+    start = perf_counter()
+    plot(plotter)
+    fig.canvas.draw()
+    seconds = perf_counter() - start
+    plt.close(fig)
+    return seconds
+
+
+def benchPlot(count, directory):
+    """Compare the per row plot with the per category PlotDATA.plot()."""
+    os.chdir(directory)
+    plotter = syntheticPlotter(count)
+    for case, plot in (('per row', legacyPlot), ('PlotDATA.plot', lambda p: p.plot())):
+        seconds = renderPlot(plotter, plot)
+        logging.info(f'{case:16s} : {seconds:.2f} s ({count} points)')
+        record('plot', case, count, seconds)
+
+
+def benchRenderLoop(count, directory):
+    """Render count maps in one process, reusing the figure or not, & follow memory."""
+    import tifffile
+    from RasterCache import RasterCache
+    os.chdir(directory)
+    plotter = syntheticPlotter(1000)
+    plotter.figSize, plotter.csvSrc, plotter.csvPath = (16.0, 12.0), '', ''
+    # Synthetic raster where PlotDATA.basemap() looks for it
+    path = RasterCache(f'{plotter.workingDirectory}/{plotter.rasterDirectory}').put(plotter)
+    tifffile.imwrite(path, np.full((2000, 2000, 3), 128, dtype=np.uint8))
+    for reuse in (True, False):
+        start, memory = perf_counter(), []
+        for i in range(count):
+            plotter.figTitle = f'Map {i}'
+            plotter.renderMap()
+            if not reuse:
+                plotter.close()
+            memory.append(residentMB())
+        seconds = (perf_counter() - start) / count
+        logging.info(f'{count} maps, {"figure reused" if reuse else "new figures  "} : '
+                     f'{seconds:.2f} s per map, memory {memory[0]:.0f} MB after the first, '
+                     f'{memory[-1]:.0f} MB after the last')
+        record('renderLoop', 'figure reused' if reuse else 'new figures', count, seconds,
+               firstMB=round(memory[0], 1), lastMB=round(memory[-1], 1))
+        plotter.close()
+
+
+def benchTileRender(count, zooms, directory):
+    """Render z/x/y tiles of count points, then again after moving one point (only its tiles)."""
+    from TileRenderer import TileRenderer
+    from RasterCache import RasterCache
+    os.chdir(directory)
+    renderer = TileRenderer.__new__(TileRenderer)
+    VariableGlobal.__init__(renderer)
+    renderer.csvSrc = renderer.csvPath = os.path.join(directory, f'tiles_{count}.csv')
+    renderer.tileZooms, renderer.tileWorkers = zooms, 1
+    renderer.tileStore = f'tiles_{count}.mbtiles'
+    syntheticCSV(renderer.csvSrc, count)
+    path = RasterCache(f'{renderer.workingDirectory}/{renderer.rasterDirectory}').put(renderer)
+    if not os.path.exists(path):
+        syntheticTIFF(path, 4000)
+    renderer.prepare()
+    for case in ('every tile', 'one point moved', 'nothing changed'):
+        if case == 'one point moved':
+            renderer.points.lon = renderer.points.lon.copy()
+            renderer.points.lon[0] += 0.01
+            renderer.points.grid = None
+            renderer.lon = renderer.points.lon
+        seconds, _ = timeIt(renderer.render)
+        logging.info(f'Tiles of {count} points, zooms {zooms[0]}-{zooms[1]}, {case:15s} : {seconds:.2f} s')
+        record('tileRender', case, count, seconds)
+    renderer.close()
+    os.remove(renderer.csvSrc)
+
+
+def benchEncode(dpis, directory):
+    """Compare savefig(bbox_inches='tight') with one draw & ImageEncoder formats, at every dpi."""
+    from ImageEncoder import ImageEncoder
+    rng = np.random.default_rng(0)
+    for dpi in dpis:
+        # Raster with some texture (flat colors would compress too well) & points
+        fig, ax = plt.subplots(figsize=(32.0, 24.0), dpi=dpi)
+        ax.imshow(rng.integers(0, 256, (600, 800, 3), dtype=np.uint8), interpolation='bilinear')
+        ax.scatter(rng.uniform(0, 800, 5000), rng.uniform(0, 600, 5000), s=4, c='red')
+        ax.set_title('Encode')
+        path = os.path.join(directory, 'encode')
+        start = perf_counter()
+        fig.savefig(f'{path}.png', bbox_inches='tight')
+        cases = [('savefig tight', perf_counter() - start, os.path.getsize(f'{path}.png'))]
+        for case, encoder in (('png level 3', ImageEncoder('png', 3)), ('png level 6', ImageEncoder('png', 6)),
+                              ('webp', ImageEncoder('webp')), ('jpeg', ImageEncoder('jpeg')),
+                              ('geotiff', ImageEncoder('geotiff'))):
+            start = perf_counter()
+            fig.canvas.draw()
+            image = np.asarray(fig.canvas.get_renderer().buffer_rgba())
+            encoder.encode(f'{path}{encoder.extension}', image, dpi, (0.0, 1.0, 1e-4, 1e-4))
+            cases.append((case, perf_counter() - start, os.path.getsize(f'{path}{encoder.extension}')))
+        plt.close(fig)
+        for case, seconds, size in cases:
+            logging.info(f'{dpi:.0f} dpi, {case:13s} : {seconds:.2f} s, {size / 1e6:.1f} MB')
+            record('encode', case, dpi, seconds, fileMB=round(size / 1e6, 2))
+
+
+def benchCull(count, directory):
+    """Plot a small BBox of a continent wide layer of count points, with & without cull()."""
+    os.chdir(directory)
+    plotter = syntheticPlotter(count)
+    rng = np.random.default_rng(1)
+    # Points spread over Africa instead of the BBox
+    plotter.points.lon[:] = rng.uniform(-20, 50, count)
+    plotter.points.lat[:] = rng.uniform(-35, 35, count)
+    plotter.view = [plotter.BBox[0], plotter.BBox[2], plotter.BBox[1], plotter.BBox[3]]
+    # Built once per layer, then shared by every map
+    seconds, _ = timeIt(plotter.points.spatialIndex)
+    logging.info(f'Spatial index of {count} points : {seconds:.2f} s')
+    record('cull', 'spatial index', count, seconds)
+    for cull in (False, True):
+        plotter.df = plotter.points.toDataFrame()
+        fig, plotter.ax = plt.subplots(figsize=(plotter.figSize), dpi=plotter.dpi)
+        plotter.layers = []
+        plotter.ax.set_xlim(plotter.view[0], plotter.view[1])
+        plotter.ax.set_ylim(plotter.view[2], plotter.view[3])
+        start = perf_counter()
+        if cull:
+            plotter.cull()
+        plotter.listy()
+        plotter.plot()
+        fig.canvas.draw()
+        seconds = perf_counter() - start
+        plt.close(fig)
+        logging.info(f'{count} points, {len(plotter.df)} plotted, '
+                     f'{"culled    " if cull else "not culled"} : {seconds:.2f} s')
+        record('cull', 'culled' if cull else 'not culled', count, seconds, plotted=len(plotter.df))
+
+
+def syntheticCoastline(plotter, vertices):
+    """Return a ShapeTable of an island polygon & a river line of [vertices] noisy vertices each, around the BBox."""
+    rng = np.random.default_rng(2)
+    west, south, east, north = plotter.BBox
+    angle = np.linspace(0, 2 * np.pi, vertices)
+    radius = 1 + 0.05 * np.cumsum(rng.normal(0, 0.01, vertices))
+    island = np.column_stack([(west + east) / 2 + (east - west) * 0.4 * radius * np.cos(angle),
+                              (south + north) / 2 + (north - south) * 0.4 * radius * np.sin(angle)])
+    river = np.column_stack([np.linspace(west, east, vertices),
+                             south + (north - south) * (0.3 + 0.01 * np.cumsum(rng.normal(0, 0.05, vertices)))])
+    return ShapeTable.fromGeometries([('Island', '', Geometry('Polygon', [island])),
+                                      ('River', '', Geometry('LineString', [river]))])
+
+
+def benchShapes(vertices, directory):
+    """Draw a polygon & a line of [vertices] vertices each, simplified or not."""
+    os.chdir(directory)
+    plotter = syntheticPlotter(0)
+    plotter.shapes = syntheticCoastline(plotter, vertices)
+    plotter.view = [plotter.BBox[0], plotter.BBox[2], plotter.BBox[1], plotter.BBox[3]]
+    for case, plotter.shapeTolerance in (('every vertex', 0), ('simplified', 0.5), ('simplified, cached', 0.5)):
+        fig, plotter.ax = plt.subplots(figsize=(plotter.figSize), dpi=plotter.dpi)
+        plotter.layers = []
+        plotter.ax.set_xlim(plotter.view[0], plotter.view[1])
+        plotter.ax.set_ylim(plotter.view[2], plotter.view[3])
+        start = perf_counter()
+        plotter.plotShapes()
+        fig.canvas.draw()
+        seconds = perf_counter() - start
+        plt.close(fig)
+        # The second 0.5 reuses the parts simplified by the first one
+        logging.info(f'{2 * vertices} vertices, shapeTolerance {plotter.shapeTolerance} : {seconds:.2f} s')
+        record('shapes', case, 2 * vertices, seconds)
+
+
+def benchListy(count, directory):
+    """Compare the per name listy() loop with the one pass PlotDATA.listy()."""
+    os.chdir(directory)
+    plotter = syntheticPlotter(count)
+    seconds, _ = timeIt(legacyListy, plotter)
+    logging.info(f'Per name listy   : {seconds:.2f} s ({len(plotter.listyDown)} names)')
+    record('listy', 'per name', count, seconds)
+    seconds, _ = timeIt(plotter.listy)
+    logging.info(f'PlotDATA.listy   : {seconds:.3f} s ({len(plotter.listyDown)} names)')
+    record('listy', 'PlotDATA.listy', count, seconds)
+
+
+def legacyBasemap(path):
+    """Former PlotDATA.tiffPNG() & load() : cv2 .tiff -> uncompressed .png -> plt.imread (reference)."""
+    from cv2 import imread, imwrite, IMWRITE_PNG_COMPRESSION
+    pngPath = path[:-len('.tiff')] + '.png'
+    imwrite(pngPath, imread(path), [int(IMWRITE_PNG_COMPRESSION), 0])
+    image = plt.imread(pngPath)
+    os.remove(pngPath)
+    return image
+
+
+def tiffBasemap(path):
+    """PlotDATA.basemap() : .tiff file memory-mapped."""
+    import tifffile
+    return tifffile.memmap(path, mode='r')
+
+
+def drawBasemap(load, path, queue):
+    """Load & draw a basemap (in a child process), put (seconds, peak MB of the process) in queue."""
+    start = perf_counter()
+    image = load(path)
+    fig, ax = plt.subplots(figsize=(32, 24), dpi=100)
+    if isinstance(image, np.memmap):
+        # Strided view, the memory-mapped loading without overviews (benchPyramid times PlotDATA.show()'s BasemapPyramid)
+        step = max(1, int(min(image.shape[1] / ax.bbox.width, image.shape[0] / ax.bbox.height)))
+        image = image[::step, ::step]
+    ax.imshow(image, extent=[0, 1, 0, 1])
+    fig.canvas.draw()
+    plt.close(fig)
+    queue.put((perf_counter() - start, peakMB()))
+
+
+def benchBasemap(size, directory):
+    """Compare the .png round trip with the memory-mapped .tiff file on a size x size raster."""
+    import tifffile
+    path = os.path.join(directory, 'response.tiff')
+    syntheticTIFF(path, size)
+    queue = multiprocessing.Queue()
+    for name, load in (('.png round trip', legacyBasemap), ('memory-mapped  ', tiffBasemap)):
+        # Own process each, so peak memory is not shared
+        process = multiprocessing.Process(target=drawBasemap, args=(load, path, queue))
+        process.start()
+        process.join()
+        if process.exitcode:
+            # Killed, most likely out of memory
+            logging.info(f'Basemap {size} x {size}, {name} : failed (exit code {process.exitcode})')
+            record('basemap', name.strip(), size, float('nan'), exitCode=process.exitcode)
+            continue
+        seconds, peak = queue.get()
+        logging.info(f'Basemap {size} x {size}, {name} : {seconds:.2f} s, peak {peak:.0f} MB')
+        record('basemap', name.strip(), size, seconds, peakMB=round(peak, 1))
+    os.remove(path)
+
+
+def processBigRaster(path, queue):
+    """Colour scale, build overviews, export & preview the raster of path, by blocks.
+
+Put [(step, seconds, peak MB allocated by numpy & co)] & peak resident MB in queue.
+    """
+    from BlockRaster import BlockRaster
+    from BasemapPyramid import BasemapPyramid
+    steps = []
+
+    def step(name, function, *args):
+        tracemalloc.start()
+        start = perf_counter()
+        result = function(*args)
+        steps.append((name, perf_counter() - start, tracemalloc.get_traced_memory()[1] / 1e6))
+        tracemalloc.stop()
+        return result
+
+    raster = step('colour scaling', lambda: BlockRaster.open(path).display())
+    pyramid = BasemapPyramid(path, raster.image)
+    step('overviews', pyramid.build)
+    step('.png export', raster.export, path[:-len('.tiff')] + '.png')
+    # Preview as SentinelHubDownload.showPreview() (factor 1/255 on an overview)
+    step('preview', lambda: pyramid.window([0, 1, 0, 1], [0, 1, 0, 1], 1000, 1000)[0] * (1 / 255))
+    queue.put((steps, peakMB()))
+
+
+def benchBigRaster(size, directory):
+    """Process a size x size 16 bits RGB raster (6 GB at 32 000) by blocks, in its own process."""
+    path = os.path.join(directory, 'response.tiff')
+    syntheticTIFF(path, size, dtype=np.uint16)
+    gigabytes = os.path.getsize(path) / 1e9
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=processBigRaster, args=(path, queue))
+    process.start()
+    process.join()
+    if process.exitcode:
+        # Killed, most likely out of memory
+        logging.info(f'Big raster {size} x {size} : failed (exit code {process.exitcode})')
+        record('bigRaster', 'failed', size, float('nan'), exitCode=process.exitcode)
+    else:
+        steps, resident = queue.get()
+        for name, seconds, peak in steps:
+            logging.info(f'Big raster {size} x {size} ({gigabytes:.1f} GB), {name:14s} : {seconds:.1f} s, '
+                         f'peak {peak:.0f} MB allocated')
+            record('bigRaster', name, size, seconds, peakMB=round(peak, 1), rasterGB=round(gigabytes, 2))
+        # Pages of memory-mapped files count here too, the OS drops them when memory is needed
+        logging.info(f'Big raster {size} x {size} : peak resident {resident:.0f} MB (file pages included)')
+    for name in os.listdir(directory):
+        if name.startswith(('overview_', 'response')):
+            os.remove(os.path.join(directory, name))
+
+
+def previewBasemap(image, path, view, pyramid):
+    """Draw an 8 x 6 inches preview of view ([west, east, south, north] of a [0, 1] raster)."""
+    from BasemapPyramid import BasemapPyramid
+    fig, ax = plt.subplots(figsize=(8, 6), dpi=100)
+    ax.set_xlim(view[0], view[1])
+    ax.set_ylim(view[2], view[3])
+    extent = [0, 1, 0, 1]
+    if pyramid:
+        image, extent = BasemapPyramid(path, image).window(extent, view, ax.bbox.width, ax.bbox.height)
+    else:
+        # Strided view of the whole raster, as PlotDATA.show() did before overviews
+        step = max(1, int(min(image.shape[1] / ax.bbox.width, image.shape[0] / ax.bbox.height)))
+        image = image[::step, ::step]
+    ax.imshow(image, extent=extent)
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def benchPyramid(size, directory):
+    """Compare previews of a size x size raster drawn from the full array & from its overviews."""
+    import tifffile
+    path = os.path.join(directory, 'response.tiff')
+    syntheticTIFF(path, size)
+    image = tifffile.memmap(path, mode='r')
+    for view in ([0, 1, 0, 1], [0.25, 0.5, 0.25, 0.5]):
+        seconds, _ = timeIt(previewBasemap, image, path, view, False)
+        logging.info(f'Preview {view} of {size} x {size}, strided raster : {seconds:.2f} s')
+        record('pyramid', f'strided {view}', size, seconds)
+        # First preview also computes the overviews
+        for case in ('overviews built', 'overviews'):
+            seconds, _ = timeIt(previewBasemap, image, path, view, True)
+            logging.info(f'Preview {view} of {size} x {size}, overviews      : {seconds:.2f} s')
+            record('pyramid', f'{case} {view}', size, seconds)
+    del image
+    for name in os.listdir(directory):
+        if name.startswith('overview_') or name == 'response.tiff':
+            os.remove(os.path.join(directory, name))
+
+
+def benchTiles(workers, directory):
+    """Time downloadTiles() of both download backends against FakeSentinelHub for each number of workers."""
+    from FakeSentinelHub import FakeSentinelHub
+    from SentinelHubDownload import SentinelHubDownload
+    from AsyncSentinelHubDownload import AsyncSentinelHubDownload
+    # oauthlib refuses http:// token urls otherwise
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+    os.chdir(directory)
+    # sentinelhub spaces requests by 50 ms, so latency must be realistic to see scaling
+    fake = FakeSentinelHub(latency=1.0, failureRate=0.05, rateLimitRate=0.02)
+    baseUrl = fake.start()
+    for count in workers:
+        VariableGlobal.options.update({'shBaseUrl': baseUrl, 'shTokenUrl': f'{baseUrl}/oauth/token',
+                                       'clientID': 'fake', 'clientSecret': 'fake',
+                                       'maxTilePixels': 512, 'downloadWorkers': count,
+                                       'retryBackoff': 0.1})
+        for backend, Downloader in (('threads', SentinelHubDownload),
+                                    ('asyncio', AsyncSentinelHubDownload)):
+            downloader = Downloader()
+            downloader.sentinelParameters()
+            downloader.tileParameters()
+            seconds, _ = timeIt(downloader.downloadTiles)
+            logging.info(f'{len(downloader.tiles)} tiles, {count:2d} workers, {backend} : {seconds:.2f} s')
+            record('tiles', f'{backend}, {count} workers', len(downloader.tiles), seconds)
+    logging.info(f'Fake Sentinel Hub : {fake.counts}')
+    fake.stop()
+    VariableGlobal.options.clear()
+
+
+def benchComposite(size, scenes, directory):
+    """Composite scenes of a size x size raster with known cloud masks & check the result.
+
+Clear pixels of every scene are the ground truth, so the composite must equal it -
+wherever at least one scene is clear, whatever the method : the run stops with exit code 1 if not.
+    """
+    from SceneComposite import SceneComposite
+    rng = np.random.default_rng(0)
+    truth = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    stack = SceneComposite(os.path.join(directory, 'scenes.npy'), scenes, size, size)
+    rows, columns = np.ogrid[:size, :size]
+    for index in range(scenes):
+        clouds = np.zeros((size, size), dtype=bool)
+        for _ in range(20):
+            row, column, radius = rng.uniform(0, size, 2).tolist() + [rng.uniform(0.05, 0.2) * size]
+            clouds |= (rows - row) ** 2 + (columns - column) ** 2 < radius ** 2
+        scene = np.empty((size, size, 4), dtype=np.uint8)
+        scene[..., :3] = np.where(clouds[..., None], 255, truth)
+        scene[..., 3] = clouds * 255
+        stack.put(index, scene)
+        del scene
+    clear = ~(stack.stack[..., 3] != 0).all(axis=0)
+    path = os.path.join(directory, 'composite.tiff')
+    for method in ('median', 'best'):
+        tracemalloc.start()
+        start = perf_counter()
+        stack.write(path, method, rows=512)
+        seconds = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        import tifffile
+        wrong = int(np.count_nonzero((tifffile.memmap(path, mode='r') != truth).any(axis=2) & clear))
+        logging.info(f'Composite {size} x {size}, {scenes} scenes, {method:6s} : {seconds:.2f} s, '
+                     f'peak {peak:.0f} MB (stack {stack.stack.nbytes / 1e6:.0f} MB), '
+                     f'{wrong} clear pixels wrong, {np.count_nonzero(~clear)} cloudy everywhere')
+        record('composite', method, size, seconds, scenes=scenes, peakMB=round(peak, 1), wrongPixels=wrong)
+        if wrong:
+            # A check, not only a timing : the run fails (exit code 1)
+            logging.error(f'{method} composite differs from the clear scenes on {wrong} pixels !')
+            stack.close()
+            quit(1)
+    stack.close()
+    os.remove(path)
+
+
+def benchKmlParsers(count, directory):
+    """Compare the legacy parser with placemarkReader() on a synthetic file."""
+    path = os.path.join(directory, f'synthetic_{count}.kml')
+    syntheticKML(path, count)
+    logging.info(f'Synthetic file : {os.path.getsize(path) / 1e6:.1f} MB, {count} placemarks')
+
+    legacy, rows = timeIt(legacyFilePrinter, path)
+    logging.info(f'Legacy parser    : {legacy:.2f} s ({len(rows) - 1} rows)')
+    record('kmlParsers', 'legacy parser', count, legacy)
+    del rows
+    streaming, placemarks = timeIt(streamingCount, path)
+    logging.info(f'placemarkReader  : {streaming:.2f} s ({placemarks} placemarks)')
+    record('kmlParsers', 'placemarkReader', count, streaming)
+    os.remove(path)
+
+
+def benchIngest(files, count, workers, directory):
+    """Time KmlCSV.readLayers() of [files] synthetic .kml files for each number of workers."""
+    from KmlCSV import KmlCSV
+    os.chdir(directory)
+    paths = [os.path.join(directory, f'layer_{i}.kml') for i in range(files)]
+    for path in paths:
+        syntheticKML(path, count)
+    size = sum(os.path.getsize(path) for path in paths) / 1e6
+    reader = KmlCSV.__new__(KmlCSV)
+    # Settings (nameField...) without converting kmlSrc
+    VariableGlobal.__init__(reader)
+    for reader.ingestWorkers in workers:
+        seconds, layers = timeIt(reader.readLayers, paths)
+        points = sum(len(table) for table, _, _ in layers)
+        logging.info(f'{files} files ({size:.0f} MB, {points} points), '
+                     f'{reader.ingestWorkers:2d} workers : {seconds:.2f} s')
+        record('ingest', f'{reader.ingestWorkers} workers', points, seconds, files=files)
+    for path in paths:
+        os.remove(path)
+
+
+def benchVectorReaders(count, directory):
+    """Time & peak memory of readLayer() on the same points as .kml, .shp & .geojson files."""
+    from KmlCSV import readLayer
+    for extension, write in (('.kml', syntheticKML), ('.shp', syntheticShapefile),
+                             ('.geojson', syntheticGeoJSON)):
+        path = os.path.join(directory, f'vector_{count}{extension}')
+        write(path, count)
+        size = sum(os.path.getsize(file) for file in glob(os.path.splitext(path)[0] + '.*')) / 1e6
+        # Timed without tracemalloc, which slows Python objects allocations
+        seconds, _ = timeIt(readLayer, path)
+        _, peak = peakMemory(readLayer, path)
+        logging.info(f'{extension:8s} ({size:.0f} MB, {count} points) : {seconds:.2f} s, peak {peak:.0f} MB')
+        record('vectorReaders', extension, count, seconds, peakMB=round(peak, 1))
+        for file in glob(os.path.splitext(path)[0] + '.*'):
+            os.remove(file)
+
+
+def benchFilePrinter(count, directory):
+    """Time KmlCSV.filePrinter() on Points only & on nested Folders of Points, LineStrings & Polygons."""
+    from KmlCSV import KmlCSV
+    os.chdir(directory)
+    printer = KmlCSV.__new__(KmlCSV)
+    path = os.path.join(directory, f'printer_{count}.kml')
+    for case, folders, kinds in (('points', 0, ('Point',)),
+                                 ('nested, mixed', 3, ('Point', 'LineString', 'Polygon'))):
+        syntheticKML(path, count, folders, kinds)
+        seconds, rows = timeIt(printer.filePrinter, path)
+        logging.info(f'filePrinter, {case:13s} : {seconds:.2f} s ({len(rows) - 1} rows of {count} placemarks)')
+        record('filePrinter', case, count, seconds, rows=len(rows) - 1)
+        os.remove(path)
+
+
+def benchStages(counts, size, directory):
+    """Time every stage of PlotDATA.exeSeq() for a .csv file of each count of points on a size x size raster."""
+    from PlotDATA import PlotDATA
+    from RasterCache import RasterCache
+    os.chdir(directory)
+    for count in counts:
+        plotter = PlotDATA.__new__(PlotDATA)
+        VariableGlobal.__init__(plotter)
+        plotter.csvSrc = plotter.csvPath = os.path.join(directory, f'points_{count}.csv')
+        plotter.figTitle = f'Stages {count}'
+        syntheticCSV(plotter.csvSrc, count)
+        # Synthetic raster where PlotDATA.basemap() looks for it, overviews built once
+        path = RasterCache(f'{plotter.workingDirectory}/{plotter.rasterDirectory}').put(plotter)
+        if not os.path.exists(path):
+            syntheticTIFF(path, size)
+        # Every stage timed, the map of an earlier run isn't skipped
+        plotter.renderCache = False
+        profiler = Profiler('')
+        # Same sequence as PlotDATA.exeSeq()
+        for stage in (plotter.basemap, plotter.load, plotter.axes, plotter.cull, plotter.fingerprint):
+            profiler.stage(stage)
+        for stage in plotter.staleStages() + [plotter.close]:
+            profiler.stage(stage)
+        for stage in profiler.stages:
+            record('stages', stage['name'], count, stage['wall'], cpu=stage['cpu'],
+                   rssDeltaMB=stage['rssDeltaMB'], raster=size)
+        logging.info(f'{count} points on {size} x {size} : ' +
+                     ', '.join(f'{stage["name"].split(".")[-1]} {stage["wall"]:.2f} s' for stage in profiler.stages))
+        os.remove(plotter.csvSrc)
+
+
+def benchPointTable(count, directory):
+    """Compare the .csv round trip with the in-process PointTable."""
+    path = os.path.join(directory, f'synthetic_{count}.kml')
+    syntheticKML(path, count)
+
+    seconds, peak = peakMemory(csvRoundTrip, path, os.path.join(directory, 'points.csv'))
+    logging.info(f'.csv round trip  : {seconds:.2f} s, peak {peak:.0f} MB')
+    record('pointTable', '.csv round trip', count, seconds, peakMB=round(peak, 1))
+    seconds, peak = peakMemory(inProcessTable, path)
+    logging.info(f'PointTable       : {seconds:.2f} s, peak {peak:.0f} MB')
+    record('pointTable', 'PointTable', count, seconds, peakMB=round(peak, 1))
+    os.remove(path)
+
+
+def metadata():
+    """Return {dict} describing the run : date, commit, versions & machine."""
+    import platform
+    import subprocess
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'date': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'matplotlib': matplotlib.__version__,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count()}
+
+
+def saveResults(path, arguments):
+    """Write metadata, arguments & RESULTS of the run in a .json file."""
+    with open(path, 'w', encoding=('utf8')) as file:
+        json.dump({'metadata': metadata(), 'arguments': arguments, 'results': RESULTS}, file, indent=1)
+    logging.info(f'{len(RESULTS)} results saved in "{os.path.abspath(path)}"')
+
+
+def compareResults(path):
+    """Log seconds of RESULTS against the same measures of a former .json file."""
+    with open(path, 'r', encoding=('utf8')) as file:
+        former = json.load(file)
+    seconds = {(result['benchmark'], result['case'], result['size']): result['seconds']
+               for result in former['results']}
+    logging.info(f'Compared with "{path}" (commit {former["metadata"].get("commit")}) :')
+    for result in RESULTS:
+        before = seconds.get((result['benchmark'], result['case'], result['size']))
+        if before:
+            logging.info(f'{result["benchmark"]:13s} {result["case"]:30s} {result["size"]:>9} : '
+                         f'{before:.3f} s -> {result["seconds"]:.3f} s ({result["seconds"] / before:.2f}x)')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    parser = argparse.ArgumentParser(description='Benchmarks of Sine-Saloum.')
+    parser.add_argument('--placemarks', type=int, default=1_000_000,
+                        help='Number of placemarks of the synthetic .kml file')
+    parser.add_argument('--points', type=int, default=500_000,
+                        help='Number of points for the PointTable benchmark')
+    parser.add_argument('--plot', type=int, default=50_000,
+                        help='Number of points for the plot benchmark')
+    parser.add_argument('--vertices', type=int, default=2_000_000,
+                        help='Number of vertices of the synthetic coastline & river')
+    parser.add_argument('--maps', type=int, default=100,
+                        help='Number of maps rendered in one process')
+    parser.add_argument('--basemap', type=int, nargs='*', default=[2_500, 5_000, 10_000],
+                        help='Widths & heights in pixels of the synthetic basemaps')
+    parser.add_argument('--files', type=int, default=50,
+                        help='Number of synthetic .kml files read by the ingestion benchmark')
+    parser.add_argument('--ingest-workers', type=int, nargs='*', default=[1, os.cpu_count()],
+                        help='Numbers of processes reading .kml files to compare')
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='Numbers of download workers to compare on a local fake Sentinel Hub')
+    parser.add_argument('--counts', type=int, nargs='*', default=[1_000, 10_000, 100_000],
+                        help='Numbers of points of the .csv files for the PlotDATA stages benchmark')
+    parser.add_argument('--raster', type=int, default=4_000,
+                        help='Width & height in pixels of the raster of the PlotDATA stages benchmark')
+    parser.add_argument('--big', type=int, default=32_000,
+                        help='Width & height in pixels of the 16 bits raster of the bigRaster benchmark')
+    parser.add_argument('--scenes', type=int, default=8,
+                        help='Number of synthetic scenes of the composite benchmark (size : --raster)')
+    parser.add_argument('--dpi', type=float, nargs='*', default=[100.0, 200.0],
+                        help='Dpi of the 32 x 24 inches figures of the encode benchmark')
+    parser.add_argument('--only', nargs='*', default=[],
+                        help='Benchmarks to run (default : all), ex: --only stages basemap')
+    parser.add_argument('--json', metavar='PATH', default='',
+                        help='Save results in a .json file (metadata, arguments & one entry per measure)')
+    parser.add_argument('--compare', metavar='PATH', default='',
+                        help='Compare results with a .json file of a former run')
+    args = parser.parse_args()
+    # Results are saved where the script is run from
+    args.json = os.path.abspath(args.json) if args.json else ''
+    benchmarks = {'kmlParsers': lambda: benchKmlParsers(args.placemarks, directory),
+                  'filePrinter': lambda: benchFilePrinter(args.points, directory),
+                  'pointTable': lambda: benchPointTable(args.points, directory),
+                  'vectorReaders': lambda: benchVectorReaders(args.points, directory),
+                  'ingest': lambda: benchIngest(args.files, args.placemarks // args.files,
+                                                args.ingest_workers, directory),
+                  'listy': lambda: benchListy(args.plot, directory),
+                  'plot': lambda: benchPlot(args.plot, directory),
+                  'stages': lambda: benchStages(args.counts, args.raster, directory),
+                  'renderLoop': lambda: benchRenderLoop(args.maps, directory),
+                  'tileRender': lambda: benchTileRender(args.plot, (8, 12), directory),
+                  'encode': lambda: benchEncode(args.dpi, directory),
+                  'composite': lambda: benchComposite(args.raster, args.scenes, directory),
+                  'cull': lambda: benchCull(args.points, directory),
+                  'shapes': lambda: benchShapes(args.vertices, directory),
+                  'basemap': lambda: [benchBasemap(size, directory) for size in args.basemap],
+                  'pyramid': lambda: [benchPyramid(size, directory) for size in args.basemap],
+                  'bigRaster': lambda: benchBigRaster(args.big, directory),
+                  'tiles': lambda: args.workers and benchTiles(args.workers, directory)}
+    unknown = set(args.only).difference(benchmarks)
+    if unknown:
+        parser.error(f'unknown benchmarks {sorted(unknown)}, choose in {list(benchmarks)}')
+    with tempfile.TemporaryDirectory() as directory:
+        for name, benchmark in benchmarks.items():
+            if not args.only or name in args.only:
+                benchmark()
+    if args.json:
+        saveResults(args.json, vars(args))
+    if args.compare:
+        compareResults(args.compare)
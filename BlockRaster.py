@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:41:37 2026
+
+@author: yan-s
+"""
+
+import os
+import logging
+import numpy as np
+import tifffile
+
+
+class BlockRaster:
+    """Raster in a .tiff file, memory-mapped & processed blockRows rows at a time :
+
+0) __init__() : Set path & memory-mapped (height, width[, bands]) array.
+1) open() : Memory-map a .tiff file (compressed or tiled ones decoded once, by tiles).
+2) create() : Create an uncompressed .tiff file of a shape, written in place.
+3) blocks() : Return [(first row, last row + 1), ...] of blocks of blockRows rows.
+4) paste() : Write a tile at a row & column (downloads in tiles).
+5) convert() : Write function(block) of every block in a new .tiff file.
+6) display() : Return the 8 bits RGB raster shown on maps (itself, else converted once beside it).
+7) export() : Save the raster as a .png file, by strips (ImageEncoder).
+8) flush() : Write pending changes to disk.
+
+Note : Only a block (blockRows x width x bands) is in memory at once, the rest is -
+paged from the file by the OS, so rasters larger than memory are processed.
+Files derived from a raster (decoded, display) are written beside it, once.
+    """
+
+    # Rows of a block processed at once (a 10 000 pixels wide RGB raster : 30 MB)
+    blockRows = 1024
+
+    def __init__(self, path, image):
+        """Set path of the .tiff file & its memory-mapped array."""
+        self.path = path
+        self.image = image
+
+    @classmethod
+    def open(cls, path):
+        """Return the BlockRaster of path, read only."""
+        try:
+            # Contiguous & uncompressed (as written by sentinelhub & create())
+            return cls(path, tifffile.memmap(path, mode='r'))
+        except ValueError:
+            pass
+        # Compressed or tiled : decoded once in an uncompressed file beside it
+        decodedPath = f'{path[:-len(".tiff")]}_decoded.tiff'
+        if not os.path.exists(decodedPath):
+            with tifffile.TiffFile(path) as tiff:
+                page = tiff.pages[0]
+                raster = cls.create(f'{decodedPath}.{os.getpid()}.part', page.shape, page.dtype)
+                # Tiles & strips are decoded straight into the memory-mapped file
+                page.asarray(out=raster.image)
+                raster.flush()
+                del raster
+            os.replace(f'{decodedPath}.{os.getpid()}.part', decodedPath)
+            logging.debug(f'"{path}" decoded in "{decodedPath}"')
+        return cls(path, tifffile.memmap(decodedPath, mode='r'))
+
+    @classmethod
+    def create(cls, path, shape, dtype):
+        """Return a new BlockRaster of shape (height, width[, bands]) & dtype, written in place."""
+        photometric = 'rgb' if len(shape) == 3 and shape[2] in (3, 4) else 'minisblack'
+        return cls(path, tifffile.memmap(path, shape=shape, dtype=dtype, photometric=photometric))
+
+    def blocks(self):
+        """Return [(start, stop), ...] rows of every block."""
+        height = self.image.shape[0]
+        return [(start, min(start + self.blockRows, height)) for start in range(0, height, self.blockRows)]
+
+    def paste(self, row, column, data):
+        """Write data (a tile) with its top left pixel at row, column."""
+        self.image[row:row + data.shape[0], column:column + data.shape[1]] = data
+
+    def convert(self, path, function, bands, dtype):
+        """Write function(block) of every block in a new .tiff file path (atomically), -
+bands & dtype of its result. Return its BlockRaster (read only).
+        """
+        partPath = f'{path}.{os.getpid()}.part'
+        raster = BlockRaster.create(partPath, self.image.shape[:2] + ((bands,) if bands else ()), dtype)
+        for start, stop in self.blocks():
+            raster.image[start:stop] = function(np.asarray(self.image[start:stop]))
+        raster.flush()
+        del raster
+        os.replace(partPath, path)
+        return BlockRaster(self.path, tifffile.memmap(path, mode='r'))
+
+    def display(self):
+        """Return the 8 bits RGB BlockRaster of this raster (colour scaled), itself if it already is.
+
+Integers are scaled from the range of their type (16 bits shown in 8 bits as cv2 did), -
+floats (0 - 1) to 0 - 255, grayscale as RGB & bands after the 3rd dropped.
+        """
+        image = self.image
+        if image.dtype == np.uint8 and image.ndim == 3 and image.shape[2] == 3:
+            return self
+        displayPath = f'{self.path[:-len(".tiff")]}_display.tiff'
+        if os.path.exists(displayPath):
+            return BlockRaster(self.path, tifffile.memmap(displayPath, mode='r'))
+
+        def scale(block):
+            if block.dtype.kind == 'u' and block.dtype != np.uint8:
+                # Most significant byte (uint16 >> 8)
+                block = (block >> (8 * block.dtype.itemsize - 8)).astype(np.uint8)
+            elif block.dtype.kind == 'i':
+                # Most significant byte, minimum of the type at 0 (int16 -32768 -> 0, 32767 -> 255)
+                block = (block >> (8 * block.dtype.itemsize - 8)).astype(np.int8).view(np.uint8) ^ np.uint8(0x80)
+            elif block.dtype.kind == 'b':
+                block = block.astype(np.uint8) * np.uint8(255)
+            elif block.dtype.kind == 'f':
+                block = (np.clip(block, 0, 1) * 255 + 0.5).astype(np.uint8)
+            if block.ndim == 2:
+                return np.repeat(block[..., None], 3, axis=2)
+            return np.repeat(block[..., :1], 3, axis=2) if block.shape[2] < 3 else block[..., :3]
+
+        logging.info(f'Colour scaling of "{self.path}" ({image.dtype}, {image.shape}) by blocks of {self.blockRows} rows.')
+        return self.convert(displayPath, scale, 3, np.uint8)
+
+    def export(self, path, pngLevel=3, dpi=100.0):
+        """Save the raster (8 bits RGB) as a .png file path (zlib level pngLevel), by strips."""
+        from ImageEncoder import ImageEncoder
+        ImageEncoder('png', pngLevel).encode(path, self.image, dpi)
+
+    def flush(self):
+        """Write pending changes of the memory-mapped file to disk."""
+        self.image.flush()
+
+
+if __name__ == '__main__':
+    print(BlockRaster.__doc__)
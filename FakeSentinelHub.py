@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:47:26 2026
+
+@author: yan-s
+"""
+
+import io
+import json
+import random
+import logging
+import threading
+import numpy as np
+from time import sleep
+from tifffile import imwrite
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeSentinelHub:
+    """Local stand-in for the Sentinel Hub Process API, for offline benchmarks :
+
+0) __init__() : Set latency of each request & rate of failed (500) or rate limited (429) requests.
+1) outcome() : Return 'failed', 'limited' or 'ok' for the next process request.
+2) clouds() : Return a synthetic cloud mask, the same for the same request.
+3) start() : Serve on 127.0.0.1 in a thread & return the base url.
+4) stop() : Shut the server down.
+
+Note : /oauth/token returns a dummy token & /api/v1/process a synthetic .tiff
+of the width & height asked in the request body (with a cloud mask band & -
+white clouds when the evalscript asks 4 bands, as compositeEvalscript).
+Set shBaseUrl & shTokenUrl of VariableGlobal to use it.
+    """
+
+    def __init__(self, latency=0.2, failureRate=0.0, rateLimitRate=0.0, seed=0):
+        """Set behaviour of the server."""
+        self.latency = latency
+        self.failureRate = failureRate
+        self.rateLimitRate = rateLimitRate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Counters of requests served
+        self.counts = {'token': 0, 'process': 0, 'failed': 0, 'limited': 0}
+        self.server = None
+
+    def outcome(self):
+        """Return 'failed', 'limited' or 'ok' for the next process request."""
+        with self.lock:
+            draw = self.random.random()
+            self.counts['process'] += 1
+            if draw < self.failureRate:
+                self.counts['failed'] += 1
+                return 'failed'
+            if draw < self.failureRate + self.rateLimitRate:
+                self.counts['limited'] += 1
+                return 'limited'
+            return 'ok'
+
+    def clouds(self, height, width, seed):
+        """Return a (height, width) cloud mask (255 cloudy) of a few discs, the same for the same seed."""
+        rng = np.random.default_rng(list(seed.encode()))
+        rows, columns = np.ogrid[:height, :width]
+        mask = np.zeros((height, width), dtype=bool)
+        for _ in range(8):
+            row, column = rng.uniform(0, height), rng.uniform(0, width)
+            radius = rng.uniform(0.05, 0.25) * max(height, width)
+            mask |= (rows - row) ** 2 + (columns - column) ** 2 < radius ** 2
+        return mask.astype(np.uint8) * 255
+
+    def start(self):
+        """Serve in a daemon thread & return the base url."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logging.debug(format % args)
+
+            def reply(self, code, body, contentType, headers=()):
+                self.send_response(code)
+                self.send_header('Content-Type', contentType)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.startswith('/oauth/token'):
+                    with fake.lock:
+                        fake.counts['token'] += 1
+                    token = {'access_token': 'fake', 'token_type': 'Bearer',
+                             'expires_in': 3600, 'expires_at': 4102444800}
+                    return self.reply(200, json.dumps(token).encode(), 'application/json')
+
+                sleep(fake.latency)
+                outcome = fake.outcome()
+                if outcome == 'failed':
+                    return self.reply(500, b'{"error": "fake failure"}', 'application/json')
+                if outcome == 'limited':
+                    # Sentinel Hub gives Retry-After in milliseconds
+                    return self.reply(429, b'{"error": "rate limited"}', 'application/json',
+                                      [('Retry-After', '1000')])
+
+                request = json.loads(body)
+                output = request.get('output', {})
+                width, height = output.get('width', 256), output.get('height', 256)
+                # Synthetic gradient, with a cloud mask band if the evalscript asks 4 bands
+                bands = 4 if 'bands: 4' in request.get('evalscript', '') else 3
+                image = np.empty((height, width, bands), dtype=np.uint8)
+                image[..., 0] = (np.arange(width) % 256).astype(np.uint8)[None, :]
+                image[..., 1] = (np.arange(height) % 256).astype(np.uint8)[:, None]
+                image[..., 2] = 128
+                if bands == 4:
+                    image[..., 3] = fake.clouds(height, width, json.dumps(request.get('input')))
+                    image[image[..., 3] == 255, :3] = 255
+                buffer = io.BytesIO()
+                imwrite(buffer, image)
+                return self.reply(200, buffer.getvalue(), 'image/tiff')
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        # Clients closing pooled connections are not errors
+        self.server.handle_error = lambda request, address: logging.debug(f'Connection of {address} closed')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def stop(self):
+        """Shut the server down."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+if __name__ == '__main__':
+    print(FakeSentinelHub.__doc__)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:58:20 2026
+
+@author: yan-s
+"""
+
+from VectorReader import VectorReader, Placemark, Geometry
+
+import json
+import logging
+import numpy as np
+
+
+# Whitespaces & separators between JSON values
+BLANKS = ' \t\r\n,'
+
+
+class GeoJSONReader(VectorReader):
+    """Read GeoJSON files (.geojson / .json), one Feature at a time :
+
+0) __init__() : Initialise parent class VectorReader().
+1) __iter__() : Yield a Placemark per Feature of the FeatureCollection.
+2) features() : Yield each Feature {dict}, parsed alone from a growing text buffer.
+3) geometries() : Return [list] of Geometry of a GeoJSON geometry.
+4) refill() : Read the next block of the file in the buffer.
+5) skip() : Move after whitespaces & separators.
+6) decode() : Parse the JSON value at the start of the buffer, reading more if cut.
+
+Note : The 'features' array is never loaded whole, json.JSONDecoder.raw_decode() parses -
+one Feature from the buffer, then it is dropped, so memory depends on the biggest Feature only.
+'name' of the FeatureCollection (if before 'features') is the title.
+GeoJSON uses wgs84 coordinates (RFC 7946).
+    """
+
+    # Characters read at once
+    blockSize = 1 << 20
+
+    def __init__(self, source, header=None, nameField=''):
+        """Initialise parent class VectorReader()."""
+        VectorReader.__init__(self, source, header, nameField)
+        self.header['nameField'] = nameField
+        self.decoder = json.JSONDecoder()
+
+    def __iter__(self):
+        """Yield a Placemark per Feature, 'Name' from its properties (else its id)."""
+        for feature in self.features():
+            properties = feature.get('properties') or {}
+            name = self.nameOf(properties, feature.get('id', ''))
+            yield Placemark(name, '', self.geometries(feature.get('geometry')))
+
+    def features(self):
+        """Yield each Feature of the file (a FeatureCollection, a Feature or a geometry)."""
+        # utf-8-sig skips the BOM some exports begin with
+        with open(self.source, 'r', encoding=('utf-8-sig')) as file:
+            self.file, self.buffer, self.position, self.end = file, '', 0, False
+            self.skip(' \t\r\n')
+            if not self.buffer.startswith('{', self.position):
+                logging.error(f'"{self.source}" is not a GeoJSON object !')
+                quit()
+            self.position += 1
+
+            # Members of the top level object, 'features' is streamed
+            members = {}
+            while True:
+                self.skip(BLANKS)
+                if self.position >= len(self.buffer) or self.buffer[self.position] == '}':
+                    break
+                key = self.decode()
+                self.skip(' \t\r\n:')
+                if key != 'features':
+                    members[key] = self.decode()
+                    if key == 'name':
+                        self.header.setdefault('title', str(members[key]))
+                    continue
+                # Array of Features
+                self.skip(' \t\r\n[')
+                while True:
+                    self.skip(BLANKS)
+                    if self.buffer.startswith(']', self.position):
+                        self.position += 1
+                        break
+                    yield self.decode()
+                members['features'] = None
+
+        # Not a FeatureCollection
+        if members.get('type') == 'Feature':
+            yield members
+        elif members.get('type') not in (None, 'FeatureCollection'):
+            yield {'geometry': members}
+
+    def geometries(self, geometry):
+        """Return [list] of Geometry of a GeoJSON geometry (Multi* give one per part)."""
+        if not geometry:
+            return []
+        kind, coordinates = geometry.get('type'), geometry.get('coordinates')
+        if kind == 'Point':
+            return [Geometry('Point', [[self.lonLatAlt([coordinates])[0]]])]
+        if kind == 'MultiPoint':
+            return [Geometry('Point', [[point]]) for point in self.lonLatAlt(coordinates)]
+        if kind == 'LineString':
+            return [Geometry('LineString', [self.array(coordinates)])]
+        if kind == 'MultiLineString':
+            return [Geometry('LineString', [self.array(line)]) for line in coordinates]
+        if kind == 'Polygon':
+            return [Geometry('Polygon', [self.array(ring) for ring in coordinates])]
+        if kind == 'MultiPolygon':
+            return [Geometry('Polygon', [self.array(ring) for ring in polygon])
+                    for polygon in coordinates]
+        if kind == 'GeometryCollection':
+            return [part for child in geometry.get('geometries', [])
+                    for part in self.geometries(child)]
+        logging.warning(f'Geometry "{kind}" not handled, skipped !')
+        return []
+
+    @staticmethod
+    def array(coordinates):
+        """Return (n, 3) array of lon, lat & alt (0 if not given) of [[lon, lat(, alt)], ...]."""
+        points = np.zeros((len(coordinates), 3))
+        for i, position in enumerate(coordinates):
+            points[i, :len(position[:3])] = position[:3]
+        return points
+
+    def lonLatAlt(self, coordinates):
+        """Return [list] of (lon, lat, alt) tuples of [[lon, lat(, alt)], ...]."""
+        return [tuple(point) for point in self.array(coordinates).tolist()]
+
+    def refill(self):
+        """Drop what was parsed & read the next block, return False at the end of the file."""
+        block = self.file.read(self.blockSize)
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+        self.end = not block
+        return not self.end
+
+    def skip(self, characters):
+        """Move after characters, reading more of the file if needed."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in characters:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.refill():
+                return
+
+    def decode(self):
+        """Return the JSON value at the position, reading more of the file while it is cut."""
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number may go on in the next block
+                if end < len(self.buffer) or self.end:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.end:
+                    logging.error(f'"{self.source}" is not valid GeoJSON : {e}')
+                    quit()
+            self.refill()
+
+
+if __name__ == '__main__':
+    print(GeoJSONReader.__doc__)
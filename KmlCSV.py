@@ -1,113 +1,186 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Aug  5 09:55:08 2022
-
-@author: yan-s
-"""
-
-from main import VariableGlobal
-
-import logging
-from csv import writer
-from os.path import exists
-
-
-class KmlCSV(VariableGlobal):
-    """Create a csv file from a googleEarth kml file.
-
-0) __init__() : Initialise, act like a 'main', create DataFrame from list of list from filePrinter(), and save it as .csv file.
-1) filePrinter() : Input .kml file & return a list of list ready to be transformed in a .csv file.
-
-Note : Really high chance that it may breaks in the future..
-    """
-
-    def __init__(self):
-        """Initialise parent, verify if a .kml file is input, 
-create a DataFrame from the .kml file using filePrinter() & savec it in a .csv file.
-        """
-        
-        # Initialise the 'parent class' 
-        VariableGlobal.__init__(self)
-        #
-        logging.warning('Start of conversion from kml to csv !')
-        
-        # Path of kml file
-        if not self.kmlSrc:
-            # Ask for .kml file path if not provided in __main__
-            self.kmlSrc = input(r'Path to googleEarth .kml file :').replace("'", '').replace('"', '')  
-
-        # The basic usage is to first define the rows of the csv file:
-        row_list = self.filePrinter(self.kmlSrc)
-        
-        # Set path of soon to be created .csv file
-        self.csvPath = f'{self.workingDirectory}/{self.title}.csv'      
-        
-        # And then use the following to create the csv file:
-        with open(self.csvPath, 'w', newline='', encoding=('utf8')) as file:
-            csvWriter = writer(file)
-            csvWriter.writerows(row_list)
-        logging.warning('End of conversion from kml to csv !\n')
-
-    def filePrinter(self, path):
-        """"Return a [list] of every Names and corresponding coordinates,
-by reading line by line, corresponding DATA.
-        """
-        # Create frame of 'return [list]' (=names of Columns)
-        out = [["Name", "Longitude", "Latitude", "Altitude"]]
-        try:
-            # Just a safeguard
-            if not exists(path):
-                logging.error('This file doesn\'t exist !')
-                quit()
-            else:
-                # Open .kml file
-                with open(path, 'r', encoding=('utf8')) as file:
-                    logging.debug('Start of file !')
-                    # Set [line] for
-                    line = []
-                    # Read line by line
-                    for ligne in file:
-                        # Search for tag <title> in file
-                        if ligne[:7] == '	<name>':
-                            self.title = ligne[7:-8]
-                            # And print the title of the file
-                            logging.debug(f'Titre : {self.title}')
-
-                        # Search for tag <desription> in file
-                        if ligne[:14] == '	<description>':
-                            description = ligne[14:-15]
-                            # And print the Description of the file
-                            logging.debug(f'Description : {description}')
-
-                        # Search for tag <name> in file
-                        if ligne[:8] == '		<name>':
-                            name = ligne[8:-8]
-                            # Retrieve data & add to line
-                            line.append(name)
-
-                        # Search for tag <coordinates> in file and -
-                        # retrieve Longitude, Latitude & Altitude
-                        if ligne[:16] == '			<coordinates>':
-                            lonLatAlt = ligne[16:-15]
-                            lonLatAlt = lonLatAlt.split(sep=',')
-                            # Add each coordinates individually in [line]
-                            for i in lonLatAlt:
-                                line.append(i)
-
-                        # 1 Name, and 3 coordinates per row
-                        if len(line) >= 4:
-                            # Add [line] in [out]
-                            out.append(line[-4:])
-                            # Reset [line]
-                            line = []
-
-                    logging.debug('End of file !')
-                # Return list of list [out]
-                return out
-        except Exception as e:
-            logging.error('Something gone wrong !')
-            print(e)
-
-
-if __name__ == '__main__':
-    print(KmlCSV.__doc__)
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Aug  5 09:55:08 2022
+
+@author: yan-s
+"""
+
+from main import VariableGlobal
+from PointTable import PointTable
+from ShapeTable import ShapeTable
+from LayerCache import LayerCache
+from Profiler import Profiler
+# placemarkReader, Placemark & Geometry were defined here, still imported from KmlCSV
+from KmlReader import KmlReader, placemarkReader
+from VectorReader import Placemark, Geometry
+from ShapefileReader import ShapefileReader
+from GeoJSONReader import GeoJSONReader
+
+import os
+import logging
+from glob import glob
+from zipfile import ZipFile
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from os.path import basename, splitext, dirname, commonpath, abspath
+
+
+# Reader of each file extension, reader(path, header, nameField) yields Placemarks
+READERS = {'.kml': KmlReader,
+           '.shp': ShapefileReader,
+           '.geojson': GeoJSONReader,
+           '.json': GeoJSONReader}
+
+
+def pointRows(source, header=None):
+    """Yield a [Name, Longitude, Latitude, Altitude, Folder] row for every Point of a .kml file."""
+    return KmlReader(source, header).pointRows()
+
+
+def expandSources(kmlSrc):
+    """Return sorted paths of vector files (.kml, .kmz, .shp...) from a path, a glob or a [list] of them."""
+    patterns = [kmlSrc] if isinstance(kmlSrc, str) else kmlSrc
+    paths = []
+    for pattern in patterns:
+        # A path without wildcard is kept, even missing (VectorReader() reports it)
+        matches = sorted(glob(pattern, recursive=True)) or [pattern]
+        paths.extend(match for match in matches if match not in paths)
+    return paths
+
+
+def readLayer(path, nameField=''):
+    """Return (PointTable, header, ShapeTable) of the Points, lines & polygons of a vector file (see READERS) or a .kmz file.
+
+.kml files of a .kmz archive are streamed from the zip, nothing is extracted.
+Module level function, so a process pool can run it.
+    """
+    header, source = {}, basename(path)
+    extension = splitext(path)[1].lower()
+    if extension in READERS:
+        points, shapes = READERS[extension](path, header, nameField).tables(source)
+        return points, header, shapes
+    if extension != '.kmz':
+        logging.error(f'Format of "{path}" not handled, use one of {sorted(READERS)} or .kmz !')
+        quit()
+    tables = []
+    with ZipFile(path) as archive:
+        for member in archive.namelist():
+            if member.lower().endswith('.kml'):
+                with archive.open(member) as file:
+                    tables.append(KmlReader(file, header).tables(source))
+    if not tables:
+        logging.warning(f'No .kml file in "{path}" !')
+        return PointTable([], [], [], []), header, ShapeTable()
+    return (PointTable.concat([points for points, _ in tables]), header,
+            ShapeTable.concat([shapes for _, shapes in tables]))
+
+
+class KmlCSV(VariableGlobal):
+    """Create a csv file from googleEarth kml files (or shapefiles, GeoJSON files).
+
+0) __init__() : Initialise, act like a 'main', stream Points from the .kml/.kmz/.shp/.geojson files (or their cache) in a PointTable, -
+lines & polygons in a ShapeTable & save points as .csv file if wanted.
+1) readLayers() : Read files not in the cache, in ingestWorkers processes if several.
+2) filePrinter() : Input .kml file & return a list of list ready to be transformed in a .csv file.
+
+Note : Files are read by the VectorReader of their extension (READERS), each one streams -
+its file : KmlReader (Point/LineString/Polygon/MultiGeometry & nested Folders), -
+ShapefileReader (.shp & .dbf record by record) & GeoJSONReader (Feature by Feature).
+'Name' of shapefiles & GeoJSON features is their nameField attribute.
+kmlSrc may be a path, a glob ('../layers/*.kmz') or a [list] of them, every Point -
+keeps its source file & folder ('Source' & 'Folder' columns).
+    """
+
+    def __init__(self):
+        """Initialise parent, verify if a .kml file is input,
+stream rows from the .kml/.kmz/.shp/.geojson files using readLayer() in self.points & save them in a .csv file if csvExport.
+        """
+
+        # Initialise the 'parent class'
+        VariableGlobal.__init__(self)
+        #
+        logging.warning('Start of conversion from kml to csv !')
+
+        # Path of kml file
+        if not self.kmlSrc:
+            # Ask for .kml file path if not provided in __main__
+            self.kmlSrc = input(r'Path to googleEarth .kml file :').replace("'", '').replace('"', '')
+
+        # Use layers already converted if their file didn't change
+        self.sources = expandSources(self.kmlSrc)
+        cache = LayerCache(f'{self.workingDirectory}/{self.cacheDirectory}')
+        layers = [cache.get(path) if self.useCache else None for path in self.sources]
+        # Named with another attribute (.shp, .geojson)
+        layers = [layer if layer is None or layer[1].get('nameField', self.nameField) == self.nameField
+                  else None for layer in layers]
+        missing = [i for i, layer in enumerate(layers) if layer is None]
+        profiler = Profiler.of(self)
+        read = profiler.stage(self.readLayers, [self.sources[i] for i in missing])
+        for i, layer in zip(missing, read):
+            layers[i] = layer
+            if self.useCache:
+                cache.put(self.sources[i], *layer)
+        for path, (points, header, shapes) in zip(self.sources, layers):
+            # Same content may be cached from another file name
+            points.source = points.constant(basename(path))
+            shapes.source = shapes.constant(basename(path))
+
+        # One table of every layer, in the order of the files
+        self.points = PointTable.concat([points for points, _, _ in layers])
+        self.shapes = ShapeTable.concat([shapes for _, _, shapes in layers])
+        header = layers[0][1]
+        if len(self.sources) == 1:
+            self.title = header.get('title') or splitext(basename(self.sources[0]))[0]
+        else:
+            # Several files, named after their directory
+            self.title = basename(commonpath([dirname(abspath(path)) for path in self.sources]))
+        logging.debug(f'Titre : {self.title}')
+        logging.debug(f'Description : {header.get("description", "")}')
+        logging.debug(f'{len(self.points)} points, {len(self.shapes)} lines & polygons found in {len(self.sources)} files !')
+
+        # Set path of soon to be created .csv file
+        self.csvPath = f'{self.workingDirectory}/{self.title}.csv'
+
+        # The .csv file is only a side output, PlotDATA uses self.points
+        if self.csvExport:
+            profiler.stage(self.points.toCSV, self.csvPath)
+        logging.warning('End of conversion from kml to csv !\n')
+
+    def readLayers(self, paths):
+        """Return [(PointTable, header, ShapeTable), ...] of paths, parsed in parallel if several."""
+        if len(paths) < 2 or self.ingestWorkers == 1:
+            layers = [readLayer(path, self.nameField) for path in paths]
+        else:
+            # Biggest files first, so no process ends up alone with a big one
+            order = sorted(range(len(paths)), key=lambda i: -os.path.getsize(paths[i]))
+            layers = [None] * len(paths)
+            with ProcessPoolExecutor(max_workers=self.ingestWorkers) as executor:
+                for i, layer in zip(order, executor.map(readLayer, [paths[i] for i in order],
+                                                             repeat(self.nameField))):
+                    layers[i] = layer
+        Profiler.of(self).count(files=len(paths), points=sum(len(points) for points, _, _ in layers),
+                                shapes=sum(len(shapes) for _, _, shapes in layers))
+        return layers
+
+    def filePrinter(self, path):
+        """"Return a [list] of every Names and corresponding coordinates,
+by reading Placemark by Placemark, corresponding DATA.
+        """
+        # Create frame of 'return [list]' (=names of Columns)
+        out = [["Name", "Longitude", "Latitude", "Altitude"]]
+        try:
+            header = {}
+            logging.debug('Start of file !')
+            out.extend(row[:4] for row in pointRows(path, header))
+            logging.debug('End of file !')
+            if 'title' in header:
+                self.title = header['title']
+            # Return list of list [out]
+            return out
+        except Exception as e:
+            logging.error('Something gone wrong !')
+            print(e)
+
+
+if __name__ == '__main__':
+    print(KmlCSV.__doc__)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:12:04 2026
+
+@author: yan-s
+"""
+
+from VectorReader import VectorReader, Placemark, Geometry
+
+from xml.etree.ElementTree import iterparse
+
+
+# Tags whose children are released as soon as they are read
+CONTAINERS = ('Document', 'Folder')
+
+
+def localTag(tag):
+    """Return tag without its '{namespace}'."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def parseCoordinates(text):
+    """Return a [list] of (lon, lat, alt) from the text of a <coordinates> tag."""
+    coordinates = []
+    # Tuples are separated by whitespaces (spaces, tabs or newlines)
+    for lonLatAlt in (text or '').split():
+        values = lonLatAlt.split(',')
+        # Altitude is optional in .kml
+        alt = float(values[2]) if len(values) > 2 and values[2] else 0.0
+        coordinates.append((float(values[0]), float(values[1]), alt))
+    return coordinates
+
+
+def placemarkReader(source, header=None):
+    """Yield every Placemark of a .kml file, one at a time.
+
+Read with an incremental parser & release each element once read,
+so memory stays constant whatever the size of the file.
+If a {dict} header is given, fill it with 'title' & 'description' of the Document.
+    """
+    # Open elements (from root to current) & their local tags
+    elements, tags = [], []
+    # Folder names of the current Placemark
+    folders = []
+    # Placemark being read
+    name, geometries, rings = '', [], []
+
+    for event, elem in iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            elements.append(elem)
+            tags.append(localTag(elem.tag))
+            if tags[-1] == 'Folder':
+                folders.append('')
+            elif tags[-1] == 'Placemark':
+                name, geometries = '', []
+            elif tags[-1] == 'Polygon':
+                rings = []
+            continue
+
+        tag = tags.pop()
+        elements.pop()
+        parent = tags[-1] if tags else None
+        inPlacemark = 'Placemark' in tags
+
+        if tag == 'name':
+            text = (elem.text or '').strip()
+            if parent == 'Placemark':
+                name = text
+            elif parent == 'Folder':
+                folders[-1] = text
+            elif parent == 'Document' and header is not None:
+                header.setdefault('title', text)
+
+        elif tag == 'description' and parent == 'Document' and header is not None:
+            header.setdefault('description', (elem.text or '').strip())
+
+        elif tag == 'coordinates' and inPlacemark:
+            coordinates = parseCoordinates(elem.text)
+            if parent == 'LinearRing':
+                rings.append(coordinates)
+            elif parent in ('Point', 'LineString'):
+                geometries.append(Geometry(parent, [coordinates]))
+
+        elif tag == 'Polygon' and inPlacemark:
+            geometries.append(Geometry('Polygon', rings))
+
+        elif tag == 'Placemark':
+            yield Placemark(name, '/'.join(folders), geometries)
+
+        elif tag == 'Folder':
+            folders.pop()
+
+        # Release what was read (MultiGeometry only groups geometries)
+        if parent in CONTAINERS:
+            elem.clear()
+            elements[-1].remove(elem)
+
+
+class KmlReader(VectorReader):
+    """Read googleEarth .kml files :
+
+0) __init__() : Initialise parent class VectorReader().
+1) __iter__() : Yield every Placemark using placemarkReader().
+
+Note : Handles Point/LineString/Polygon/MultiGeometry & nested Folders, whatever the indentation.
+nameField isn't used, a Placemark has its own <name>.
+    """
+
+    def __init__(self, source, header=None, nameField=''):
+        """Initialise parent class VectorReader()."""
+        VectorReader.__init__(self, source, header, nameField)
+
+    def __iter__(self):
+        """Yield every Placemark of the .kml file (path or file object)."""
+        return placemarkReader(self.source, self.header)
+
+
+if __name__ == '__main__':
+    print(KmlReader.__doc__)
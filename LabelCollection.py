@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:21:05 2026
+
+@author: yan-s
+"""
+
+import numpy as np
+from matplotlib import colors
+from matplotlib.text import Text
+from matplotlib.artist import Artist
+from matplotlib.transforms import Bbox, IdentityTransform
+from matplotlib.font_manager import FontProperties
+
+
+class LabelCollection(Artist):
+    """Draw many labels as one matplotlib artist :
+
+0) __init__() : Keep labels & their coordinates (data coordinates) as arrays.
+1) visible() : Return labels & display coordinates of anchors inside the axes.
+2) textArtist() : Return the Text of a label with mathtext ($...$) or several lines.
+3) draw() : Transform all coordinates at once & draw every label inside the axes.
+4) get_window_extent() : Bounding box of drawn labels (used by bbox_inches='tight').
+
+Note : Labels look exactly like ax.annotate(name, (lon, lat), color=color),
+but one artist replace thousands of Annotation. Plain names are drawn straight by -
+the renderer, names with '$' or '\\n' by a Text (as annotate does, mathtext & lines).
+    """
+
+    def __init__(self, texts, x, y, color='black', fontsize=None, outside=False):
+        """Set labels, coordinates & style (outside : also draw labels whose anchor is outside the axes)."""
+        super().__init__()
+        self.texts = np.asarray(texts, dtype=object)
+        self.offsets = np.column_stack([np.asarray(x, dtype=float),
+                                        np.asarray(y, dtype=float)])
+        self.color = colors.to_rgba(color)
+        self.prop = FontProperties(size=fontsize)
+        # Tiles draw the end of labels starting on the tile beside
+        self.outside = outside
+        # Same zorder as text
+        self.set_zorder(3)
+
+    def visible(self):
+        """Return labels & display coordinates of anchors inside the axes (as annotate does)."""
+        xy = self.axes.transData.transform(self.offsets)
+        if self.outside:
+            return self.texts, xy
+        x0, y0, x1, y1 = self.axes.bbox.extents
+        inside = ((xy[:, 0] >= x0) & (xy[:, 0] <= x1) &
+                  (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+        return self.texts[inside], xy[inside]
+
+    def textArtist(self, text, x, y):
+        """Return the Text of label text anchored at x, y (display coordinates)."""
+        artist = Text(x, y, text, color=self.color, fontproperties=self.prop, transform=IdentityTransform())
+        artist.set_figure(self.figure)
+        artist.set_alpha(self.get_alpha())
+        return artist
+
+    def draw(self, renderer):
+        """Draw every visible label with one graphic context."""
+        if not self.get_visible() or not len(self.texts):
+            return
+        renderer.open_group('labels', self.get_gid())
+        gc = renderer.new_gc()
+        gc.set_foreground(self.color, isRGBA=True)
+        gc.set_alpha(self.get_alpha())
+        canvasHeight = renderer.get_canvas_width_height()[1]
+        flip = renderer.flipy()
+
+        texts, xy = self.visible()
+        for text, (x, y) in zip(texts, xy):
+            if '$' in text or '\n' in text:
+                self.textArtist(text, x, y).draw(renderer)
+            else:
+                renderer.draw_text(gc, x, canvasHeight - y if flip else y, text, self.prop, 0)
+
+        gc.restore()
+        renderer.close_group('labels')
+        self.stale = False
+
+    def get_window_extent(self, renderer=None):
+        """Return the Bbox (display coordinates) around visible labels."""
+        if renderer is None:
+            renderer = self.figure._get_renderer()
+        texts, xy = self.visible()
+        special = np.fromiter(('$' in text or '\n' in text for text in texts), dtype=bool, count=len(texts))
+        boxes = [self.textArtist(text, x, y).get_window_extent(renderer)
+                 for text, (x, y) in zip(texts[special], xy[special])]
+        texts, xy = texts[~special], xy[~special]
+        if len(texts):
+            # Width, height & descent of each label
+            sizes = np.array([renderer.get_text_width_height_descent(text, self.prop, ismath=False)
+                              for text in texts])
+            boxes.append(Bbox.from_extents(xy[:, 0].min(), (xy[:, 1] - sizes[:, 2]).min(),
+                                           (xy[:, 0] + sizes[:, 0]).max(),
+                                           (xy[:, 1] + sizes[:, 1] - sizes[:, 2]).max()))
+        return Bbox.union(boxes) if boxes else Bbox.null()
+
+
+if __name__ == '__main__':
+    print(LabelCollection.__doc__)
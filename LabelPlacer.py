@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:34:48 2026
+
+@author: yan-s
+"""
+
+import logging
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.font_manager import FontProperties
+
+
+class LabelPlacer:
+    """Place labels without overlap, instead of listyUp/listyDown & fixed corrections :
+
+0) __init__() : Get size of the axes in pixels & of the font.
+1) boxes() : Estimate the box of each label, for each candidate position.
+2) place() : Greedily keep, by priority, the first candidate not colliding with what is already placed.
+
+Note : Boxes are stored in a grid (dict of cells), so each test only looks at labels nearby.
+Labels without free candidate (saturated area) are dropped.
+    """
+
+    # Candidate positions, in order of preference : 'upper right' is the ax.annotate look
+    candidates = ('upper right', 'above', 'below', 'right', 'left')
+
+    def __init__(self, ax, fontsize=None, gap=3.0, markerSize=6.0):
+        """Set size in pixels of axes, font, gap between point & label and markers."""
+        # Axes limits & size in pixels
+        self.xMin, self.xMax = ax.get_xlim()
+        self.yMin, self.yMax = ax.get_ylim()
+        self.width, self.height = ax.bbox.width, ax.bbox.height
+        # Font size in pixels
+        size = FontProperties(size=fontsize or rcParams['font.size']).get_size_in_points()
+        self.fontPx = size * ax.figure.dpi / 72
+        self.markerSize = markerSize
+        # A label never covers its own point
+        self.gap = max(gap, markerSize / 2 + 1)
+
+    def toPixels(self, lon, lat):
+        """Return x, y pixels (from bottom left of axes) of data coordinates."""
+        x = (np.asarray(lon, dtype=float) - self.xMin) * self.width / (self.xMax - self.xMin)
+        y = (np.asarray(lat, dtype=float) - self.yMin) * self.height / (self.yMax - self.yMin)
+        return x, y
+
+    def toData(self, x, y):
+        """Return lon, lat of x, y pixels (from bottom left of axes)."""
+        return (self.xMin + x * (self.xMax - self.xMin) / self.width,
+                self.yMin + y * (self.yMax - self.yMin) / self.height)
+
+    def boxes(self, texts, x, y):
+        """Return anchors (n, k, 2) & boxes (n, k, 4) of k candidates of n labels, in pixels.
+
+Width is estimated from the number of characters (0.6 font size each),
+ascent is 0.75 & descent 0.25 font size around the baseline anchor.
+        """
+        w = np.fromiter((len(text) for text in texts), dtype=float, count=len(texts))
+        w = w * 0.6 * self.fontPx
+        ascent, descent, gap = 0.75 * self.fontPx, 0.25 * self.fontPx, self.gap
+        middle = y - (ascent - descent) / 2
+        # Baseline left anchor of each candidate, same order as self.candidates
+        ax = np.stack([x, x - w / 2, x - w / 2, x + gap, x - gap - w], axis=1)
+        ay = np.stack([y + gap + descent, y + gap + descent, y - gap - ascent,
+                       middle, middle], axis=1)
+        boxes = np.stack([ax, ay - descent, ax + w[:, None], ay + ascent], axis=-1)
+        return np.stack([ax, ay], axis=-1), boxes
+
+    def place(self, texts, lon, lat, priority=None):
+        """Return lon, lat of label anchors (NaN if dropped) & a mask of placed labels.
+
+Labels with higher priority are placed first, others are dropped
+when every candidate collide with a placed label or a point.
+        """
+        count = len(texts)
+        x, y = self.toPixels(lon, lat)
+        anchors, boxes = self.boxes(texts, x, y)
+        if priority is None:
+            priority = np.zeros(count)
+        order = np.argsort(-np.asarray(priority), kind='stable')
+
+        # Grid of square cells about the size of a label : {(i, j): [boxes]}
+        cell = 2 * self.fontPx
+        if count:
+            cell = max(cell, float(np.median(boxes[:, 0, 2] - boxes[:, 0, 0])))
+        grid = {}
+
+        def collide(x0, y0, x1, y1):
+            for i in range(int(x0 // cell), int(x1 // cell) + 1):
+                for j in range(int(y0 // cell), int(y1 // cell) + 1):
+                    for a0, b0, a1, b1 in grid.get((i, j), ()):
+                        if a0 < x1 and x0 < a1 and b0 < y1 and y0 < b1:
+                            return True
+            return False
+
+        def insert(box):
+            x0, y0, x1, y1 = box
+            for i in range(int(x0 // cell), int(x1 // cell) + 1):
+                for j in range(int(y0 // cell), int(y1 // cell) + 1):
+                    grid.setdefault((i, j), []).append(box)
+
+        # Points are obstacles for every label
+        half = self.markerSize / 2
+        for px, py in zip(x.tolist(), y.tolist()):
+            insert([px - half, py - half, px + half, py + half])
+
+        chosen = np.full(count, -1)
+        boxList = boxes.tolist()
+        for label in order.tolist():
+            for k, box in enumerate(boxList[label]):
+                # Stay inside the axes
+                if box[0] < 0 or box[1] < 0 or box[2] > self.width or box[3] > self.height:
+                    continue
+                if not collide(*box):
+                    chosen[label] = k
+                    insert(box)
+                    break
+
+        keep = chosen >= 0
+        rows = np.flatnonzero(keep)
+        lonLabel, latLabel = np.full(count, np.nan), np.full(count, np.nan)
+        lonLabel[rows], latLabel[rows] = self.toData(anchors[rows, chosen[rows], 0],
+                                                     anchors[rows, chosen[rows], 1])
+        logging.info(f'{len(rows)} labels placed, {count - len(rows)} dropped.')
+        return lonLabel, latLabel, keep
+
+
+if __name__ == '__main__':
+    print(LabelPlacer.__doc__)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:40:53 2026
+
+@author: yan-s
+"""
+
+from PointTable import PointTable
+from ShapeTable import ShapeTable
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+
+class LayerCache:
+    """Binary cache of converted .kml (.shp, .geojson) layers, in a directory of SentinelDownload :
+
+0) __init__() : Set cache directory.
+1) fingerprint() : Return content hash of a source file (& companions), only re-hashed if its path, size or mtime changed.
+2) companions() : Return files read with a source file (.dbf of a .shp file).
+3) get() : Return (PointTable, header, ShapeTable) of a source file if already converted, else None.
+4) put() : Save a converted layer.
+5) clear() : Remove the whole cache.
+
+Note : A layer is a directory of .npy files (lines & polygons in 'shapes') named by the content hash of its source,
+loaded memory-mapped on a hit.
+    """
+
+    def __init__(self, directory):
+        """Set cache directory & index of known source files."""
+        self.directory = directory
+        self.indexPath = os.path.join(directory, 'index.json')
+
+    def readIndex(self):
+        """Return {abspath: {'size', 'mtime', 'hash'}} of known source files."""
+        try:
+            with open(self.indexPath, 'r', encoding=('utf8')) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def writeIndex(self, index):
+        """Write index atomically."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmpPath = self.indexPath + '.tmp'
+        with open(tmpPath, 'w', encoding=('utf8')) as file:
+            json.dump(index, file, indent=1)
+        os.replace(tmpPath, self.indexPath)
+
+    def fingerprint(self, path):
+        """Return sha256 of file content (& its companions), re-hash only if path, size or mtime changed."""
+        path = os.path.abspath(path)
+        files = [path] + self.companions(path)
+        stats = [[os.stat(file).st_size, os.stat(file).st_mtime_ns] for file in files]
+        index = self.readIndex()
+        known = index.get(path)
+        if (known and [known['size'], known['mtime']] == stats[0]
+                and known.get('companions', []) == stats[1:]):
+            return known['hash']
+
+        # Hash the content by block, the file may be huge
+        digest = hashlib.sha256()
+        for file in files:
+            with open(file, 'rb') as content:
+                for block in iter(lambda: content.read(1 << 20), b''):
+                    digest.update(block)
+        index[path] = {'size': stats[0][0], 'mtime': stats[0][1],
+                       'companions': stats[1:], 'hash': digest.hexdigest()}
+        self.writeIndex(index)
+        return index[path]['hash']
+
+    @staticmethod
+    def companions(path):
+        """Return existing files read with a source file (.dbf & .cpg of a .shp file)."""
+        base, extension = os.path.splitext(path)
+        if extension.lower() != '.shp':
+            return []
+        return [base + companion for companion in ('.dbf', '.cpg') if os.path.exists(base + companion)]
+
+    def layerPath(self, path):
+        """Return directory of the cached layer of a source file."""
+        return os.path.join(self.directory, self.fingerprint(path))
+
+    def get(self, path):
+        """Return (PointTable, header, ShapeTable) of source file if cached, else None."""
+        if not os.path.exists(path):
+            # Missing file (or glob matching nothing), reported by its reader
+            return None
+        layer = self.layerPath(path)
+        try:
+            with open(os.path.join(layer, 'header.json'), 'r', encoding=('utf8')) as file:
+                header = json.load(file)
+            points = PointTable.load(layer)
+            shapes = ShapeTable.load(os.path.join(layer, 'shapes'))
+        except (OSError, ValueError):
+            logging.info(f'Cache miss for "{path}".')
+            return None
+        logging.info(f'Cache hit for "{path}" ({len(points)} points, {len(shapes)} lines & polygons).')
+        return points, header, shapes
+
+    def put(self, path, points, header, shapes):
+        """Save PointTable, header & ShapeTable of source file."""
+        layer = self.layerPath(path)
+        points.save(layer)
+        shapes.save(os.path.join(layer, 'shapes'))
+        # header.json is written last, so an interrupted save is a miss
+        with open(os.path.join(layer, 'header.json'), 'w', encoding=('utf8')) as file:
+            json.dump(header, file)
+        logging.debug(f'Layer cached in "{layer}".')
+
+    def clear(self):
+        """Remove every cached layer."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        logging.info(f'Cache "{self.directory}" cleared.')
+
+
+if __name__ == '__main__':
+    print(LayerCache.__doc__)
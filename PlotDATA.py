@@ -1,325 +1,634 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Aug  5 09:58:36 2022
-
-@author: yan-s
-"""
-
-from KmlCSV import KmlCSV
-from main import VariableGlobal
-
-import os
-import logging
-import pandas as pd
-import matplotlib.pyplot as plt
-from cv2 import imread, imwrite, IMWRITE_PNG_COMPRESSION
-from matplotlib.ticker import MultipleLocator, AutoMinorLocator
-
-
-class PlotDATA(KmlCSV):
-    """Plots DATA on map using Name, Latitude & Longitude (wgs84) of a DataFrame :
-    
-0) __init__() : If not .csv file provide, will create one using .kml file from GoogleEarth.
-1) tiffPNG() : Convert .tiff file from sentinelHubDownload to .png file for using it as a basemap.
-2) load() : Load map & .csv file.
-3) axes() : Create axes & subplot with BBox, locator & nomenclature.
-4) listy() : Create a 2nd DataFrame and move some rows from the 1st in it.
-5) plot() : Plot little arrow with coordinates & annotate 'Name' beside.
-6) show() : Plot newly created map in the console.
-7) save() : Save newly created map locally.
-8) exeSeq() : Act as an execution thread.
-    
-Note : Most of this methods are just containers.
-    """
-
-    def __init__(self):
-        """Initialise parents class."""
-        # Initialise the 'parent class'
-        VariableGlobal.__init__(self)
-        # Check if a .csv file is provide in __main__
-        if not self.csvSrc:
-            # Initialise the 'parent class' and so create -
-            # a .csv file from a googleEarth .kml file
-            KmlCSV.__init__(self)
-        else:
-            # Use the .csv file provided in __main__
-            self.csvPath = self.csvSrc
-        # Well,
-        logging.warning('Start of DATA plotting !')
-
-    def tiffPNG(self):
-        """Convert .tiff file to .png file using cv2."""
-        # Get the latest directory and therefore, the latest .tiff file
-        latest = sorted([d for d in os.listdir('.') if os.path.isdir(d)],
-                        key=lambda x: os.path.getctime(x), reverse=True)[:1]
-
-        # Set path as latest downloaded sentinelHub directory
-        filePath = (f'{self.workingDirectory}/{latest[0]}/')
-
-        # Search for .tiff file in latest directory downloaded
-        for infile in os.listdir(filePath):
-            # Be sure that this is a .tiff file
-            if infile.endswith('.tiff'):
-                # Print name of .tiff file
-                logging.info(f'File found : "{infile}"')
-                #
-                outfile = infile.split('.')[0] + '.png'
-                #
-                self.outfilePath = (filePath+outfile)
-                # Could check this at the beginning, but just to -
-                # be sure to have the right .png file
-                # Check if .png file already exist
-                if not os.path.exists(self.outfilePath):
-                    # Read .tiff file
-                    read = imread(filePath + infile)
-                    # Write .png file
-                    imwrite(self.outfilePath, read, [
-                                int(IMWRITE_PNG_COMPRESSION), 0])
-                    # Print path of newly created .png file
-                    logging.debug(f'Converted succesfully in {outfile} !')
-                else:
-                    logging.debug(f'But.. File "{outfile}" already exist !')
-
-    def load(self):
-        """Load Data."""
-        # Load csv
-        try:
-            dataSrc = self.csvPath
-            self.df = pd.read_csv(dataSrc)
-            #
-            logging.info(f'Load data from "{dataSrc}".')
-        except Exception as e:
-            print(e)
-            quit()
-
-        # Load Map
-        try:
-            mapSrc = self.outfilePath
-            self.loadMap = plt.imread(mapSrc)
-            logging.info(f'Load map from "{mapSrc}".')
-        except Exception as e:
-            print(e)
-            exit()
-
-    def axes(self):
-        """Create and set parameters of axes.
-Parameters :
-    
-    figSize -> Tuple ; default = (32.0, 24.0)
-    # The figsize parameter takes a tuple of -
-    # the height and width of the plot layout
-    # Edit it, change the size of the annotations
-    
-    dpi -> float ; default = 100.0
-    # Increase DotPerInch for higher resolutions (& more processing time)# Increase DotPerInch for higher resolutions (& more processing time)# Increase DotPerInch for higher resolutions (& more processing time)
-    
-    figTitle -> str ; default = 'Figure Title'
-    # Create figures Title (at the top)
-    
-    xLabel -> float ; default = 'Label at the Bottom'
-    # Create figures Label (at the bottom)
-    
-    grid -> Bool ; default = True
-    # If True, create a grid on the figure
-    
-    locator -> Bool ; default = True
-    # If true, plot major & minor locator
-        
-        xMajor -> float ; default = 0.05
-        # Set x major locator ex: every 0.05°
-        yMajor -> float ; default = 0.05
-        # Set y major locator ex: every 0.05°
-        
-        xMinor -> int ; default = 4
-        # Set x minor ex: 4 between every 2 major
-        yMinor -> int ; default = 4
-        # Set y minor ex: 4 between every 2 major
-        
-    scale -> Bool ; default = True
-    # If True, will create a (dirty) scale on the map
-    
-        xy -> Tuple ; default = (-16.40, 13.6625)
-        # Set one coordinates of the first tips of the double arrow
-        xyText -> Tuple ; default = (-16.3495, 13.6625)
-        # Set the others coordinates of the second tips of the double arrow
-        
-        arrowStyle -> Str ; default = '<|-|>'
-        # Learn more at : https://matplotlib.org/stable/api/_as_gen/matplotlib.patches.ArrowStyle.html
-        
-        nomenclature -> Str ; default = '5 500m'
-        # Set the nomenclature text
-        xyNomenclature -> Tuple ; default = (-16.3835, 13.664)
-        # Set the nomenclature text coordinates
-        """
-        # Create subplots with figSize & DPI
-        fig, self.ax = plt.subplots(figsize=(self.figSize), dpi=self.dpi)
-
-        # Define the Bounding Box
-        self.BBox = [self.BBox[0], self.BBox[2], self.BBox[1], self.BBox[3]]
-        # Print BBox
-        logging.info(f'Bounding Box is : {self.BBox}.')
-
-        # Set limit with BBox
-        self.ax.set_xlim(self.BBox[0], self.BBox[1])
-        self.ax.set_ylim(self.BBox[2], self.BBox[3])
-        
-        # Set Title & Bottom Label
-        self.ax.set_title(self.figTitle)
-        self.ax.set_xlabel(self.xLabel)
-
-        # Plot Grid
-        if self.grid:
-            self.ax.grid()
-
-        # Add Locator
-        if self.locator:
-            # Set major locator
-            self.ax.xaxis.set_major_locator(MultipleLocator(self.xMajor))
-            self.ax.yaxis.set_major_locator(MultipleLocator(self.yMajor))
-            # Set minor locator
-            self.ax.xaxis.set_minor_locator(AutoMinorLocator(self.xMinor))
-            self.ax.yaxis.set_minor_locator(AutoMinorLocator(self.yMinor))
-
-        #Add dirty Scale
-        if self.scale:
-            # Create the arrow
-            plt.annotate(text='', xy=(self.xy), xytext=(self.xyText),
-                         arrowprops=dict(arrowstyle=self.arrowStyle, shrinkA=0, shrinkB=0))
-            # Create the nomenclature
-            self.ax.annotate(self.nomenclature, self.xyNomenclature)
-
-        # Print Title of Fig
-        logging.info(f'Title is "{self.figTitle}".')
-
-    def listy(self):
-        """Move to a 2nd DataFrame value of listyDown.
-        
-Parameters :
-    
-    listyDown -> List ; default = ['Name']
-    # Name of city name whos will be moved a litlle downward -
-    # from their real coordinates point + have a little downward arrow
-    # Value of list MUST be in 'Name' column of the .csv file
-        """
-        # Create a 2nd DataFrame for listyDown
-        self.df2 = pd.DataFrame({'Name': [], 'Longitude': [],
-                                 'Latitude': [], 'Altitude': []})
-
-        # Move 'Downward Name' from df to df2
-        for i in self.listyDown:
-            #Find index of Name in listyDown
-            x = self.df[self.df['Name'] == i].index.values.astype(int)[0]
-            #Add row to df2
-            self.df2 = pd.concat(
-                [self.df.loc[[x]], self.df2], ignore_index=True)
-            #And remove row from df
-            self.df.drop(index=x, inplace=True)
-        #Reset all Index of df
-        self.df.reset_index(inplace=True)
-
-    def plot(self):
-        """Plot coordinates and place names.
-
-Parameters :
-    
-    listyUp -> List ; default = ['Name']
-    # Name of city name whos will be moved a litlle downward -
-    # from their real coordinates point
-    # Value of list MUST be in 'Name' column of the .csv file    
-    
-    # UPPER names (=Specials Ones) :
-    
-        upperLonCorrection -> float ; default = -0.0005
-        # Set longitude correction
-        upperLatCorrection -> float ; default = 0.001
-        # Set latitude correction
-        upperColor -> str ; default = 'red'
-        # Set text color
-    
-    # Upward names (=Will be move a little upward) :
-    
-        upwardLonCorrection -> float ; default = -0.01
-        # Set longitude correction
-        upwardLatCorrection -> float ; default = 0.001
-        # Set latitude correction
-        upwardColor -> str ; default = 'black'
-        # Set text color
-    
-    # Downward names (=Will be move a little downward) :
-    
-        downwardLonCorrection -> float ; default = -0.013
-        # Set longitude correction
-        downwardLatCorrection -> float ; default = -0.004
-        # Set latitude correction
-        downwardColor -> str ; default = 'black'
-        # Set text color
-    
-    # Normals ones :
-    
-        normalLonCorrection -> float ; default = 0
-        # Set longitude correction
-        normalLatCorrection -> float ; default = 0.001
-        # Set latitude correction
-        normalColor -> str ; default = 'black'
-        # Set text color
-    
-    arrowColor -> str ; default = 'blue'
-    # Set color of all arrows
-        """
-        # Annotate city name with arrow p
-        # Annotate city name with arrow pointing up (listyUp & 'Normals')
-        for idx, dat in self.df.iterrows():
-            # If name UPPER = river or island
-            if dat.Name.isupper():
-                # Annotate in red
-                self.ax.annotate(dat.Name, ((dat.Longitude + self.upperLonCorrection),
-                                (dat.Latitude + self.upperLatCorrection)), color=self.upperColor)
-            else:
-                if dat.Name in self.listyUp:
-                    # Annotate the city name a little upward
-                    self.ax.annotate(dat.Name, ((dat.Longitude + self.upwardLonCorrection),
-                                (dat.Latitude + self.upwardLatCorrection)), color=self.upwardColor)
-                else:
-                    # Annotate the 'Normals Ones'
-                    self.ax.annotate(dat.Name, ((dat.Longitude + self.normalLonCorrection),
-                                (dat.Latitude + self.normalLatCorrection)), color=self.normalColor)
-                    
-            # Create the upward arrow
-            self.ax.scatter(dat.Longitude, dat.Latitude, zorder=1,
-                            alpha=0.8, color=self.arrowColor, s=10, marker='^')
-
-        # Annotate city name with arrow pointing down (listyDown)
-        for idx, dat in self.df2.iterrows():
-            # Annotate the city name a little downward
-            self.ax.annotate(dat.Name, ((dat.Longitude + self.downwardLonCorrection),
-                        (dat.Latitude + self.downwardLatCorrection)), color=self.downwardColor)
-            
-            # Create the downward arrow
-            self.ax.scatter(dat.Longitude, dat.Latitude, zorder=1,
-                            alpha=0.8, color=self.arrowColor, s=10, marker='v')
-
-    def show(self):
-        """Plot map in console."""
-        self.ax.imshow(self.loadMap, zorder=0,
-                       extent=self.BBox, aspect='equal')
-
-    def save(self):
-        """Save file."""
-        plt.savefig(f'{self.figTitle}.png', bbox_inches='tight')
-        # Print location of the new map
-        logging.info(f'Name of file : "{self.workingDirectory}/{self.figTitle}.png"')
-
-    def exeSeq(self):
-        """Trigger the execution sequence."""
-        self.tiffPNG()
-        self.load()
-        self.axes()
-        self.listy()
-        self.plot()
-        self.show()
-        self.save()
-        logging.warning('End of DATA plotting !')
-
-
-if __name__ == '__main__':
-    print(PlotDATA.__doc__)
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Aug  5 09:58:36 2022
+
+@author: yan-s
+"""
+
+from KmlCSV import KmlCSV
+from PointTable import PointTable
+from ShapeTable import ShapeTable, LINE, POLYGON
+from main import VariableGlobal
+from RasterCache import RasterCache
+from BlockRaster import BlockRaster
+from RenderCache import RenderCache
+from ImageEncoder import ImageEncoder, EXTENSIONS
+from BasemapPyramid import BasemapPyramid
+from LabelPlacer import LabelPlacer
+from LabelCollection import LabelCollection
+from Profiler import Profiler
+
+import os
+import hashlib
+import logging
+import numpy as np
+import matplotlib
+from itertools import groupby
+from operator import itemgetter
+import pandas as pd
+from matplotlib.path import Path
+from matplotlib import rcParams
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import MultipleLocator, AutoMinorLocator
+
+
+class PlotDATA(KmlCSV):
+    """Plots DATA on map using Name, Latitude & Longitude (wgs84) of a DataFrame :
+    
+0) __init__() : If not .csv file provide, will create one using .kml file from GoogleEarth.
+1) basemap() : Load .tiff file of the same parameters from sentinelHubDownload as the basemap (RGB, memory-mapped).
+2) load() : Load .csv file or points, lines & polygons of the .kml file.
+3) axes() : Create axes & subplot with BBox, locator & nomenclature.
+4) cull() : Keep only points inside the area shown (spatial index), before any artist is created.
+5) plotShapes() : Plot lines & polygons inside the area shown, simplified to the pixel size, one artist per kind.
+6) shapeCollections() : Return the LineCollection & PathCollection of simplified lines & polygons.
+7) listy() : Sort rows in categories (upper, upward, downward, normal) in one pass.
+8) plot() : Plot little arrow with coordinates & annotate 'Name' beside, one artist per category.
+9) show() : Plot the basemap overview matching the figure size, cropped to the area shown.
+10) fingerprint() : Compute keys of the basemap layer & of the map from everything they show.
+11) staleStages() : Return drawing stages whose inputs changed (none if the map is up to date).
+12) composite() : Draw the figure once (points & labels on the cached basemap layer) & return its pixels.
+13) crop() : Return the area saved (as bbox_inches='tight', the axes for a GeoTIFF) & its georeferencing.
+14) save() : Encode newly created map locally in imageFormat (png, webp, jpeg or geotiff).
+15) mapPath() : Return the name of the map file.
+16) exeSeq() : Act as an execution thread.
+17) renderMap() : Render one more map, reusing the figure (axes, grid, locators, scale) of the last one.
+18) close() : Free the figure.
+    
+Note : Most of this methods are just containers.
+Figures are drawn by Agg without pyplot, so many maps can be rendered in one process.
+With renderCache, the basemap layer is kept in renderDirectory (RenderCache), editing -
+points or label settings only draws points & labels again.
+    """
+
+    # Settings drawn in the basemap layer (with layout(), raster & lines & polygons)
+    baseSettings = ('figTitle', 'xLabel', 'lineColor', 'lineWidth', 'polygonEdgeColor',
+                    'polygonFaceColor', 'polygonLineWidth', 'shapeTolerance')
+    # Settings of points & labels (with the points shown)
+    overlaySettings = ('listyUp', 'listyDown', 'autoLabels',
+                       'upperLonCorrection', 'upperLatCorrection', 'upperColor',
+                       'upwardLonCorrection', 'upwardLatCorrection', 'upwardColor',
+                       'downwardLonCorrection', 'downwardLatCorrection', 'downwardColor',
+                       'normalLonCorrection', 'normalLatCorrection', 'normalColor', 'arrowColor')
+    # Settings of the file written
+    imageSettings = ('imageFormat', 'pngLevel', 'imageQuality')
+
+    def __init__(self):
+        """Initialise parents class."""
+        # Initialise the 'parent class'
+        VariableGlobal.__init__(self)
+        # Check if a .csv file is provide in __main__
+        if not self.csvSrc:
+            # Initialise the 'parent class' and so create -
+            # a .csv file from a googleEarth .kml file
+            KmlCSV.__init__(self)
+        else:
+            # Use the .csv file provided in __main__
+            self.csvPath = self.csvSrc
+        # Well,
+        logging.warning('Start of DATA plotting !')
+
+    def basemap(self):
+        """Load the .tiff file of the same parameters from sentinelHubDownload as the basemap.
+
+The RGB array is memory-mapped (BlockRaster), so pixels are only read when drawn, -
+whatever the size of the raster. No more .png round trip.
+        """
+        # Get the .tiff file downloaded with exactly these parameters
+        infile = RasterCache(f'{self.workingDirectory}/{self.rasterDirectory}').get(self)
+        if not infile:
+            logging.error('No raster downloaded for this BBox & time interval, '
+                          'run SentinelHubDownload first (python main.py download) !')
+            quit()
+        # Print name of .tiff file
+        logging.info(f'File found : "{infile}"')
+        self.rasterPath = infile
+        # 8 bits RGB raster, memory-mapped (16 bits, floats & grayscale converted once, by blocks)
+        self.raster = BlockRaster.open(infile).display()
+        self.loadMap = self.raster.image
+        logging.info(f'Load map from "{infile}" ({self.loadMap.shape[1]} x {self.loadMap.shape[0]} pixels).')
+
+        # Optional .png copy of the basemap
+        self.outfilePath = infile[:-len('.tiff')] + '.png'
+        if self.basemapPNG and not os.path.exists(self.outfilePath):
+            # Encoded by strips, in another file first (maps of a batch may share it)
+            self.raster.export(self.outfilePath, self.pngLevel)
+            logging.debug(f'Converted succesfully in {self.outfilePath} !')
+
+    def load(self):
+        """Load Data."""
+        # Load csv
+        try:
+            dataSrc = self.csvPath
+            if self.csvSrc:
+                self.df = pd.read_csv(dataSrc)
+                # Same table as a .kml file, for the spatial index
+                self.points = PointTable(self.df['Name'], self.df['Longitude'],
+                                         self.df['Latitude'], np.zeros(len(self.df)))
+                # No lines nor polygons in a .csv file
+                self.shapes = ShapeTable()
+            else:
+                # Points already in memory from KmlCSV(), no .csv round trip
+                self.df = self.points.toDataFrame()
+                dataSrc = self.kmlSrc
+            #
+            logging.info(f'Load data from "{dataSrc}".')
+            Profiler.of(self).count(points=len(self.df))
+        except Exception as e:
+            print(e)
+            quit()
+
+    def axes(self):
+        """Create and set parameters of axes.
+Parameters :
+    
+    figSize -> Tuple ; default = (32.0, 24.0)
+    # The figsize parameter takes a tuple of -
+    # the height and width of the plot layout
+    # Edit it, change the size of the annotations
+    
+    dpi -> float ; default = 100.0
+    # Increase DotPerInch for higher resolutions (& more processing time)# Increase DotPerInch for higher resolutions (& more processing time)# Increase DotPerInch for higher resolutions (& more processing time)
+    
+    figTitle -> str ; default = 'Figure Title'
+    # Create figures Title (at the top)
+    
+    xLabel -> float ; default = 'Label at the Bottom'
+    # Create figures Label (at the bottom)
+    
+    grid -> Bool ; default = True
+    # If True, create a grid on the figure
+    
+    locator -> Bool ; default = True
+    # If true, plot major & minor locator
+        
+        xMajor -> float ; default = 0.05
+        # Set x major locator ex: every 0.05°
+        yMajor -> float ; default = 0.05
+        # Set y major locator ex: every 0.05°
+        
+        xMinor -> int ; default = 4
+        # Set x minor ex: 4 between every 2 major
+        yMinor -> int ; default = 4
+        # Set y minor ex: 4 between every 2 major
+        
+    scale -> Bool ; default = True
+    # If True, will create a (dirty) scale on the map
+    
+        xy -> Tuple ; default = (-16.40, 13.6625)
+        # Set one coordinates of the first tips of the double arrow
+        xyText -> Tuple ; default = (-16.3495, 13.6625)
+        # Set the others coordinates of the second tips of the double arrow
+        
+        arrowStyle -> Str ; default = '<|-|>'
+        # Learn more at : https://matplotlib.org/stable/api/_as_gen/matplotlib.patches.ArrowStyle.html
+        
+        nomenclature -> Str ; default = '5 500m'
+        # Set the nomenclature text
+        xyNomenclature -> Tuple ; default = (-16.3835, 13.664)
+        # Set the nomenclature text coordinates
+        """
+        # Create figure with figSize & DPI, drawn by Agg (no pyplot, no window)
+        self.fig = Figure(figsize=(self.figSize), dpi=self.dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        # Raster & points drawn on this figure, removed by clearLayers(), -
+        # points & labels only (drawn on the basemap layer by save())
+        self.layers, self.overlay = [], []
+        self.figureLayout = self.layout()
+
+        # Define the Bounding Box (of the raster)
+        self.extent = [self.BBox[0], self.BBox[2], self.BBox[1], self.BBox[3]]
+        # Print BBox
+        logging.info(f'Bounding Box is : {self.extent}.')
+
+        # Area shown, the whole BBox or viewBBox (same order)
+        view = self.viewBBox or self.BBox
+        self.view = [view[0], view[2], view[1], view[3]]
+
+        # Set limit with BBox
+        self.ax.set_xlim(self.view[0], self.view[1])
+        self.ax.set_ylim(self.view[2], self.view[3])
+        
+        # Set Title & Bottom Label
+        self.ax.set_title(self.figTitle)
+        self.ax.set_xlabel(self.xLabel)
+
+        # Plot Grid
+        if self.grid:
+            self.ax.grid()
+
+        # Add Locator
+        if self.locator:
+            # Set major locator
+            self.ax.xaxis.set_major_locator(MultipleLocator(self.xMajor))
+            self.ax.yaxis.set_major_locator(MultipleLocator(self.yMajor))
+            # Set minor locator
+            self.ax.xaxis.set_minor_locator(AutoMinorLocator(self.xMinor))
+            self.ax.yaxis.set_minor_locator(AutoMinorLocator(self.yMinor))
+
+        #Add dirty Scale
+        if self.scale:
+            # Create the arrow
+            self.ax.annotate(text='', xy=(self.xy), xytext=(self.xyText),
+                         arrowprops=dict(arrowstyle=self.arrowStyle, shrinkA=0, shrinkB=0))
+            # Create the nomenclature
+            self.ax.annotate(self.nomenclature, self.xyNomenclature)
+
+        # Print Title of Fig
+        logging.info(f'Title is "{self.figTitle}".')
+
+    def layout(self):
+        """Return every setting used by axes(), maps with the same layout share the figure."""
+        return (tuple(self.figSize), self.dpi, tuple(self.BBox), tuple(self.viewBBox),
+                self.grid, self.locator, self.xMajor, self.yMajor, self.xMinor, self.yMinor,
+                self.scale, tuple(self.xy), tuple(self.xyText), self.arrowStyle,
+                self.nomenclature, tuple(self.xyNomenclature))
+
+    def clearLayers(self):
+        """Remove raster & points of the previous map, keep axes, grid, locators & scale."""
+        for layer in self.layers:
+            layer.remove()
+        self.layers, self.overlay = [], []
+        # Title & Bottom Label of this map
+        self.ax.set_title(self.figTitle)
+        self.ax.set_xlabel(self.xLabel)
+
+    def cull(self):
+        """Keep only rows of df inside the area shown, found with the spatial index of points."""
+        rows = self.points.spatialIndex().bbox(self.view[0], self.view[2], self.view[1], self.view[3])
+        if len(rows) < len(self.df):
+            self.df = self.df.iloc[rows].reset_index(drop=True)
+        logging.info(f'{len(rows)} points shown, {len(self.points) - len(rows)} outside the map.')
+        Profiler.of(self).count(shown=len(rows), outside=len(self.points) - len(rows))
+
+    def plotShapes(self):
+        """Plot lines & polygons crossing the area shown, one LineCollection & one PathCollection.
+
+Parameters :
+
+    lineColor -> str ; default = 'blue'
+    lineWidth -> float ; default = 1.0
+    # Color & width of lines
+
+    polygonEdgeColor -> str ; default = 'black'
+    polygonFaceColor -> str or tuple ; default = (1.0, 1.0, 0.0, 0.2)
+    polygonLineWidth -> float ; default = 0.8
+    # Colors & width of the outline of polygons ('none' for empty polygons)
+
+    shapeTolerance -> float ; default = 0.5
+    # Details smaller than shapeTolerance pixels are simplified (Douglas-Peucker)
+        """
+        if not len(self.shapes):
+            return
+        # Size of a pixel of the figure, in degrees
+        pixel = max((self.view[1] - self.view[0]) / self.ax.bbox.width,
+                    (self.view[3] - self.view[2]) / self.ax.bbox.height)
+        parts, geometries = self.shapes.simplify(self.view, self.shapeTolerance * pixel)
+        for collection in self.shapeCollections(parts, geometries):
+            self.layers.append(self.ax.add_collection(collection, autolim=False))
+        vertices = sum(map(len, parts[LINE] + parts[POLYGON]))
+        logging.info(f'{len(parts[LINE])} lines & {len(parts[POLYGON])} polygon rings shown, {vertices} vertices.')
+        Profiler.of(self).count(lines=len(parts[LINE]), rings=len(parts[POLYGON]), vertices=vertices)
+
+    def shapeCollections(self, parts, geometries):
+        """Return [LineCollection, PathCollection] of parts & geometries of ShapeTable.simplify(), -
+in the coordinates of parts (also used by TileRenderer, in pixels of a tile).
+        """
+        collections = []
+        if parts[LINE]:
+            collections.append(LineCollection(parts[LINE], colors=self.lineColor,
+                                              linewidths=self.lineWidth, zorder=0.5))
+        if parts[POLYGON]:
+            # One path per polygon (rings of the same geometry follow each other), -
+            # holes are rings in the other direction
+            paths = []
+            for _, group in groupby(zip(geometries[POLYGON], parts[POLYGON]), key=itemgetter(0)):
+                rings = [ring for _, ring in group]
+                codes = [[Path.MOVETO] + [Path.LINETO] * (len(ring) - 1) + [Path.CLOSEPOLY] for ring in rings]
+                paths.append(Path(np.concatenate([np.vstack([ring, ring[:1]]) for ring in rings]),
+                                  np.concatenate(codes)))
+            collections.append(PathCollection(
+                paths, facecolors=self.polygonFaceColor, edgecolors=self.polygonEdgeColor,
+                linewidths=self.polygonLineWidth, zorder=0.4))
+        return collections
+
+    def listy(self):
+        """Sort every row of df in a category : 'upper', 'upward', 'downward' or 'normal'.
+        
+Parameters :
+    
+    listyDown -> List ; default = ['Name']
+    # Name of city name whos will be moved a litlle downward -
+    # from their real coordinates point + have a little downward arrow
+    # Value of list SHOULD be in 'Name' column of the .csv file (else reported)
+    
+    listyUp -> List ; default = ['Name']
+    # Name of city name whos will be moved a litlle upward
+        """
+        names = self.df['Name']
+        # One pass on df for each test, listy are hashed once
+        downward = names.isin(set(self.listyDown)).to_numpy()
+        upper = ~downward & names.str.isupper().to_numpy(dtype=bool)
+        upward = ~downward & ~upper & names.isin(set(self.listyUp)).to_numpy()
+        normal = ~downward & ~upper & ~upward
+
+        # Index of rows of each category, used by plot()
+        self.categories = {'upper': np.flatnonzero(upper),
+                           'upward': np.flatnonzero(upward),
+                           'downward': np.flatnonzero(downward),
+                           'normal': np.flatnonzero(normal)}
+
+        # Report names of listy not found in df (points outside the map are not searched)
+        missing = (set(self.listyDown) | set(self.listyUp)).difference(names)
+        if missing:
+            logging.warning(f'{len(missing)} names of listyUp/listyDown not on the map : {sorted(missing)[:20]}')
+
+    def plot(self):
+        """Plot coordinates and place names.
+
+Parameters :
+    
+    listyUp -> List ; default = ['Name']
+    # Name of city name whos will be moved a litlle downward -
+    # from their real coordinates point
+    # Value of list MUST be in 'Name' column of the .csv file    
+    
+    # UPPER names (=Specials Ones) :
+    
+        upperLonCorrection -> float ; default = -0.0005
+        # Set longitude correction
+        upperLatCorrection -> float ; default = 0.001
+        # Set latitude correction
+        upperColor -> str ; default = 'red'
+        # Set text color
+    
+    # Upward names (=Will be move a little upward) :
+    
+        upwardLonCorrection -> float ; default = -0.01
+        # Set longitude correction
+        upwardLatCorrection -> float ; default = 0.001
+        # Set latitude correction
+        upwardColor -> str ; default = 'black'
+        # Set text color
+    
+    # Downward names (=Will be move a little downward) :
+    
+        downwardLonCorrection -> float ; default = -0.013
+        # Set longitude correction
+        downwardLatCorrection -> float ; default = -0.004
+        # Set latitude correction
+        downwardColor -> str ; default = 'black'
+        # Set text color
+    
+    # Normals ones :
+    
+        normalLonCorrection -> float ; default = 0
+        # Set longitude correction
+        normalLatCorrection -> float ; default = 0.001
+        # Set latitude correction
+        normalColor -> str ; default = 'black'
+        # Set text color
+    
+    arrowColor -> str ; default = 'blue'
+    # Set color of all arrows
+        """
+        # One LabelCollection & one scatter per category of listy(), -
+        # instead of one annotate & one scatter per row
+        rows = self.categories
+        # Artists of points & labels start here, drawn on the basemap layer by save()
+        start = len(self.layers)
+
+        # Let LabelPlacer find free positions, corrections below are then ignored
+        self.labelLon = self.labelLat = None
+        if self.autoLabels:
+            self.placeLabels()
+
+        # If name UPPER = river or island, annotate in red
+        self.plotCategory(rows['upper'], self.upperLonCorrection,
+                          self.upperLatCorrection, self.upperColor, '^')
+        # Annotate the city name a little upward
+        self.plotCategory(rows['upward'], self.upwardLonCorrection,
+                          self.upwardLatCorrection, self.upwardColor, '^')
+        # Annotate the 'Normals Ones'
+        self.plotCategory(rows['normal'], self.normalLonCorrection,
+                          self.normalLatCorrection, self.normalColor, '^')
+        # Annotate the city name a little downward (listyDown)
+        self.plotCategory(rows['downward'], self.downwardLonCorrection,
+                          self.downwardLatCorrection, self.downwardColor, 'v')
+        self.overlay = self.layers[start:]
+
+    def placeLabels(self):
+        """Set self.labelLon & self.labelLat, positions of labels without overlap (NaN if dropped).
+
+Parameters :
+
+    autoLabels -> Bool ; default = False
+    # If True, labels are placed by LabelPlacer, UPPER names first, -
+    # then names of listyUp/listyDown, then the others
+        """
+        rows = self.categories
+        priority = np.zeros(len(self.df))
+        priority[rows['upward']] = 1
+        priority[rows['downward']] = 1
+        priority[rows['upper']] = 2
+        # Pixels of axes as show() draws them (imshow, aspect 'equal'), not before
+        self.ax.set_aspect('equal')
+        self.ax.apply_aspect()
+        self.labelLon, self.labelLat, _ = LabelPlacer(self.ax).place(
+            self.df['Name'].to_numpy(), self.df['Longitude'].to_numpy(dtype=float),
+            self.df['Latitude'].to_numpy(dtype=float), priority)
+
+    def plotCategory(self, rows, lonCorrection, latCorrection, color, marker):
+        """Annotate every 'Name' of rows with the same correction & color, and draw its arrows."""
+        if not len(rows):
+            return
+        df = self.df.iloc[rows]
+        lon = df['Longitude'].to_numpy(dtype=float)
+        lat = df['Latitude'].to_numpy(dtype=float)
+        names = df['Name'].to_numpy()
+        if self.labelLon is None:
+            # Names with coordinates correction
+            labels = LabelCollection(names, lon + lonCorrection,
+                                     lat + latCorrection, color=color)
+        else:
+            # Names placed by LabelPlacer, dropped ones are not annotated
+            kept = ~np.isnan(self.labelLon[rows])
+            labels = LabelCollection(names[kept], self.labelLon[rows][kept],
+                                     self.labelLat[rows][kept], color=color)
+        self.layers.append(self.ax.add_artist(labels))
+        # Create the arrows
+        self.layers.append(self.ax.scatter(lon, lat, zorder=1, alpha=0.8,
+                                           color=self.arrowColor, s=10, marker=marker))
+
+    def show(self):
+        """Plot map in console."""
+        # Overview of the raster with about as many pixels as the axes, -
+        # cropped to the area shown (computed once, beside the .tiff file)
+        pyramid = BasemapPyramid(self.rasterPath, self.loadMap)
+        image, extent = pyramid.window(self.extent, self.view, self.ax.bbox.width, self.ax.bbox.height)
+        self.layers.append(self.ax.imshow(image, zorder=0, extent=extent, aspect='equal'))
+        Profiler.of(self).count(pixels=image.shape[0] * image.shape[1])
+
+    def fingerprint(self):
+        """Set self.baseKey & self.mapKey, keys of the basemap layer & of the whole map (RenderCache).
+
+Parameters :
+
+    renderCache -> Bool ; default = True
+    # Keep the basemap layer (raster, axes, title, lines & polygons) of maps & keys -
+    # of maps written in renderDirectory, only draw what changed (see staleStages())
+        """
+        if not self.renderCache:
+            return
+        self.cache = RenderCache(f'{self.workingDirectory}/{self.renderDirectory}')
+        # Everything drawn by axes(), plotShapes() & show()
+        self.baseKey = RenderCache.key(
+            [matplotlib.__version__, RasterCache(f'{self.workingDirectory}/{self.rasterDirectory}').key(self),
+             self.layout(), self.view, self.shapes.digest()] +
+            [getattr(self, name) for name in self.baseSettings])
+        # Points shown & everything drawn by plot()
+        points = hashlib.sha256('\x00'.join(map(str, self.df['Name'])).encode('utf8'))
+        points.update(self.df['Longitude'].to_numpy(dtype=float).tobytes())
+        points.update(self.df['Latitude'].to_numpy(dtype=float).tobytes())
+        self.mapKey = RenderCache.key([self.baseKey, points.hexdigest()] +
+                                      [getattr(self, name) for name in self.overlaySettings + self.imageSettings])
+
+    def staleStages(self):
+        """Return stages drawing the map, without those whose inputs didn't change.
+
+None if the map was already written from the same inputs, no plotShapes() if the -
+basemap layer is in the render cache (show() still sets the aspect of axes).
+        """
+        stages = [self.plotShapes, self.listy, self.plot, self.show, self.save]
+        if not self.renderCache:
+            return stages
+        if self.cache.upToDate(self.mapPath(), self.mapKey):
+            logging.info(f'"{self.mapPath()}" is up to date, not rendered again.')
+            return []
+        self.baseLayer = self.cache.getLayer(self.baseKey)
+        if self.baseLayer is not None:
+            stages.remove(self.plotShapes)
+        return stages
+
+    def composite(self):
+        """Return the RGBA pixels of the whole figure, drawn once (no savefig, no second draw).
+
+With renderCache, points & labels are drawn on the basemap layer (rendered first -
+& kept if not cached).
+        """
+        canvas = self.fig.canvas
+        if not self.renderCache:
+            canvas.draw()
+        elif self.baseLayer is None:
+            # Whole figure but points & labels, kept for the next maps
+            for artist in self.overlay:
+                artist.set_animated(True)
+            canvas.draw()
+            self.cache.putLayer(self.baseKey, np.asarray(canvas.get_renderer().buffer_rgba()))
+            for artist in self.overlay:
+                artist.set_animated(False)
+                self.ax.draw_artist(artist)
+        else:
+            # Same figure size & dpi (in baseKey), axes as draw() would place them
+            np.asarray(canvas.get_renderer().buffer_rgba())[...] = self.baseLayer
+            self.ax.apply_aspect()
+            for artist in self.overlay:
+                self.ax.draw_artist(artist)
+        return np.asarray(canvas.get_renderer().buffer_rgba())
+
+    def crop(self, image):
+        """Return the area of image saved & its georeferencing (None but for geotiff).
+
+The same area as savefig(bbox_inches='tight'), or the axes only for a GeoTIFF : -
+(lon, lat) of its top left corner & degrees per pixel.
+        """
+        renderer = self.fig.canvas.get_renderer()
+        height, width, dpi = image.shape[0], image.shape[1], self.fig.dpi
+        if self.imageFormat == 'geotiff':
+            # Axes in pixels from the bottom left, limits are their lon & lat
+            box = self.ax.get_window_extent(renderer)
+            left, top = round(box.x0), round(height - box.y1)
+            right, bottom = round(box.x1), round(height - box.y0)
+            (lonMin, lonMax), (latMin, latMax) = self.ax.get_xlim(), self.ax.get_ylim()
+            xScale, yScale = (lonMax - lonMin) / box.width, (latMax - latMin) / box.height
+            geo = (lonMin + (left - box.x0) * xScale, latMax - (top - (height - box.y1)) * yScale,
+                   xScale, yScale)
+            return image[top:bottom, left:right], geo
+        # Area of every artist & padding (inches from the bottom left), in rows & columns
+        bbox = self.fig.get_tightbbox(renderer).padded(rcParams['savefig.pad_inches'])
+        left, top = max(int(bbox.x0 * dpi), 0), max(round(height - bbox.y1 * dpi), 0)
+        # As many pixels as savefig() gives
+        right, bottom = min(left + int(bbox.width * dpi), width), min(top + int(bbox.height * dpi), height)
+        return image[top:bottom, left:right], None
+
+    def save(self):
+        """Save file, rendered once & encoded in imageFormat (ImageEncoder).
+
+Parameters :
+
+    imageFormat -> str ; default = 'png'
+    # 'png', 'webp', 'jpeg' or 'geotiff' (axes only, georeferenced in wgs84)
+    pngLevel -> int ; default = 3
+    # zlib level of .png maps, 1 (fastest) to 9 (smallest)
+    imageQuality -> int ; default = 90
+    # Quality of .webp & .jpg maps (0 - 100)
+        """
+        path = self.mapPath()
+        encoder = ImageEncoder(self.imageFormat, self.pngLevel, self.imageQuality, self.encodeWorkers)
+        image, geo = self.crop(self.composite())
+        encoder.encode(path, image, self.fig.dpi, geo)
+        if self.renderCache:
+            self.cache.written(path, self.mapKey)
+        # Print location of the new map
+        logging.info(f'Name of file : "{self.workingDirectory}/{path}"')
+
+    def mapPath(self):
+        """Return the name of the map file (figTitle & extension of imageFormat)."""
+        return f'{self.figTitle}{EXTENSIONS.get(self.imageFormat, "")}'
+
+    def exeSeq(self):
+        """Trigger the execution sequence, each stage timed by Profiler (unchanged ones skipped)."""
+        profiler = Profiler.of(self)
+        try:
+            for stage in (self.basemap, self.load, self.axes, self.cull, self.fingerprint):
+                profiler.stage(stage)
+            for stage in self.staleStages() + [self.close]:
+                profiler.stage(stage)
+        finally:
+            profiler.save()
+        logging.warning('End of DATA plotting !')
+
+    def renderMap(self):
+        """Render one more map with this PlotDATA (settings changed since the last one).
+
+The figure of the previous map is kept when layout() is the same, -
+only its raster & points are replaced.
+        """
+        profiler = Profiler.of(self)
+        try:
+            profiler.stage(self.basemap)
+            profiler.stage(self.load)
+            if getattr(self, 'fig', None) is not None and self.figureLayout == self.layout():
+                profiler.stage(self.clearLayers)
+            else:
+                profiler.stage(self.axes)
+            profiler.stage(self.cull)
+            profiler.stage(self.fingerprint)
+            for stage in self.staleStages():
+                profiler.stage(stage)
+        finally:
+            profiler.save()
+
+    def close(self):
+        """Free the figure (& everything drawn on it)."""
+        # Artists & figure refer to each other, clear() frees them now, not at the next gc
+        if getattr(self, 'fig', None) is not None:
+            self.fig.clear()
+        self.fig, self.ax, self.layers, self.overlay = None, None, [], []
+
+
+if __name__ == '__main__':
+    print(PlotDATA.__doc__)
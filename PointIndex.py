@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:12:48 2026
+
+@author: yan-s
+"""
+
+import logging
+import numpy as np
+
+
+class PointIndex:
+    """Grid spatial index of points (wgs84), for BBox & radius queries :
+
+0) __init__() : Sort points by grid cell, keep where each cell starts.
+1) bbox() : Return rows of points inside a BBox.
+2) radius() : Return rows of points at most some meters from a point.
+
+Note : Cells are about cellPoints points on average, a query only reads -
+the cells it overlaps, so its time depends on the points found, not on all points.
+    """
+
+    # Points per cell on average
+    cellPoints = 16
+    # Mean earth radius, in meters
+    earthRadius = 6371008.8
+
+    def __init__(self, lon, lat):
+        """Build the grid of lon, lat arrays."""
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        count = len(self.lon)
+        if count:
+            self.west, self.south = float(self.lon.min()), float(self.lat.min())
+            width = float(self.lon.max()) - self.west
+            height = float(self.lat.max()) - self.south
+        else:
+            self.west = self.south = width = height = 0.0
+        # Square cells, so that count / cellPoints cells cover the extent
+        cells = max(count / self.cellPoints, 1)
+        self.cellSize = max(np.sqrt(max(width * height, 1e-18) / cells),
+                            max(width, height) / cells, 1e-9)
+        self.columns = int(width / self.cellSize) + 1
+        self.rows = int(height / self.cellSize) + 1
+
+        # Points sorted by cell (row by row), starts[cell] is the first of a cell
+        keys = self.cell(self.lon, self.lat)
+        self.order = np.argsort(keys, kind='stable')
+        self.starts = np.searchsorted(keys[self.order], np.arange(self.rows * self.columns + 1))
+        logging.debug(f'Spatial index of {count} points, {self.columns} x {self.rows} cells')
+
+    def cell(self, lon, lat):
+        """Return the cell number of coordinates (clipped to the grid)."""
+        column = np.clip(((lon - self.west) // self.cellSize).astype(np.int64), 0, self.columns - 1)
+        row = np.clip(((lat - self.south) // self.cellSize).astype(np.int64), 0, self.rows - 1)
+        return row * self.columns + column
+
+    def bbox(self, west, south, east, north):
+        """Return rows (ascending) of points with west <= lon <= east & south <= lat <= north."""
+        c0, r0 = self.cellIndex(west, south)
+        c1, r1 = self.cellIndex(east, north)
+        if not len(self.lon) or c1 < 0 or r1 < 0 or c0 >= self.columns or r0 >= self.rows:
+            return np.empty(0, dtype=np.int64)
+        c0, r0 = max(c0, 0), max(r0, 0)
+        c1, r1 = min(c1, self.columns - 1), min(r1, self.rows - 1)
+        # Cells of a grid row are contiguous in self.order
+        first = np.arange(r0, r1 + 1) * self.columns
+        starts, ends = self.starts[first + c0], self.starts[first + c1 + 1]
+        lengths = ends - starts
+        candidates = self.order[np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                                + np.arange(lengths.sum())]
+        # Border cells are partly outside
+        lon, lat = self.lon[candidates], self.lat[candidates]
+        inside = (lon >= west) & (lon <= east) & (lat >= south) & (lat <= north)
+        return np.sort(candidates[inside])
+
+    def cellIndex(self, lon, lat):
+        """Return (column, row) of the cell of coordinates (may be outside the grid)."""
+        return (int((lon - self.west) // self.cellSize),
+                int((lat - self.south) // self.cellSize))
+
+    def radius(self, lon, lat, meters):
+        """Return rows (ascending) of points at most meters (great circle) from lon, lat."""
+        # BBox around the circle, then exact haversine distance
+        dLat = np.degrees(meters / self.earthRadius)
+        dLon = dLat / max(np.cos(np.radians(min(abs(lat) + dLat, 90.0))), 1e-12)
+        rows = self.bbox(lon - dLon, lat - dLat, lon + dLon, lat + dLat)
+        lon1, lat1 = np.radians(lon), np.radians(lat)
+        lon2, lat2 = np.radians(self.lon[rows]), np.radians(self.lat[rows])
+        a = (np.sin((lat2 - lat1) / 2) ** 2 +
+             np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        distance = 2 * self.earthRadius * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return rows[distance <= meters]
+
+
+if __name__ == '__main__':
+    print(PointIndex.__doc__)
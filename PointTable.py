@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:17 2026
+
+@author: yan-s
+"""
+
+import os
+import sys
+import logging
+import numpy as np
+from csv import writer
+from array import array
+from PointIndex import PointIndex
+
+
+class PointTable:
+    """Columnar table of named points shared by KmlCSV & PlotDATA :
+
+0) __init__() : Hold 'Name', 'Source', 'Folder' (interned str) & 'Longitude', 'Latitude', 'Altitude' (float64) arrays.
+1) fromRows() : Build the table from [Name, Longitude, Latitude, Altitude, Folder] rows, one at a time.
+2) concat() : Merge tables (of several files) in one.
+3) toDataFrame() : Give a pandas DataFrame on top of the arrays.
+4) toCSV() : Write the table in a .csv file (optional side output).
+5) save() : Write the table as binary .npy files in a directory.
+6) load() : Read a table written by save(), memory-mapped.
+7) spatialIndex() : Give the PointIndex of the table (BBox & radius queries).
+
+Note : Rows are never kept as lists of strings, coordinates go straight in compact buffers.
+'Source' is the file a point comes from & 'Folder' the path of its <Folder> in this file.
+    """
+
+    columns = ['Name', 'Longitude', 'Latitude', 'Altitude', 'Source', 'Folder']
+
+    def __init__(self, name, lon, lat, alt, source=None, folder=None):
+        """Set columns of the table, 'Source' & 'Folder' are empty if not given."""
+        self.name = np.asarray(name, dtype=object)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.alt = np.asarray(alt, dtype=np.float64)
+        self.source = self.constant('') if source is None else np.asarray(source, dtype=object)
+        self.folder = self.constant('') if folder is None else np.asarray(folder, dtype=object)
+        # PointIndex, built on first query
+        self.grid = None
+
+    def __len__(self):
+        """Number of points."""
+        return len(self.lon)
+
+    def constant(self, value):
+        """Return an object array of value, one per point."""
+        column = np.empty(len(self.lon), dtype=object)
+        column[:] = value
+        return column
+
+    @classmethod
+    def fromRows(cls, rows, source=''):
+        """Build a PointTable from an iterable of [Name, Longitude, Latitude, Altitude, Folder] -
+of the same source file.
+        """
+        # Growable C double buffers, 8 bytes per value
+        names, lon, lat, alt, folders = [], array('d'), array('d'), array('d'), []
+        for name, x, y, z, folder in rows:
+            # Same names share one str object
+            names.append(sys.intern(name))
+            lon.append(x)
+            lat.append(y)
+            alt.append(z)
+            folders.append(sys.intern(folder))
+        # np.frombuffer doesn't copy the buffers
+        table = cls(np.array(names, dtype=object),
+                    np.frombuffer(lon, dtype=np.float64),
+                    np.frombuffer(lat, dtype=np.float64),
+                    np.frombuffer(alt, dtype=np.float64),
+                    folder=np.array(folders, dtype=object))
+        table.source = table.constant(sys.intern(source))
+        return table
+
+    @classmethod
+    def concat(cls, tables):
+        """Return one PointTable with the points of every table, in order."""
+        if len(tables) == 1:
+            return tables[0]
+        return cls(*(np.concatenate([getattr(table, column) for table in tables])
+                     for column in ('name', 'lon', 'lat', 'alt', 'source', 'folder')))
+
+    def spatialIndex(self):
+        """Return the PointIndex (BBox & radius queries) of the table, built once."""
+        if self.grid is None:
+            self.grid = PointIndex(self.lon, self.lat)
+        return self.grid
+
+    def toDataFrame(self):
+        """Return a DataFrame with columns 'Name', 'Longitude', 'Latitude' & 'Altitude'."""
+        # Imported here, converting files doesn't need pandas
+        import pandas as pd
+        return pd.DataFrame({'Name': self.name, 'Longitude': self.lon,
+                             'Latitude': self.lat, 'Altitude': self.alt,
+                             'Source': self.source, 'Folder': self.folder}, copy=False)
+
+    def toCSV(self, path):
+        """Write the table in a .csv file."""
+        with open(path, 'w', newline='', encoding=('utf8')) as file:
+            csvWriter = writer(file)
+            csvWriter.writerow(self.columns)
+            csvWriter.writerows(zip(self.name, self.lon.tolist(), self.lat.tolist(),
+                                    self.alt.tolist(), self.source, self.folder))
+        logging.debug(f'{len(self)} points saved in "{path}"')
+
+    def save(self, directory):
+        """Write each column as a .npy file in directory (str joined by NUL, not allowed in xml)."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'lon.npy'), self.lon)
+        np.save(os.path.join(directory, 'lat.npy'), self.lat)
+        np.save(os.path.join(directory, 'alt.npy'), self.alt)
+        for column in ('name', 'source', 'folder'):
+            text = '\x00'.join(getattr(self, column)).encode('utf8')
+            np.save(os.path.join(directory, f'{column}.npy'), np.frombuffer(text, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, directory, mmapMode='r'):
+        """Read a table written by save(), coordinates stay memory-mapped on disk."""
+        lon, lat, alt = (np.load(os.path.join(directory, f'{column}.npy'), mmap_mode=mmapMode)
+                         for column in ('lon', 'lat', 'alt'))
+        strings = []
+        for column in ('name', 'source', 'folder'):
+            text = np.load(os.path.join(directory, f'{column}.npy')).tobytes().decode('utf8')
+            values = [sys.intern(value) for value in text.split('\x00')] if len(lon) else []
+            strings.append(np.array(values, dtype=object))
+        return cls(strings[0], lon, lat, alt, strings[1], strings[2])
+
+
+if __name__ == '__main__':
+    print(PointTable.__doc__)
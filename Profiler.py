@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 08:14:27 2026
+
+@author: yan-s
+"""
+
+import os
+import sys
+import json
+import pstats
+import logging
+import cProfile
+import platform
+import multiprocessing
+from glob import glob, escape
+from io import StringIO
+from time import perf_counter, process_time
+from datetime import datetime
+try:
+    import resource
+except ImportError:
+    # Windows, no peak memory
+    resource = None
+
+
+def residentMB():
+    """Return resident memory of the process (MB), 0 if unknown."""
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peakMB():
+    """Return peak resident memory of the process so far (MB), 0 if unknown."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / 1e6 if sys.platform == 'darwin' else peak * 1024 / 1e6
+
+
+class Profiler:
+    """Time every stage of the execution sequences & report them in a .json file :
+
+0) __init__() : Set report path & stage to profile, note the start of the run.
+1) of() : Return the Profiler of this process (created by the first call).
+2) stage() : Run one stage, keep its wall & CPU time, memory & counts (& cProfile it if chosen).
+3) dumpProfile() : Save cProfile statistics of a stage & log its slowest functions.
+4) count() : Add counts of items (points, tiles...) to the stage running.
+5) workerReports() : Return paths of the reports written by processes of a pool.
+6) save() : Write the report of the run in profileReport (.json), reports of pool processes merged in it.
+
+Note : One Profiler per process, so KmlCSV(), SentinelHubDownload() & PlotDATA() -
+of one run add their stages to the same report. Processes of a pool write their own -
+(profile.<pid>.json), merged in 'workers' of the report (& removed) when the run saves it, -
+those left by an earlier run are removed at its start.
+Execution sequences save the report even when a stage fails, with its 'error'.
+'peakMB' is the peak of the process so far, not of the stage alone.
+    """
+
+    # Profiler of this process
+    current = None
+
+    def __init__(self, reportPath, profileStage=''):
+        """Set report path ('' for none) & name of the stage run under cProfile."""
+        self.worker = multiprocessing.parent_process() is not None
+        if reportPath and self.worker:
+            # A worker of a pool, not the run itself
+            root, extension = os.path.splitext(reportPath)
+            reportPath = f'{root}.{os.getpid()}{extension}'
+        elif reportPath:
+            # Left by a run which stopped before merging them
+            for path in self.workerReports(reportPath):
+                os.remove(path)
+        self.reportPath = reportPath
+        # Reports of pool processes already merged (the run may save several times)
+        self.workers = []
+        self.pid = os.getpid()
+        self.profileStage = profileStage
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.start = perf_counter()
+        self.stages = []
+        # Counts of the stage running, see count()
+        self.counts = None
+
+    @classmethod
+    def of(cls, settings):
+        """Return the Profiler of this process, created with settings (VariableGlobal) on first call."""
+        # A forked process gets a copy of the Profiler of its parent
+        if cls.current is None or cls.current.pid != os.getpid():
+            cls.current = cls(getattr(settings, 'profileReport', ''),
+                              getattr(settings, 'profileStage', ''))
+        return cls.current
+
+    def stage(self, function, *args):
+        """Run function(*args) as a stage named 'Class.method', return its result."""
+        # Class defining the method, ex: KmlCSV.readLayers even when run by PlotDATA()
+        name = function.__qualname__
+        profile = self.profileStage in (name, function.__name__) and self.profileStage
+        outer, self.counts = self.counts, {}
+        rss = residentMB()
+        wall, cpu = perf_counter(), process_time()
+        profiler = cProfile.Profile() if profile else None
+        error = None
+        try:
+            if profiler:
+                profiler.enable()
+            return function(*args)
+        except BaseException as e:
+            # Kept in the report, then raised as usual
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            stage = {'name': name,
+                     'wall': round(perf_counter() - wall, 4),
+                     'cpu': round(process_time() - cpu, 4),
+                     'rssMB': round(residentMB(), 1),
+                     'rssDeltaMB': round(residentMB() - rss, 1),
+                     'peakMB': round(peakMB(), 1),
+                     'counts': self.counts,
+                     'error': error}
+            self.counts = outer
+            self.stages.append(stage)
+            logging.debug(f'Stage {name} : {stage["wall"]:.3f} s wall, {stage["cpu"]:.3f} s CPU, '
+                          f'{stage["rssDeltaMB"]:+.0f} MB {stage["counts"] or ""}')
+            if profiler:
+                self.dumpProfile(profiler, name)
+
+    def dumpProfile(self, profiler, name):
+        """Save cProfile statistics of a stage in <name>.prof & log the slowest functions."""
+        path = f'{name}.prof'
+        profiler.dump_stats(path)
+        text = StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(15)
+        logging.info(f'cProfile of {name} saved in "{os.path.abspath(path)}" :\n{text.getvalue()}')
+
+    def count(self, **items):
+        """Add counts (ex: points=1200) to the stage running, nothing outside a stage."""
+        if self.counts is not None:
+            for key, value in items.items():
+                self.counts[key] = self.counts.get(key, 0) + int(value)
+
+    @staticmethod
+    def workerReports(reportPath):
+        """Return paths of <root>.<pid><extension> files beside reportPath (<root><extension>)."""
+        root, extension = os.path.splitext(reportPath)
+        return [path for path in glob(f'{escape(root)}.*{escape(extension)}')
+                if path[len(root) + 1:len(path) - len(extension)].isdigit()]
+
+    def save(self):
+        """Write the report of the run (every stage so far) in reportPath, atomically."""
+        if not self.reportPath:
+            return
+        if not self.worker:
+            for path in self.workerReports(self.reportPath):
+                with open(path, 'r', encoding='utf8') as file:
+                    self.workers.append(json.load(file))
+                os.remove(path)
+        report = {'started': self.started,
+                  'wall': round(perf_counter() - self.start, 4),
+                  'argv': sys.argv,
+                  'pid': os.getpid(),
+                  'python': platform.python_version(),
+                  'machine': platform.machine(),
+                  'cpus': os.cpu_count(),
+                  'stages': self.stages}
+        if self.workers:
+            report['workers'] = self.workers
+        partPath = f'{self.reportPath}.part'
+        with open(partPath, 'w', encoding=('utf8')) as file:
+            json.dump(report, file, indent=1)
+        os.replace(partPath, self.reportPath)
+        logging.info(f'Profile of the run saved in "{os.path.abspath(self.reportPath)}".')
+
+
+if __name__ == '__main__':
+    print(Profiler.__doc__)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:58:10 2026
+
+@author: yan-s
+"""
+
+import os
+import json
+import logging
+import hashlib
+
+
+class RasterCache:
+    """Content-addressed cache of downloaded sentinelhub .tiff files :
+
+0) __init__() : Set cache directory.
+1) request() : Return {dict} of everything that defines a download (BBox, resolution, time, evalscript, deployment, composite...).
+2) key() : Return sha256 of request(), name of the directory of the raster.
+3) get() : Return path of the .tiff file of these settings if already downloaded, else None.
+4) put() : Return path where to write the .tiff file of these settings & save request() beside.
+
+Note : SentinelHubDownload checks get() before any network call and PlotDATA -
+takes its basemap from the same key, so both always use the exact matching raster.
+    """
+
+    def __init__(self, directory):
+        """Set cache directory."""
+        self.directory = directory
+
+    @staticmethod
+    def request(settings):
+        """Return {dict} of the parameters of a download, from VariableGlobal settings."""
+        request = {'bbox': [round(float(value), 9) for value in settings.BBox],
+                   'resolution': settings.resolution,
+                   'timeInterval': [settings.timeInterval, settings.intervalTime],
+                   'evalscript': hashlib.sha256(settings.evalscript.encode('utf8')).hexdigest(),
+                   'collection': settings.dataCollection,
+                   'mosaickingOrder': settings.mosaickingOrder}
+        # Other deployment (FakeSentinelHub, another region), keys of the default one unchanged
+        if settings.shBaseUrl:
+            request['deployment'] = settings.shBaseUrl
+        # Composites only (keys of single downloads unchanged)
+        if settings.compositeScenes:
+            request['evalscript'] = hashlib.sha256(settings.compositeEvalscript.encode('utf8')).hexdigest()
+            request['composite'] = [settings.compositeScenes, settings.compositeMethod]
+        return request
+
+    def key(self, settings):
+        """Return sha256 of the parameters of a download."""
+        request = json.dumps(self.request(settings), sort_keys=True)
+        return hashlib.sha256(request.encode('utf8')).hexdigest()
+
+    def path(self, settings):
+        """Return path of the .tiff file of these settings."""
+        return os.path.join(self.directory, self.key(settings), 'response.tiff')
+
+    def get(self, settings):
+        """Return path of the .tiff file if already downloaded, else None."""
+        path = self.path(settings)
+        if os.path.exists(path):
+            logging.info(f'Raster cache hit : "{path}".')
+            return path
+        logging.info(f'Raster cache miss for {self.request(settings)}.')
+        return None
+
+    def put(self, settings):
+        """Create the directory of the raster, save request.json & return path of the .tiff file."""
+        path = self.path(settings)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(os.path.join(os.path.dirname(path), 'request.json'), 'w', encoding=('utf8')) as file:
+            json.dump(self.request(settings), file, indent=1)
+        return path
+
+
+if __name__ == '__main__':
+    print(RasterCache.__doc__)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:08:51 2026
+
+@author: yan-s
+"""
+
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+
+
+class RenderCache:
+    """Rendered layers of maps & keys of maps written, keyed by everything they show :
+
+0) __init__() : Set cache directory.
+1) key() : Return sha256 of a [list] of inputs (settings, digests...).
+2) getLayer() : Return the RGBA pixels of a layer already rendered, else None.
+3) putLayer() : Save the RGBA pixels of a layer, remove the oldest ones over maxLayers.
+4) keyPath() : Return the file holding the key of the map written at a path.
+5) upToDate() : Return True if the map at path was written from the same inputs & still exists.
+6) written() : Note the key of the map written at path.
+
+Note : PlotDATA keeps its basemap layer (raster, axes, grid, scale, title, lines & -
+polygons drawn, points & labels not) as <key>.npy, so a map whose points or label -
+settings changed only draws points & labels on it.
+Key of each written map is in its own file of 'maps' (named by the map path), so -
+rendering processes of --batch never overwrite each other's. A map whose key -
+didn't change isn't rendered again.
+    """
+
+    # Layers kept (about 30 MB each for a 3200 x 2400 pixels figure)
+    maxLayers = 16
+
+    def __init__(self, directory):
+        """Set cache directory."""
+        self.directory = directory
+        self.mapsDirectory = os.path.join(directory, 'maps')
+        os.makedirs(self.mapsDirectory, exist_ok=True)
+
+    @staticmethod
+    def key(inputs):
+        """Return sha256 of inputs, a [list] of values json can write (others as str)."""
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf8')).hexdigest()
+
+    def getLayer(self, key):
+        """Return the (height, width, 4) RGBA array of layer key (memory-mapped), None if not rendered."""
+        path = os.path.join(self.directory, f'{key}.npy')
+        if not os.path.exists(path):
+            logging.debug(f'Render cache miss for layer {key[:12]}.')
+            return None
+        # Used again, kept longer than the others
+        os.utime(path)
+        logging.info(f'Render cache hit : "{path}".')
+        return np.load(path, mmap_mode='r')
+
+    def putLayer(self, key, image):
+        """Save image as layer key (atomically), keep the maxLayers most recent layers."""
+        path = os.path.join(self.directory, f'{key}.npy')
+        partPath = f'{path}.{os.getpid()}.part'
+        with open(partPath, 'wb') as file:
+            np.save(file, image)
+        os.replace(partPath, path)
+        layers = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.npy')),
+                        key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in layers[self.maxLayers:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Removed by another rendering process meanwhile
+                continue
+            logging.debug(f'Layer "{entry.path}" removed from the render cache.')
+
+    def keyPath(self, path):
+        """Return the file holding the key of the map at path."""
+        name = hashlib.sha256(os.path.abspath(path).encode('utf8')).hexdigest()
+        return os.path.join(self.mapsDirectory, f'{name}.key')
+
+    def upToDate(self, path, key):
+        """Return True if path exists & was written from inputs of key."""
+        try:
+            with open(self.keyPath(path), 'r', encoding=('utf8')) as file:
+                return os.path.exists(path) and file.read() == key
+        except OSError:
+            return False
+
+    def written(self, path, key):
+        """Note key of the map written at path (atomically)."""
+        keyPath = self.keyPath(path)
+        partPath = f'{keyPath}.{os.getpid()}.part'
+        with open(partPath, 'w', encoding=('utf8')) as file:
+            file.write(key)
+        os.replace(partPath, keyPath)
+
+
+if __name__ == '__main__':
+    print(RenderCache.__doc__)
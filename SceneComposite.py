@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:12:05 2026
+
+@author: yan-s
+"""
+
+import os
+import logging
+import numpy as np
+import tifffile
+
+
+# Value of cloudy pixels while sorting, above any 8 bits value
+CLOUDY = 1 << 10
+
+
+def compositeBlock(block, method, order):
+    """Return the (rows, width, 3) composite of block (scenes, rows, width, 4), -
+band 4 not 0 where the pixel is cloudy (or has no data).
+
+method 'median' : per band median of the clear scenes of each pixel, -
+'best' : clear pixel of the first scene of order (least cloudy first).
+Pixels cloudy in every scene take the value of the least cloudy scene.
+    """
+    clear = block[..., 3] == 0
+    count = clear.sum(axis=0)
+    if method == 'best':
+        # First clear scene of each pixel, in order
+        first = np.asarray(order)[clear[order].argmax(axis=0)]
+        composite = np.take_along_axis(block[..., :3], first[None, ..., None], axis=0)[0]
+    else:
+        composite = np.empty(block.shape[1:3] + (3,), dtype=np.uint8)
+        lower, upper = (np.maximum(count - 1, 0) // 2)[None], (count // 2)[None]
+        # One band at a time (less memory), cloudy pixels sorted after every clear one, -
+        # median of the first count values
+        for band in range(3):
+            values = np.where(clear, block[..., band], np.uint16(CLOUDY))
+            values.sort(axis=0)
+            composite[..., band] = (np.take_along_axis(values, lower, axis=0)[0] +
+                                    np.take_along_axis(values, upper, axis=0)[0] + 1) // 2
+    # No clear scene at all
+    cloudy = count == 0
+    composite[cloudy] = block[order[0], ..., :3][cloudy]
+    return composite
+
+
+class SceneComposite:
+    """Cloud free composite of several scenes (RGB & cloud mask), larger than memory if needed :
+
+0) __init__() : Create the memory-mapped stack of scenes (.npy) on disk.
+1) put() : Write a downloaded scene (or a tile of it) in the stack & count its cloudy pixels.
+2) write() : Write the composite in a .tiff file, rows blocks at a time.
+3) close() : Remove the stack.
+
+Note : Scenes are (height, width, 4) uint8 arrays, band 4 is the cloud mask (CLM or no data). -
+Only blocks of rows (scenes x rows x width x 4 bytes) are read at once, both the stack & -
+the .tiff file written are memory-mapped, so rasters larger than memory are composited.
+    """
+
+    def __init__(self, path, scenes, height, width):
+        """Create the stack of scenes x height x width x 4 uint8 in path (.npy)."""
+        self.path = path
+        self.stack = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                               shape=(scenes, height, width, 4))
+        # Cloudy pixels of each scene
+        self.cloudy = [0] * scenes
+
+    def put(self, index, image, row=0, column=0):
+        """Write image (rows, columns, 4), scene index or its tile at row & column."""
+        self.stack[index, row:row + image.shape[0], column:column + image.shape[1]] = image
+        self.cloudy[index] += int(np.count_nonzero(image[..., 3]))
+
+    def write(self, path, method='median', rows=512):
+        """Write the composite (method 'median' or 'best') in path, an uncompressed RGB .tiff file."""
+        scenes, height, width, _ = self.stack.shape
+        for index, cloudy in enumerate(self.cloudy):
+            logging.info(f'Scene {index + 1}/{scenes} : {cloudy / (height * width):.0%} cloudy')
+        # Least cloudy scene first
+        order = np.argsort(self.cloudy, kind='stable')
+        # Contiguous .tiff file, PlotDATA memory-maps it the same way
+        composite = tifffile.memmap(path, shape=(height, width, 3), dtype=np.uint8, photometric='rgb')
+        cloudy = 0
+        for start in range(0, height, rows):
+            block = np.asarray(self.stack[:, start:start + rows])
+            composite[start:start + rows] = compositeBlock(block, method, order)
+            cloudy += np.count_nonzero((block[..., 3] != 0).all(axis=0))
+        composite.flush()
+        del composite
+        logging.info(f'{method} composite of {scenes} scenes : {cloudy / (height * width):.2%} '
+                     f'of pixels cloudy in every scene')
+
+    def close(self):
+        """Remove the stack of scenes."""
+        # Memory map released before the file is removed
+        self.stack = None
+        os.remove(self.path)
+
+
+if __name__ == '__main__':
+    print(SceneComposite.__doc__)
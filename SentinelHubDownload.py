@@ -1,145 +1,337 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Aug  5 09:46:12 2022
-
-@author: yan-s
-"""
-
-from main import VariableGlobal
-
-import os
-import logging
-from time import sleep
-from utils import plot_image
-
-from sentinelhub import (
-    CRS,
-    BBox,
-    SHConfig,
-    DataCollection,
-    MimeType,
-    MosaickingOrder,
-    SentinelHubRequest,
-    bbox_to_dimensions,
-)
-
-
-class SentinelHubDownload(VariableGlobal):
-    """Download satellite DATA using SentinelHub Api :
- 
-0) __init__() : Initialise parent class VariableGlobal().  
-1) config() : Load  Sentinelhub credentials in config() & check it.
-2) sentinelParameters() : Set resolution, BBox & prepare evalscript.
-3) preRequest() : Prepare the request with config & all parameters.
-4) retrieveData() : Do the actual request & use already download DATA if on computer.
-5) exeSeq() : Act as an execution thread.
- 
-Note : Read more at https://docs.sentinel-hub.com/api/latest/
-    """
-
-    def __init__(self):
-        """Initialise parent class VariableGlobal()."""
-        # Initialise the 'parent class'
-        VariableGlobal.__init__(self)
-
-    def config(self):
-        """Load config and check SentinelHub credentials."""
-        
-        # Create object from SHConfing()
-        config = SHConfig()
-        # Pass credetials
-        config.instance_id = self.instanceID
-        config.sh_client_id = self.clientID
-        config.sh_client_secret = self.clientSecret
-
-        # Check if correct credentials
-        if not config.sh_client_id or not config.sh_client_secret:
-            logging.warning("Warning! To use Process API, please provide the credentials (OAuth client ID and client secret).")
-        return config
-
-    def sentinelParameters(self):
-        """Set resolution, BBox & prepare evalscript."""
-        # Set satellite pixel resolution (with this band, 30m is minimum)
-        resolution = self.resolution
-        # Set Boundary Box of the wanted area
-        self.sentinelBBox = BBox(bbox=self.BBox, crs=CRS.WGS84)
-        self.sentinelSize = bbox_to_dimensions(
-            self.sentinelBBox, resolution=resolution)
-
-        logging.info(f"Image shape at {resolution} m resolution: {self.sentinelSize} pixels")
-
-        # Evalscript, see more at :
-        # https://docs.sentinel-hub.com/api/latest/evalscript/
-        self.evalscript = """
-        //VERSION=3
-        function setup() {
-          return {
-            input: ["B02", "B03", "B04", "CLM"],
-            output: 
-                { bands: 3 }
-          }
-        }
-
-        function evaluatePixel(sample) {
-          if (sample.CLM == 1) {
-            return [0.75 + sample.B04, sample.B03, sample.B02]
-          }
-          return [3.5*sample.B04, 3.5*sample.B03, 3.5*sample.B02];
-        }
-        """
-
-    def preRequest(self):
-        """Prepare request with config & parameters."""
-        # Prepare sentinelhub downloading request
-        self.request_true_color = SentinelHubRequest(
-            data_folder=self.workingDirectory,
-            evalscript=self.evalscript,
-            input_data=[
-                SentinelHubRequest.input_data(
-                    data_collection=DataCollection.SENTINEL2_L1C,
-                    time_interval=(self.timeInterval, self.intervalTime),
-                    mosaicking_order=MosaickingOrder.LEAST_CC,
-                )
-            ],
-            responses=[SentinelHubRequest.output_response(
-                "default", MimeType.TIFF)],
-            bbox=self.sentinelBBox,
-            size=self.sentinelSize,
-            config=self.config(),
-        )
-
-    def retrieveData(self):
-        """Query for data & check if already exist on the computer.
-        If yes, use local sources.
-        """
-        # Get data
-        self.request_true_color.get_data(save_data=True)
-
-        # Print location data
-        print("\nThe output directory has been created and a tiff file "+\
-              "true color was saved into the following structure:\n")
-
-        for folder, _, filenames in os.walk(self.request_true_color.data_folder):
-            for filename in filenames:
-                print(os.path.join(folder, filename))
-
-        # Get Map
-        data_mask = self.request_true_color.get_data()
-        # Plot Map on console with the least cloud exposure, more at :
-        # https://docs.sentinel-hub.com/api/latest/user-guides/cloud-masks/
-        plot_image(data_mask[0], factor=1 / 255)
-        # Just some decorations
-        sleep(0.5)
-        print('\n')
-
-    def exeSeq(self):
-        """Trigger the execution sequence."""
-        self.config()
-        self.sentinelParameters()
-        self.preRequest()
-        self.retrieveData()
-        logging.warning('End of SentinelHub downloading !\n')
-
-
-if __name__ == '__main__':
-    print(SentinelHubDownload.__doc__)
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Aug  5 09:46:12 2022
+
+@author: yan-s
+"""
+
+from main import VariableGlobal
+from RasterCache import RasterCache
+from BlockRaster import BlockRaster
+from BasemapPyramid import BasemapPyramid
+from SceneComposite import SceneComposite
+from Profiler import Profiler
+
+import os
+import logging
+import numpy as np
+from math import ceil
+from hashlib import md5
+from time import sleep
+from datetime import date, timedelta
+from sentinelhub.io_utils import write_data
+from sentinelhub.exceptions import DownloadFailedException
+
+from sentinelhub import (
+    CRS,
+    BBox,
+    SHConfig,
+    DataCollection,
+    MimeType,
+    MosaickingOrder,
+    SentinelHubRequest,
+    SentinelHubDownloadClient,
+    bbox_to_dimensions,
+)
+
+
+class SentinelHubDownload(VariableGlobal):
+    """Download satellite DATA using SentinelHub Api :
+ 
+0) __init__() : Initialise parent class VariableGlobal().  
+1) config() : Load  Sentinelhub credentials in config() & check it.
+2) sentinelParameters() : Set resolution, BBox, collection & raster cache.
+3) preRequest() : Prepare the request with config & all parameters.
+4) retrieveData() : Do the actual request & save the .tiff file in the raster cache.
+5) previewImage() : Return an overview of the downloaded raster (8 bits RGB).
+6) showPreview() : Plot the overview in the console.
+7) saveRaster() : Save image in the raster cache, keyed on every download parameter.
+8) tileParameters() : Split BBox in tiles under the request pixel limit, if too large.
+9) downloadTiles() : Download tiles in parallel by batches, retry failed ones & paste them.
+10) pasteTile() : Write a downloaded tile in the .tiff file (memory-mapped BlockRaster).
+11) saveMosaic() : Move the .tiff file of the tiles in the raster cache.
+12) retrieveTiles() : Download tiles straight into the .tiff file of the raster cache.
+13) sceneIntervals() : Split the time interval in compositeScenes parts, one scene each.
+14) downloadScene() : Download the scene (RGB & cloud mask) of a part in the stack, in one request or in tiles.
+15) compositeStack() : Return the SceneComposite stack of the scenes, beside the .tiff file.
+16) saveComposite() : Save the cloud free composite of the scenes in the raster cache.
+17) retrieveComposite() : Download every scene & save their composite.
+18) retrieve() : Use the raster cache, else download in one request, in tiles or as a composite.
+19) exeSeq() : Act as an execution thread.
+ 
+Note : Read more at https://docs.sentinel-hub.com/api/latest/
+With compositeScenes, clouds are removed here (SceneComposite) instead of -
+relying on mosaickingOrder only : clouds left by 'leastCC' on the whole interval -
+are replaced by clear pixels of the other scenes.
+    """
+
+    def __init__(self):
+        """Initialise parent class VariableGlobal()."""
+        # Initialise the 'parent class'
+        VariableGlobal.__init__(self)
+
+    def config(self):
+        """Load config and check SentinelHub credentials."""
+        
+        # Create object from SHConfing()
+        config = SHConfig()
+        # Pass credetials
+        config.instance_id = self.instanceID
+        config.sh_client_id = self.clientID
+        config.sh_client_secret = self.clientSecret
+        # Other Sentinel Hub deployment (or local stand-in server)
+        if self.shBaseUrl:
+            config.sh_base_url = self.shBaseUrl
+        if self.shTokenUrl:
+            config.sh_token_url = self.shTokenUrl
+
+        # Check if correct credentials
+        if not config.sh_client_id or not config.sh_client_secret:
+            logging.warning("Warning! To use Process API, please provide the credentials (OAuth client ID and client secret).")
+        return config
+
+    def sentinelParameters(self):
+        """Set resolution, BBox, collection & cache of the raster."""
+        # Set satellite pixel resolution (with this band, 30m is minimum)
+        resolution = self.resolution
+        # Set Boundary Box of the wanted area
+        self.sentinelBBox = BBox(bbox=self.BBox, crs=CRS.WGS84)
+        self.sentinelSize = bbox_to_dimensions(
+            self.sentinelBBox, resolution=resolution)
+
+        logging.info(f"Image shape at {resolution} m resolution: {self.sentinelSize} pixels")
+
+        # Collections carry their own service url, redefine it for another deployment
+        self.sentinelCollection = DataCollection[self.dataCollection]
+        if self.shBaseUrl:
+            name = f'{self.dataCollection}_' + md5(self.shBaseUrl.encode()).hexdigest()[:8]
+            self.sentinelCollection = self.sentinelCollection.define_from(
+                name, service_url=self.shBaseUrl)
+
+        # Downloaded .tiff file of these parameters (evalscript is set in VariableGlobal)
+        self.rasterCache = RasterCache(f'{self.workingDirectory}/{self.rasterDirectory}')
+
+    def preRequest(self):
+        """Prepare request with config & parameters."""
+        # Prepare sentinelhub downloading request
+        self.request_true_color = self.request(self.sentinelBBox, self.sentinelSize)
+
+    def request(self, bbox, size, dataFolder=None, timeInterval=None):
+        """Return a SentinelHubRequest of bbox at size (width, height) pixels, -
+during timeInterval (default : the whole interval), with the evalscript of composite scenes if any.
+        """
+        return SentinelHubRequest(
+            data_folder=dataFolder,
+            evalscript=self.compositeEvalscript if self.compositeScenes else self.evalscript,
+            input_data=[
+                SentinelHubRequest.input_data(
+                    data_collection=self.sentinelCollection,
+                    time_interval=timeInterval or (self.timeInterval, self.intervalTime),
+                    mosaicking_order=MosaickingOrder(self.mosaickingOrder),
+                )
+            ],
+            responses=[SentinelHubRequest.output_response(
+                "default", MimeType.TIFF)],
+            bbox=bbox,
+            size=size,
+            config=self.config(),
+        )
+
+    def retrieveData(self):
+        """Query for data (once) & save it in the raster cache."""
+        # Get Map
+        data_mask = self.request_true_color.get_data()
+        self.saveRaster(data_mask[0])
+
+        # Plot Map on console with the least cloud exposure, more at :
+        # https://docs.sentinel-hub.com/api/latest/user-guides/cloud-masks/
+        if self.preview:
+            self.showPreview()
+
+    def previewImage(self):
+        """Return the smallest overview of the raster of at least previewPixels (8 bits RGB)."""
+        # 8 bits RGB & overviews by blocks, a raster larger than memory is never read at once
+        raster = BlockRaster.open(self.rasterPath).display()
+        image, _ = BasemapPyramid(self.rasterPath, raster.image).window([0, 1, 0, 1], [0, 1, 0, 1],
+                                                                        self.previewPixels, self.previewPixels)
+        return image
+
+    def showPreview(self, image=None):
+        """Plot image (default : previewImage()) in the console -
+(utils imported here, only needed with preview).
+        """
+        from utils import plot_image
+        plot_image(self.previewImage() if image is None else image, factor=1 / 255)
+        print('\n')
+
+    def saveRaster(self, image):
+        """Write image in the raster cache (atomically, a partial .tiff is never used)."""
+        self.rasterPath = self.rasterCache.put(self)
+        write_data(self.rasterPath + '.part', image, data_format=MimeType.TIFF)
+        os.replace(self.rasterPath + '.part', self.rasterPath)
+        logging.info(f'{image.shape[1]} x {image.shape[0]} pixels saved in "{self.rasterPath}"')
+
+    def tileParameters(self):
+        """Split BBox in a grid of tiles, each under maxTilePixels in width & height.
+
+Set self.tiles, a [list] of (row, column, BBox, (width, height)) where -
+row & column are the pixel offsets of the tile in the whole image.
+        """
+        width, height = self.sentinelSize
+        nx, ny = ceil(width / self.maxTilePixels), ceil(height / self.maxTilePixels)
+        # Same split in degrees & pixels, rows go from North to South
+        lons = np.linspace(self.BBox[0], self.BBox[2], nx + 1)
+        lats = np.linspace(self.BBox[3], self.BBox[1], ny + 1)
+        columns = np.linspace(0, width, nx + 1).round().astype(int)
+        rows = np.linspace(0, height, ny + 1).round().astype(int)
+
+        self.tiles = []
+        for j in range(ny):
+            for i in range(nx):
+                bbox = BBox(bbox=[lons[i], lats[j + 1], lons[i + 1], lats[j]], crs=CRS.WGS84)
+                size = (int(columns[i + 1] - columns[i]), int(rows[j + 1] - rows[j]))
+                self.tiles.append((int(rows[j]), int(columns[i]), bbox, size))
+        # .tiff file the tiles are written in (created with the first tile)
+        self.mosaic = None
+        logging.info(f'{len(self.tiles)} tiles ({nx} x {ny}) of at most {self.maxTilePixels} pixels')
+
+    def downloadTiles(self, paste=None, timeInterval=None):
+        """Download tiles (during timeInterval) with downloadWorkers threads, retry failed ones -
+with an exponential backoff & give each one to paste(index, data) (default : pasteTile()).
+
+Tiles are downloaded by batches of 2 x downloadWorkers, only a batch is in memory at once.
+        """
+        paste = paste or self.pasteTile
+        requests = [self.request(bbox, size, timeInterval=timeInterval) for _, _, bbox, size in self.tiles]
+        # One client (and so one authentication) for every tile, -
+        # failed tiles are returned as None instead of raising
+        config = self.config()
+        # Retries are done here, with backoff, for all failed tiles at once
+        config.max_download_attempts = 1
+        client = SentinelHubDownloadClient(config=config, raise_download_errors=False)
+
+        done = [False] * len(self.tiles)
+        pending = list(range(len(self.tiles)))
+        batch = 2 * self.downloadWorkers
+        for attempt in range(self.downloadRetries + 1):
+            if attempt:
+                delay = self.retryBackoff * 2 ** (attempt - 1)
+                logging.warning(f'{len(pending)} tiles failed, retry in {delay} s')
+                sleep(delay)
+            for start in range(0, len(pending), batch):
+                indices = pending[start:start + batch]
+                results = client.download([requests[i].download_list[0] for i in indices],
+                                          max_threads=self.downloadWorkers)
+                for i, data in zip(indices, results):
+                    if data is not None:
+                        paste(i, data)
+                        done[i] = True
+            pending = [i for i in pending if not done[i]]
+            if not pending:
+                break
+        if pending:
+            raise DownloadFailedException(f'{len(pending)} tiles not downloaded after '
+                                          f'{self.downloadRetries} retries')
+
+    def pasteTile(self, index, data):
+        """Write tile index of self.tiles in self.mosaic, the .tiff file of the raster cache -
+(written as .part, created with the first tile : bands & type are the evalscript's).
+        """
+        if self.mosaic is None:
+            width, height = self.sentinelSize
+            self.rasterPath = self.rasterCache.put(self)
+            self.mosaic = BlockRaster.create(self.rasterPath + '.part', (height, width) + data.shape[2:], data.dtype)
+        row, column, _, _ = self.tiles[index]
+        self.mosaic.paste(row, column, data)
+
+    def saveMosaic(self):
+        """Move the .tiff file of the tiles in the raster cache (atomically)."""
+        self.mosaic.flush()
+        height, width = self.mosaic.image.shape[:2]
+        self.mosaic = None
+        os.replace(self.rasterPath + '.part', self.rasterPath)
+        logging.info(f'{width} x {height} pixels saved in "{self.rasterPath}"')
+
+    def retrieveTiles(self):
+        """Download tiles straight into the .tiff file of the raster cache."""
+        self.downloadTiles()
+        self.saveMosaic()
+        if self.preview:
+            self.showPreview()
+
+    def sceneIntervals(self):
+        """Return [(first day, last day), ...] of the compositeScenes parts of the time interval."""
+        first, last = date.fromisoformat(self.timeInterval[:10]), date.fromisoformat(self.intervalTime[:10])
+        bounds = [first + (last - first) * i / self.compositeScenes for i in range(self.compositeScenes + 1)]
+        # Days of a part end the day before the next one starts
+        return [(bounds[i].isoformat(), max(bounds[i], bounds[i + 1] - timedelta(days=1)).isoformat())
+                for i in range(self.compositeScenes - 1)] + [(bounds[-2].isoformat(), last.isoformat())]
+
+    def downloadScene(self, stack, index, timeInterval):
+        """Download the (height, width, 4) scene of timeInterval in stack, in one request or in tiles."""
+        if max(self.sentinelSize) <= self.maxTilePixels:
+            stack.put(index, self.request(self.sentinelBBox, self.sentinelSize,
+                                          timeInterval=timeInterval).get_data()[0])
+        else:
+            self.downloadTiles(lambda tile, data: stack.put(index, data, *self.tiles[tile][:2]), timeInterval)
+
+    def compositeStack(self):
+        """Return the SceneComposite of compositeScenes scenes, stacked beside the .tiff file."""
+        self.rasterPath = self.rasterCache.put(self)
+        width, height = self.sentinelSize
+        if max(self.sentinelSize) > self.maxTilePixels:
+            self.tileParameters()
+        return SceneComposite(os.path.join(os.path.dirname(self.rasterPath), 'scenes.npy'),
+                              self.compositeScenes, height, width)
+
+    def saveComposite(self, stack):
+        """Write the composite of stack in the raster cache (atomically) & remove the stack."""
+        stack.write(self.rasterPath + '.part', self.compositeMethod, self.compositeRows)
+        stack.close()
+        os.replace(self.rasterPath + '.part', self.rasterPath)
+        logging.info(f'Composite saved in "{self.rasterPath}"')
+        if self.preview:
+            self.showPreview()
+
+    def retrieveComposite(self):
+        """Download one scene per part of the time interval & save their composite."""
+        stack = self.compositeStack()
+        for index, timeInterval in enumerate(self.sceneIntervals()):
+            self.downloadScene(stack, index, timeInterval)
+        self.saveComposite(stack)
+
+    def retrieve(self):
+        """Use the raster cache, else download in one request, in tiles or as a composite."""
+        # No request at all if this raster was already downloaded
+        self.rasterPath = self.rasterCache.get(self)
+        if self.rasterPath:
+            Profiler.of(self).count(cached=1)
+            return
+        # One scene per part of the time interval, composited here
+        if self.compositeScenes:
+            self.retrieveComposite()
+            Profiler.of(self).count(scenes=self.compositeScenes)
+        # One request if the BBox fits the request limit, else tiles
+        elif max(self.sentinelSize) <= self.maxTilePixels:
+            self.preRequest()
+            self.retrieveData()
+            Profiler.of(self).count(requests=1)
+        else:
+            self.tileParameters()
+            self.retrieveTiles()
+            Profiler.of(self).count(requests=len(self.tiles))
+
+    def exeSeq(self):
+        """Trigger the execution sequence, each stage timed by Profiler."""
+        profiler = Profiler.of(self)
+        try:
+            profiler.stage(self.config)
+            profiler.stage(self.sentinelParameters)
+            profiler.stage(self.retrieve)
+        finally:
+            profiler.save()
+        logging.warning('End of SentinelHub downloading !\n')
+
+
+if __name__ == '__main__':
+    print(SentinelHubDownload.__doc__)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:40:15 2026
+
+@author: yan-s
+"""
+
+import os
+import sys
+import hashlib
+import logging
+import numpy as np
+from array import array
+
+
+# Codes of the 'Kind' column
+LINE, POLYGON = 0, 1
+KINDS = {'LineString': LINE, 'Polygon': POLYGON}
+
+
+def ringArea(lon, lat):
+    """Return signed area of a ring (shoelace formula), positive if counterclockwise."""
+    return 0.5 * float(np.dot(lon[:-1], lat[1:]) - np.dot(lon[1:], lat[:-1]) +
+                       lon[-1] * lat[0] - lon[0] * lat[-1])
+
+
+def douglasPeucker(lon, lat, tolerance):
+    """Return indices of the vertices kept by Douglas-Peucker at tolerance (degrees)."""
+    count = len(lon)
+    if count < 3:
+        return np.arange(count)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    # Segments still to simplify, as (first, last) vertices
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x, y = lon[first + 1:last] - lon[first], lat[first + 1:last] - lat[first]
+        dx, dy = lon[last] - lon[first], lat[last] - lat[first]
+        length = np.hypot(dx, dy)
+        if length:
+            # Distance to the line through first & last
+            distance = np.abs(x * dy - y * dx) / length
+        else:
+            # Closed part, distance to first
+            distance = np.hypot(x, y)
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            middle = first + 1 + farthest
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return np.flatnonzero(keep)
+
+
+class ShapeTable:
+    """Columnar table of lines & polygons shared by KmlCSV & PlotDATA :
+
+0) __init__() : Hold 'Name', 'Source', 'Folder' (str) & 'Kind' of each geometry, -
+its parts (rings of polygons) & their 'Longitude', 'Latitude' (float64) vertices.
+1) fromGeometries() : Build the table from (Name, Folder, Geometry) rows, one at a time.
+2) concat() : Merge tables (of several files) in one.
+3) partBounds() : Return west, east, south & north of every part.
+4) digest() : Return sha256 of what is drawn of the table (kinds, parts & vertices).
+5) simplify() : Return parts of the geometries inside an area, simplified to a tolerance.
+6) save() : Write the table as binary .npy files in a directory.
+7) load() : Read a table written by save(), memory-mapped.
+
+Note : Vertices of every part are in 2 flat arrays, a part is a slice of them, -
+so millions of vertices cost 16 bytes each, not a Python object.
+Outer rings are counterclockwise & holes clockwise, so holes stay empty when filled.
+Altitudes aren't kept, only the map is drawn.
+    """
+
+    columns = ['Name', 'Kind', 'Source', 'Folder']
+
+    def __init__(self, name=(), kind=(), source=None, folder=None, parts=(0,), vertices=(0,),
+                 lon=(), lat=()):
+        """Set columns of the table, geometry i has parts parts[i]:parts[i + 1], -
+part j has vertices vertices[j]:vertices[j + 1].
+        """
+        self.name = np.asarray(name, dtype=object)
+        self.kind = np.asarray(kind, dtype=np.uint8)
+        self.source = self.constant('') if source is None else np.asarray(source, dtype=object)
+        self.folder = self.constant('') if folder is None else np.asarray(folder, dtype=object)
+        self.parts = np.asarray(parts, dtype=np.int64)
+        self.vertices = np.asarray(vertices, dtype=np.int64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        # Simplified parts of the last tolerance, see simplify()
+        self.simplified = (None, {})
+        # Bounds of parts & geometry of each part, computed once (tiles call simplify() for each)
+        self.bounds = None
+        self.owner = None
+        # sha256 of the table, see digest()
+        self.hashed = None
+
+    def __len__(self):
+        """Number of geometries."""
+        return len(self.kind)
+
+    def constant(self, value):
+        """Return an object array of value, one per geometry."""
+        column = np.empty(len(self.kind), dtype=object)
+        column[:] = value
+        return column
+
+    @classmethod
+    def fromGeometries(cls, rows, source=''):
+        """Build a ShapeTable from an iterable of (Name, Folder, Geometry) of the same source file."""
+        names, kinds, folders = [], array('B'), []
+        parts, vertices, lon, lat = array('q', [0]), array('q', [0]), array('d'), array('d')
+        for name, folder, geometry in rows:
+            kind = KINDS[geometry.kind]
+            for i, part in enumerate(geometry.parts):
+                if not len(part):
+                    continue
+                part = np.asarray(part, dtype=np.float64).reshape(len(part), -1)
+                x, y = part[:, 0], part[:, 1]
+                if kind == POLYGON and len(x) > 2:
+                    # Outer ring counterclockwise, holes clockwise
+                    if (ringArea(x, y) < 0) == (i == 0):
+                        x, y = x[::-1], y[::-1]
+                lon.frombytes(np.ascontiguousarray(x).tobytes())
+                lat.frombytes(np.ascontiguousarray(y).tobytes())
+                vertices.append(len(lon))
+            names.append(sys.intern(name))
+            kinds.append(kind)
+            folders.append(sys.intern(folder))
+            parts.append(len(vertices) - 1)
+        table = cls(np.array(names, dtype=object), np.frombuffer(kinds, dtype=np.uint8),
+                    folder=np.array(folders, dtype=object),
+                    parts=np.frombuffer(parts, dtype=np.int64),
+                    vertices=np.frombuffer(vertices, dtype=np.int64),
+                    lon=np.frombuffer(lon, dtype=np.float64), lat=np.frombuffer(lat, dtype=np.float64))
+        table.source = table.constant(sys.intern(source))
+        return table
+
+    @classmethod
+    def concat(cls, tables):
+        """Return one ShapeTable with the geometries of every table, in order."""
+        if len(tables) == 1:
+            return tables[0]
+        partOffsets = np.cumsum([0] + [len(table.vertices) - 1 for table in tables[:-1]])
+        vertexOffsets = np.cumsum([0] + [len(table.lon) for table in tables[:-1]])
+        return cls(*(np.concatenate([getattr(table, column) for table in tables])
+                     for column in ('name', 'kind', 'source', 'folder')),
+                   parts=np.concatenate([[0]] + [table.parts[1:] + offset
+                                                 for table, offset in zip(tables, partOffsets)]),
+                   vertices=np.concatenate([[0]] + [table.vertices[1:] + offset
+                                                    for table, offset in zip(tables, vertexOffsets)]),
+                   lon=np.concatenate([table.lon for table in tables]),
+                   lat=np.concatenate([table.lat for table in tables]))
+
+    def partBounds(self):
+        """Return (west, east, south, north) arrays, one value per part."""
+        if self.bounds is None:
+            starts = self.vertices[:-1]
+            if not len(starts):
+                return (np.empty(0),) * 4
+            # Parts are never empty, see fromGeometries()
+            self.bounds = (np.minimum.reduceat(self.lon, starts), np.maximum.reduceat(self.lon, starts),
+                           np.minimum.reduceat(self.lat, starts), np.maximum.reduceat(self.lat, starts))
+        return self.bounds
+
+    def digest(self):
+        """Return sha256 of kinds, parts & vertices (computed once), what is drawn of the table."""
+        if self.hashed is None:
+            hashed = hashlib.sha256()
+            for column in (self.kind, self.parts, self.vertices, self.lon, self.lat):
+                hashed.update(np.ascontiguousarray(column))
+            self.hashed = hashed.hexdigest()
+        return self.hashed
+
+    def simplify(self, view, tolerance):
+        """Return ({kind: [(n, 2) arrays of parts]}, {kind: [index of its geometry]}) -
+of the parts crossing view [west, east, south, north], simplified at tolerance (degrees).
+
+Vertices closer than tolerance to the previous one are dropped (snapped to a grid -
+of tolerance), then Douglas-Peucker removes those less than tolerance off the line.
+Parts are computed once per tolerance, maps of the same scale reuse them.
+        """
+        west, east, south, north = self.partBounds()
+        inside = np.flatnonzero((east >= view[0]) & (west <= view[1]) &
+                                (north >= view[2]) & (south <= view[3]))
+        # Geometry of each part
+        if self.owner is None:
+            self.owner = np.repeat(np.arange(len(self)), np.diff(self.parts))
+        owner = self.owner
+        if self.simplified[0] != tolerance:
+            self.simplified = (tolerance, {})
+        cache = self.simplified[1]
+
+        parts = {LINE: [], POLYGON: []}
+        geometries = {LINE: [], POLYGON: []}
+        for part in inside.tolist():
+            if part not in cache:
+                first, last = self.vertices[part], self.vertices[part + 1]
+                lon, lat = self.lon[first:last], self.lat[first:last]
+                if tolerance > 0:
+                    # Consecutive vertices in the same cell of the grid, first one kept
+                    cells = np.stack([np.floor(lon / tolerance), np.floor(lat / tolerance)])
+                    moved = np.ones(len(lon), dtype=bool)
+                    moved[1:] = (cells[:, 1:] != cells[:, :-1]).any(axis=0)
+                    moved[-1] = True
+                    lon, lat = lon[moved], lat[moved]
+                    kept = douglasPeucker(lon, lat, tolerance)
+                    lon, lat = lon[kept], lat[kept]
+                cache[part] = np.column_stack([lon, lat])
+            kind = int(self.kind[owner[part]])
+            # Polygons smaller than a pixel are invisible
+            if kind == POLYGON and len(cache[part]) < 3:
+                continue
+            parts[kind].append(cache[part])
+            geometries[kind].append(int(owner[part]))
+        return parts, geometries
+
+    def save(self, directory):
+        """Write each column as a .npy file in directory (str joined by NUL, not allowed in xml)."""
+        os.makedirs(directory, exist_ok=True)
+        for column in ('kind', 'parts', 'vertices', 'lon', 'lat'):
+            np.save(os.path.join(directory, f'{column}.npy'), getattr(self, column))
+        for column in ('name', 'source', 'folder'):
+            text = '\x00'.join(getattr(self, column)).encode('utf8')
+            np.save(os.path.join(directory, f'{column}.npy'), np.frombuffer(text, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, directory, mmapMode='r'):
+        """Read a table written by save(), vertices stay memory-mapped on disk."""
+        kind, parts, vertices, lon, lat = (np.load(os.path.join(directory, f'{column}.npy'), mmap_mode=mmapMode)
+                                           for column in ('kind', 'parts', 'vertices', 'lon', 'lat'))
+        strings = []
+        for column in ('name', 'source', 'folder'):
+            text = np.load(os.path.join(directory, f'{column}.npy')).tobytes().decode('utf8')
+            values = [sys.intern(value) for value in text.split('\x00')] if len(kind) else []
+            strings.append(np.array(values, dtype=object))
+        logging.debug(f'{len(kind)} lines & polygons, {len(lon)} vertices loaded from "{directory}"')
+        return cls(strings[0], kind, strings[1], strings[2], parts, vertices, lon, lat)
+
+
+if __name__ == '__main__':
+    print(ShapeTable.__doc__)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:31:46 2026
+
+@author: yan-s
+"""
+
+from VectorReader import VectorReader, Placemark, Geometry, NAME_FIELDS
+from PointTable import PointTable
+from ShapeTable import ShapeTable
+
+import os
+import sys
+import struct
+import logging
+import numpy as np
+
+
+# Shape types of the .shp file (ESRI Shapefile Technical Description, 1998)
+NULL = 0
+POINTS = (1, 11, 21)
+MULTIPOINTS = (8, 18, 28)
+POLYLINES = (3, 13, 23)
+POLYGONS = (5, 15, 25)
+# Types with a Z (altitude) array
+WITH_Z = (11, 13, 15, 18)
+
+
+def signedArea(ring):
+    """Return area of a ring (shoelace formula), negative if clockwise."""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+class ShapefileReader(VectorReader):
+    """Read ESRI Shapefiles (.shp geometries & .dbf attributes) record by record :
+
+0) __init__() : Initialise parent class VectorReader(), read headers of .shp & .dbf files.
+1) __iter__() : Yield a Placemark per record, reading .shp & .dbf side by side.
+2) shapes() : Yield the geometries of each record of the .shp file.
+3) records() : Yield the {dict} of attributes of each record of the .dbf file.
+4) tables() : Points of a Point shapefile with pointTable(), else read record by record.
+5) pointTable() : Points of a Point shapefile straight from memory-mapped files.
+6) nameColumn() : Return 'Name' of every record from the memory-mapped .dbf file.
+
+Note : Files are never read whole, a record is unpacked when reached, coordinates -
+go in numpy arrays & Point shapefiles are memory-mapped (no Python object per point but 'Name').
+Outer rings (clockwise) & holes (counterclockwise) of a polygon record give one Polygon per outer ring.
+Shapefiles must use wgs84 (EPSG:4326) coordinates, check the .prj file.
+    """
+
+    def __init__(self, source, header=None, nameField=''):
+        """Initialise parent class VectorReader(), read headers of .shp & .dbf files."""
+        VectorReader.__init__(self, source, header, nameField)
+        base = os.path.splitext(source)[0]
+        self.dbfPath = base + '.dbf'
+        self.header['nameField'] = nameField
+
+        # Header of .shp, file length in 16 bits words (big endian), shape type (little endian)
+        with open(source, 'rb') as file:
+            head = file.read(100)
+        code, length = struct.unpack('>i20xi', head[:28])
+        if code != 9994:
+            logging.error(f'"{source}" is not a shapefile !')
+            quit()
+        self.fileLength = 2 * length
+        self.shapeType, = struct.unpack('<i', head[32:36])
+
+        # Encoding of the .dbf given by the .cpg file, if any
+        self.encoding = 'utf8'
+        if os.path.exists(base + '.cpg'):
+            with open(base + '.cpg', 'r') as file:
+                self.encoding = file.read().strip() or 'utf8'
+
+        # Header of .dbf, fields are described in 32 bytes blocks ended by 0x0D
+        self.fields, self.recordCount = [], 0
+        if os.path.exists(self.dbfPath):
+            with open(self.dbfPath, 'rb') as file:
+                count, headerLength, recordLength = struct.unpack('<4xIHH', file.read(12))
+                descriptors = file.read(headerLength - 12)
+            self.recordCount, self.headerLength, self.recordLength = count, headerLength, recordLength
+            for i in range(20, len(descriptors) - 1, 32):
+                if descriptors[i] == 0x0D:
+                    break
+                name = descriptors[i:i + 11].split(b'\x00')[0].decode('ascii', 'replace')
+                kind = chr(descriptors[i + 11])
+                self.fields.append((name, kind, descriptors[i + 16], descriptors[i + 17]))
+        else:
+            logging.warning(f'No .dbf file beside "{source}", points named by record number !')
+        logging.debug(f'Shapefile "{source}", shape type {self.shapeType}, fields : '
+                      f'{[field[0] for field in self.fields]}')
+
+    def __iter__(self):
+        """Yield a Placemark per record, 'Name' from the .dbf attributes."""
+        records = self.records() if self.fields else None
+        for number, geometries in enumerate(self.shapes(), 1):
+            attributes = next(records, {}) if records else {}
+            yield Placemark(self.nameOf(attributes, number), '', geometries)
+
+    def shapes(self):
+        """Yield the [list] of Geometry of each record (empty for a null shape)."""
+        with open(self.source, 'rb') as file:
+            file.seek(100)
+            while file.tell() < self.fileLength:
+                header = file.read(8)
+                if len(header) < 8:
+                    break
+                _, length = struct.unpack('>ii', header)
+                content = file.read(2 * length)
+                shapeType, = struct.unpack('<i', content[:4])
+
+                if shapeType == NULL:
+                    yield []
+                elif shapeType in POINTS:
+                    x, y = struct.unpack('<2d', content[4:20])
+                    z = struct.unpack('<d', content[20:28])[0] if shapeType == 11 else 0.0
+                    yield [Geometry('Point', [[(x, y, z)]])]
+                elif shapeType in MULTIPOINTS:
+                    count, = struct.unpack('<i', content[36:40])
+                    points = self.coordinates(content, 40, count, shapeType)
+                    yield [Geometry('Point', [[tuple(point)]]) for point in points.tolist()]
+                elif shapeType in POLYLINES + POLYGONS:
+                    partCount, count = struct.unpack('<2i', content[36:44])
+                    starts = np.frombuffer(content, dtype='<i4', count=partCount, offset=44)
+                    points = self.coordinates(content, 44 + 4 * partCount, count, shapeType)
+                    parts = np.split(points, starts[1:])
+                    if shapeType in POLYLINES:
+                        yield [Geometry('LineString', [part]) for part in parts]
+                    else:
+                        yield self.polygons(parts)
+                else:
+                    logging.warning(f'Shape type {shapeType} not handled, record skipped !')
+                    yield []
+
+    @staticmethod
+    def coordinates(content, offset, count, shapeType):
+        """Return (count, 3) array of lon, lat & alt (0 if no Z) of a record from offset."""
+        points = np.zeros((count, 3))
+        points[:, :2] = np.frombuffer(content, dtype='<f8', count=2 * count,
+                                      offset=offset).reshape(count, 2)
+        if shapeType in WITH_Z:
+            # Z range (2 doubles) then Z array
+            points[:, 2] = np.frombuffer(content, dtype='<f8', count=count,
+                                         offset=offset + 16 * count + 16)
+        return points
+
+    @staticmethod
+    def polygons(rings):
+        """Return a Polygon Geometry per outer ring (clockwise), with its following holes."""
+        geometries = []
+        for ring in rings:
+            if signedArea(ring) <= 0 or not geometries:
+                geometries.append(Geometry('Polygon', [ring]))
+            else:
+                geometries[-1].parts.append(ring)
+        return geometries
+
+    def records(self):
+        """Yield {field: value} of each record of the .dbf file (deleted ones included)."""
+        with open(self.dbfPath, 'rb') as file:
+            file.seek(self.headerLength)
+            for _ in range(self.recordCount):
+                record = file.read(self.recordLength)
+                if len(record) < self.recordLength:
+                    break
+                attributes, start = {}, 1
+                for name, kind, size, decimals in self.fields:
+                    attributes[name] = self.value(record[start:start + size], kind, decimals)
+                    start += size
+                yield attributes
+
+    def value(self, raw, kind, decimals):
+        """Return the Python value of a .dbf field (str, float, int or None)."""
+        text = raw.decode(self.encoding, 'replace').strip()
+        if kind in 'NF':
+            if not text or text.startswith('*'):
+                return None
+            return float(text) if decimals or kind == 'F' or '.' in text else int(text)
+        return text
+
+    def tables(self, source=''):
+        """Return (PointTable, ShapeTable), a Point shapefile has no lines nor polygons."""
+        if self.shapeType in POINTS:
+            return self.pointTable(source), ShapeTable()
+        return VectorReader.tables(self, source)
+
+    def pointTable(self, source=''):
+        """Return the PointTable of a Point shapefile without building a Placemark per point."""
+        recordSize = {1: 28, 11: 44, 21: 36}.get(self.shapeType)
+        if recordSize is None or (self.fileLength - 100) % recordSize:
+            # Other shapes or null records, read record by record
+            return VectorReader.pointTable(self, source)
+        # Fixed size records : header (big endian), shape type, x, y (& z, m)
+        dtype = np.dtype([('header', '>i4', 2), ('type', '<i4'), ('x', '<f8'), ('y', '<f8'),
+                          ('rest', np.uint8, recordSize - 28)])
+        count = (self.fileLength - 100) // recordSize
+        records = np.memmap(self.source, dtype=dtype, mode='r', offset=100, shape=(count,))
+        if not (records['type'] == self.shapeType).all():
+            return VectorReader.pointTable(self, source)
+        alt = np.zeros(count)
+        if self.shapeType == 11:
+            alt = records['rest'][:, :8].copy().view('<f8').ravel()
+
+        table = PointTable(self.nameColumn(count), np.array(records['x']),
+                           np.array(records['y']), alt)
+        table.source = table.constant(sys.intern(source))
+        return table
+
+    def nameColumn(self, count):
+        """Return 'Name' of count records (object array of str), from the memory-mapped .dbf file."""
+        if self.nameField:
+            field = next((field for field in self.fields if field[0] == self.nameField), None)
+            if field is None:
+                logging.warning(f'No field "{self.nameField}" in "{self.dbfPath}" !')
+        else:
+            field = next((field for field in self.fields if field[0].lower() in NAME_FIELDS), None)
+        if field is None or self.recordCount < count:
+            return np.array([str(number) for number in range(1, count + 1)], dtype=object)
+        # One column of the fixed size records
+        start = 1 + sum(size for _, _, size, _ in self.fields[:self.fields.index(field)])
+        records = np.memmap(self.dbfPath, dtype=np.uint8, mode='r', offset=self.headerLength,
+                            shape=(count, self.recordLength))
+        raw = records[:, start:start + field[2]].copy().view(f'S{field[2]}').ravel()
+        return np.array([sys.intern(value.decode(self.encoding, 'replace').strip())
+                         for value in raw.tolist()], dtype=object)
+
+
+if __name__ == '__main__':
+    print(ShapefileReader.__doc__)
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:37:52 2026
+
+@author: yan-s
+"""
+
+from main import VariableGlobal
+from PlotDATA import PlotDATA
+from ShapeTable import LINE, POLYGON
+from RasterCache import RasterCache
+from BasemapPyramid import BasemapPyramid
+from LabelCollection import LabelCollection
+from TileStore import TileStore
+from Profiler import Profiler
+
+import json
+import hashlib
+import logging
+import numpy as np
+from io import BytesIO
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Web-Mercator doesn't go further North or South
+MAX_LATITUDE = 85.0511287798
+# Categories of listy(), in the order they are drawn
+CATEGORIES = ('upper', 'upward', 'normal', 'downward')
+
+
+def lonToX(lon, zoom, size=256):
+    """Return x (pixels from the antimeridian) of longitudes at zoom."""
+    return (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * (size << zoom)
+
+
+def latToY(lat, zoom, size=256):
+    """Return y (pixels from the North) of latitudes at zoom, Web-Mercator."""
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    return (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * (size << zoom)
+
+
+def xToLon(x, zoom, size=256):
+    """Return longitudes of x pixels at zoom."""
+    return np.asarray(x, dtype=np.float64) / (size << zoom) * 360.0 - 180.0
+
+
+def yToLat(y, zoom, size=256):
+    """Return latitudes of y pixels at zoom, Web-Mercator."""
+    return np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * np.asarray(y, dtype=np.float64) / (size << zoom)))))
+
+
+def tileRange(BBox, zoom, size=256):
+    """Return first & last columns, first & last rows of the tiles covering BBox at zoom."""
+    last = (1 << zoom) - 1
+    x0 = int(min(lonToX(BBox[0], zoom, size) // size, last))
+    x1 = int(min(max(np.ceil(lonToX(BBox[2], zoom, size) / size) - 1, x0), last))
+    y0 = int(min(latToY(BBox[3], zoom, size) // size, last))
+    y1 = int(min(max(np.ceil(latToY(BBox[1], zoom, size) / size) - 1, y0), last))
+    return x0, x1, y0, y1
+
+
+def expandRanges(left, right, top, bottom):
+    """Return (item, x, y) of every tile of the ranges [left, right] x [top, bottom] of each item."""
+    columns = np.maximum(right - left + 1, 0)
+    rows = np.maximum(bottom - top + 1, 0)
+    counts = columns * rows
+    item = np.repeat(np.arange(len(counts)), counts)
+    # Rank of each tile among the tiles of its item
+    offset = np.arange(len(item)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return item, left[item] + offset // rows[item], top[item] + offset % rows[item]
+
+
+# Points, lines & polygons shared by every tile of a rendering process, set by initTiler()
+sharedPoints = None
+# TileRenderer of a rendering process, its figure is reused from one tile to the next
+tiler = None
+
+
+def initTiler(points, shapes, title, options):
+    """Initialise a rendering process : points, lines & polygons & command line options."""
+    global sharedPoints
+    sharedPoints = (points, shapes, title)
+    VariableGlobal.options.update(options)
+
+
+def renderTiles(tiles):
+    """Render [(z, x, y), ...] (in a rendering process), return [(z, x, y, png bytes), ...]."""
+    global tiler
+    if tiler is None:
+        # TileRenderer without __init__ : points come from the parent process, not the .kml file
+        tiler = TileRenderer.__new__(TileRenderer)
+        VariableGlobal.__init__(tiler)
+        tiler.points, tiler.shapes, tiler.title = sharedPoints
+        tiler.csvPath = tiler.csvSrc
+        tiler.prepare()
+    return [(z, x, y, tiler.drawTile(z, x, y)) for z, x, y in tiles]
+
+
+class TileRenderer(PlotDATA):
+    """Render basemap, lines, polygons & points as Web-Mercator z/x/y .png tiles in an MBTiles file :
+
+0) __init__() : Initialise parent class PlotDATA() (points, lines & polygons of the .kml files).
+1) prepare() : Load basemap & its overviews, points & their categories, create the figure of a tile.
+2) tileKeys() : Return {(z, x, y): key} of every tile covering BBox, key is a digest of what it shows.
+3) sample() : Return the RGBA basemap under a tile, read from the overview of its zoom.
+4) drawTile() : Render one tile as .png bytes, reusing the figure.
+5) plotTile() : Draw points of a tile & their names.
+6) render() : Render tiles whose key changed in tileWorkers processes & write them in tileStore.
+7) exeSeq() : Act as an execution thread.
+
+Note : The basemap (wgs84) is resampled row by row to Web-Mercator, nearest pixel -
+of the overview (BasemapPyramid) closest to the zoom, so a tile reads a few rows only.
+Points up to labelMargin pixels on the left of a tile (markerMargin on the other sides) -
+are drawn too, so names crossing the edge of a tile aren't cut. Label offsets are in pixels (labelOffsets), -
+corrections of listyUp/listyDown (degrees) only fit one scale.
+Tiles with basemap only are written without matplotlib. See TileServer.py to browse them.
+    """
+
+    # Points this far on the left of a tile (pixels) are drawn, their names may cross the edge, -
+    # markerMargin on the other sides (markers & names above or below their point)
+    labelMargin = 128
+    markerMargin = 24
+    # Position of names from their point (pixels, y to the South) for each category
+    labelOffsets = {'upper': (4, -4), 'upward': (4, -8), 'normal': (4, -4), 'downward': (4, 14)}
+    # Tiles sent to a rendering process at once
+    tileChunk = 32
+
+    def __init__(self):
+        """Initialise parent class PlotDATA()."""
+        PlotDATA.__init__(self)
+        logging.warning('Start of tiles rendering !')
+
+    def prepare(self):
+        """Load basemap, overviews & points, sort them in categories & create the figure of a tile."""
+        self.basemap()
+        self.extent = [self.BBox[0], self.BBox[2], self.BBox[1], self.BBox[3]]
+        # Overviews computed once, before rendering processes read them
+        self.pyramid = BasemapPyramid(self.rasterPath, self.loadMap)
+        self.pyramid.build()
+        if getattr(self, 'points', None) is None:
+            # .csv file, read by load()
+            self.load()
+        else:
+            self.df = self.points.toDataFrame()
+        self.listy()
+        self.names = self.df['Name'].to_numpy()
+        self.lon = self.df['Longitude'].to_numpy(dtype=float)
+        self.lat = self.df['Latitude'].to_numpy(dtype=float)
+        self.category = np.zeros(len(self.df), dtype=np.int8)
+        for code, name in enumerate(CATEGORIES):
+            self.category[self.categories[name]] = code
+        self.styles = {'upper': (self.upperColor, '^'), 'upward': (self.upwardColor, '^'),
+                       'normal': (self.normalColor, '^'), 'downward': (self.downwardColor, 'v')}
+
+        # One figure of tileSize pixels, axes in pixels of the tile (y to the South)
+        self.fig = Figure(figsize=(self.tileSize / 100, self.tileSize / 100), dpi=100)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_axes([0, 0, 1, 1])
+        self.ax.set_axis_off()
+        self.ax.set_xlim(0, self.tileSize)
+        self.ax.set_ylim(self.tileSize, 0)
+        self.layers = []
+
+    def tileKeys(self):
+        """Return {(z, x, y): key} of every tile of tileZooms covering BBox.
+
+A key is a digest of the raster, the settings of drawing & every point (name & -
+coordinates) or part of line & polygon (vertices) drawn on the tile, -
+so a tile is rendered again only if one of them changed.
+        """
+        size = self.tileSize
+        settings = [RasterCache(f'{self.workingDirectory}/{self.rasterDirectory}').key(self),
+                    size, self.tileLabelZoom, self.labelMargin, self.markerMargin, self.labelOffsets, self.styles,
+                    self.arrowColor, sorted(self.listyUp), sorted(self.listyDown),
+                    self.lineColor, self.lineWidth, self.polygonEdgeColor, self.polygonFaceColor,
+                    self.polygonLineWidth, self.shapeTolerance]
+        base = hashlib.sha256(json.dumps(settings, default=str).encode('utf8')).hexdigest()
+
+        def digest(data):
+            return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+        # One 64 bits digest per point & per part of lines & polygons
+        pointDigests = np.array([digest(f'{name}\x00{lon!r}\x00{lat!r}'.encode('utf8')) for name, lon, lat
+                                 in zip(self.names, self.lon.tolist(), self.lat.tolist())], dtype=np.uint64)
+        starts, ends = self.shapes.vertices[:-1], self.shapes.vertices[1:]
+        owner = np.repeat(np.arange(len(self.shapes)), np.diff(self.shapes.parts))
+        partDigests = np.array([digest(bytes([self.shapes.kind[geometry]]) + self.shapes.lon[start:end].tobytes() +
+                                       self.shapes.lat[start:end].tobytes())
+                                for geometry, start, end in zip(owner, starts, ends)], dtype=np.uint64)
+        west, east, south, north = self.shapes.partBounds()
+
+        keys = {}
+        for z in range(self.tileZooms[0], self.tileZooms[1] + 1):
+            x0, x1, y0, y1 = tileRange(self.BBox, z, size)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    keys[z, x, y] = base
+            # Tiles drawing each point (see drawTile()) & each part (1 pixel for line width)
+            pointX, pointY = lonToX(self.lon, z, size), latToY(self.lat, z, size)
+            ranges = [np.concatenate(values) for values in zip(
+                ((pointX - self.markerMargin) // size, (pointX + self.labelMargin) // size,
+                 (pointY - self.markerMargin) // size, (pointY + self.markerMargin) // size),
+                ((lonToX(west, z, size) - 1) // size, (lonToX(east, z, size) + 1) // size,
+                 (latToY(north, z, size) - 1) // size, (latToY(south, z, size) + 1) // size))]
+            left, right = np.clip(ranges[0], x0, None), np.clip(ranges[1], None, x1)
+            top, bottom = np.clip(ranges[2], y0, None), np.clip(ranges[3], None, y1)
+            item, tileX, tileY = expandRanges(*(values.astype(np.int64) for values in (left, right, top, bottom)))
+            values = np.concatenate([pointDigests, partDigests])[item]
+            # Digests grouped by tile, sorted so the order of the file doesn't matter
+            tile = (tileX - x0) * (y1 - y0 + 1) + (tileY - y0)
+            order = np.lexsort((values, tile))
+            tile, values = tile[order], values[order]
+            bounds = np.flatnonzero(np.diff(tile)) + 1
+            for first, last in zip(np.r_[0, bounds], np.r_[bounds, len(tile)]):
+                if first < last:
+                    column, row = divmod(int(tile[first]), y1 - y0 + 1)
+                    keys[z, x0 + column, y0 + row] = hashlib.blake2b(base.encode('ascii') + values[first:last].tobytes(),
+                                                              digest_size=16).hexdigest()
+        return keys
+
+    def sample(self, z, left, top):
+        """Return the (tileSize, tileSize, 4) RGBA basemap of the tile at pixels left, top of zoom z."""
+        size = self.tileSize
+        height, width = self.loadMap.shape[:2]
+        # Size of a pixel of the raster & of the tile (at the equator), in degrees
+        xPixel = (self.extent[1] - self.extent[0]) / width
+        yPixel = (self.extent[3] - self.extent[2]) / height
+        degrees = 360.0 / (size << z)
+        # Overview with pixels at most as large as the ones of the tile
+        factor = max([factor for factor in self.pyramid.factors() if factor <= max(degrees / xPixel, 1)])
+        level = self.pyramid.level(factor)
+
+        # Column & row of the overview under the center of each pixel of the tile
+        pixels = np.arange(size) + 0.5
+        columns = np.floor((xToLon(left + pixels, z, size) - self.extent[0]) / (xPixel * factor)).astype(np.int64)
+        rows = np.floor((self.extent[3] - yToLat(top + pixels, z, size)) / (yPixel * factor)).astype(np.int64)
+        inColumns = np.flatnonzero((columns >= 0) & (columns < level.shape[1]))
+        inRows = np.flatnonzero((rows >= 0) & (rows < level.shape[0]))
+
+        # Transparent outside the raster
+        image = np.zeros((size, size, 4), dtype=np.uint8)
+        if len(inColumns) and len(inRows):
+            columns, rows = columns[inColumns], rows[inRows]
+            # Only the window of the overview under the tile is read
+            window = level[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+            block = image[inRows[0]:inRows[-1] + 1, inColumns[0]:inColumns[-1] + 1]
+            block[..., :3] = window[np.ix_(rows - rows[0], columns - columns[0])][..., :3]
+            block[..., 3] = 255
+        return image
+
+    def drawTile(self, z, x, y):
+        """Return .png bytes of tile z/x/y."""
+        size = self.tileSize
+        left, top = x * size, y * size
+        image = self.sample(z, left, top)
+
+        # Points of the tile & of its margins
+        labelMargin, markerMargin = self.labelMargin, self.markerMargin
+        rows = self.points.spatialIndex().bbox(xToLon(left - labelMargin, z, size),
+                                               yToLat(top + size + markerMargin, z, size),
+                                               xToLon(left + size + markerMargin, z, size),
+                                               yToLat(top - markerMargin, z, size))
+        # Lines & polygons crossing the tile, simplified to shapeTolerance pixels -
+        # (same tolerance for every tile of a zoom, simplified parts are reused)
+        parts, geometries = {LINE: [], POLYGON: []}, {LINE: [], POLYGON: []}
+        if len(self.shapes):
+            view = [float(xToLon(left, z, size)), float(xToLon(left + size, z, size)),
+                    float(yToLat(top + size, z, size)), float(yToLat(top, z, size))]
+            latitude = np.radians((self.BBox[1] + self.BBox[3]) / 2)
+            parts, geometries = self.shapes.simplify(view, self.shapeTolerance * 360.0 / (size << z) * np.cos(latitude))
+
+        buffer = BytesIO()
+        if not len(rows) and not parts[LINE] and not parts[POLYGON]:
+            # Basemap only, no figure needed
+            imsave(buffer, image, format='png')
+            return buffer.getvalue()
+
+        self.layers.append(self.ax.imshow(image, extent=(0, size, size, 0), interpolation='nearest',
+                                          aspect='auto', zorder=0))
+        # Vertices in pixels of the tile
+        pixels = {kind: [np.column_stack([lonToX(part[:, 0], z, size) - left, latToY(part[:, 1], z, size) - top])
+                         for part in parts[kind]] for kind in parts}
+        for collection in self.shapeCollections(pixels, geometries):
+            self.layers.append(self.ax.add_collection(collection, autolim=False))
+        if len(rows):
+            self.plotTile(rows, z, left, top)
+        self.fig.savefig(buffer, format='png', transparent=True)
+        for layer in self.layers:
+            layer.remove()
+        self.layers = []
+        return buffer.getvalue()
+
+    def plotTile(self, rows, z, left, top):
+        """Draw points of rows in pixels of the tile at left, top & their names from tileLabelZoom."""
+        x = lonToX(self.lon[rows], z, self.tileSize) - left
+        y = latToY(self.lat[rows], z, self.tileSize) - top
+        category = self.category[rows]
+        for code, name in enumerate(CATEGORIES):
+            inCategory = category == code
+            if not inCategory.any():
+                continue
+            color, marker = self.styles[name]
+            if z >= self.tileLabelZoom:
+                dx, dy = self.labelOffsets[name]
+                self.layers.append(self.ax.add_artist(LabelCollection(
+                    self.names[rows][inCategory], x[inCategory] + dx, y[inCategory] + dy,
+                    color=color, outside=True)))
+            self.layers.append(self.ax.scatter(x[inCategory], y[inCategory], zorder=1, alpha=0.8,
+                                               color=self.arrowColor, s=10, marker=marker))
+
+    def render(self):
+        """Render tiles whose key changed, in tileWorkers processes, & write them in tileStore."""
+        store = TileStore(f'{self.workingDirectory}/{self.tileStore}')
+        # Title of the .kml files, none with a .csv file
+        title = getattr(self, 'title', None)
+        stored = store.keys()
+        keys = self.tileKeys()
+        # BBox or tileZooms changed
+        removed = [tile for tile in stored if tile not in keys]
+        store.delete(removed)
+        changed = sorted(tile for tile, key in keys.items() if stored.get(tile) != key)
+        logging.info(f'{len(keys)} tiles, {len(changed)} to render, {len(keys) - len(changed)} unchanged, '
+                     f'{len(removed)} removed.')
+        # Chunks of the same zoom follow each other, simplified lines are reused
+        chunks = [changed[i:i + self.tileChunk] for i in range(0, len(changed), self.tileChunk)]
+
+        written = 0
+        if self.tileWorkers == 1 or len(chunks) < 2:
+            results = ([(z, x, y, self.drawTile(z, x, y)) for z, x, y in chunk] for chunk in chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.tileWorkers, initializer=initTiler,
+                                           initargs=(self.points, self.shapes, title,
+                                                     dict(VariableGlobal.options)))
+            results = executor.map(renderTiles, chunks)
+        try:
+            for tiles in results:
+                # Written as they come, an interrupted run keeps what was rendered
+                store.put([(z, x, y, data, keys[z, x, y]) for z, x, y, data in tiles])
+                written += sum(len(data) for _, _, _, data in tiles)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        west, south, east, north = self.BBox
+        store.setMetadata({'name': title or self.figTitle, 'format': 'png', 'type': 'baselayer',
+                           'description': self.xLabel, 'bounds': f'{west},{south},{east},{north}',
+                           'center': f'{(west + east) / 2},{(south + north) / 2},{self.tileZooms[0]}',
+                           'minzoom': self.tileZooms[0], 'maxzoom': self.tileZooms[1],
+                           'attribution': 'Contains modified Copernicus Sentinel data'})
+        store.close()
+        logging.info(f'{len(changed)} tiles ({written / 1e6:.1f} MB) written in "{self.workingDirectory}/{self.tileStore}".')
+        Profiler.of(self).count(tiles=len(keys), rendered=len(changed), unchanged=len(keys) - len(changed),
+                                removed=len(removed), bytes=written)
+
+    def exeSeq(self):
+        """Trigger the execution sequence, each stage timed by Profiler."""
+        profiler = Profiler.of(self)
+        try:
+            profiler.stage(self.prepare)
+            profiler.stage(self.render)
+        finally:
+            profiler.save()
+        logging.warning('End of tiles rendering !')
+
+
+if __name__ == '__main__':
+    print(TileRenderer.__doc__)
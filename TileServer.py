@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:24:18 2026
+
+@author: yan-s
+"""
+
+from main import VariableGlobal
+from TileStore import TileStore
+
+import os
+import re
+import json
+import logging
+import threading
+from time import monotonic
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# http://localhost:8000/{z}/{x}/{y}.png
+TILE_PATH = re.compile(r'^/(\d+)/(\d+)/(\d+)\.png$')
+
+# Map of the tiles (Leaflet), bounds & zooms are read from /metadata.json
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+fetch('/metadata.json').then(response => response.json()).then(tiles => {{
+  const map = L.map('map');
+  const [west, south, east, north] = tiles.bounds;
+  L.tileLayer('/{{z}}/{{x}}/{{y}}.png', {{minZoom: tiles.minzoom, maxZoom: tiles.maxzoom,
+                                       attribution: tiles.attribution}}).addTo(map);
+  map.fitBounds([[south, west], [north, east]]);
+}});
+</script>
+</body>
+</html>
+"""
+
+
+class TileServer(VariableGlobal):
+    """Serve tiles of the MBTiles file written by TileRenderer over HTTP :
+
+0) __init__() : Initialise parent class VariableGlobal(), the LRU cache of tiles & the connection to tileStore.
+1) metadata() : Return the metadata of tileStore.
+2) tile() : Return .png bytes of a tile, from the LRU cache or tileStore.
+3) tileJSON() : Return TileJSON of the tiles (bounds, zooms, url...).
+4) handler() : Return the class answering requests (tiles, /metadata.json & a map on /).
+5) exeSeq() : Serve on tilePort until Ctrl+C.
+
+Note : The last tileCacheSize tiles asked are kept in memory. Tiles rendered again -
+while serving (python main.py tiles) are seen within checkInterval seconds, -
+the cache is then emptied. Tiles not rendered (404) aren't kept.
+tileStore is read by one long-lived read only connection, shared by every thread -
+under the lock (PRAGMA data_version only changes within a connection).
+    """
+
+    # Seconds between two checks of tileStore for new tiles
+    checkInterval = 1.0
+
+    def __init__(self):
+        """Initialise parent class VariableGlobal() & the LRU cache."""
+        VariableGlobal.__init__(self)
+        self.storePath = f'{self.workingDirectory}/{self.tileStore}'
+        if not os.path.exists(self.storePath):
+            logging.error(f'"{self.storePath}" doesn\'t exist, render tiles first (python main.py tiles) !')
+            quit()
+        # {(z, x, y): png bytes}, least recently used first
+        self.cache = OrderedDict()
+        # Of the cache & the connection (every request has its own thread)
+        self.lock = threading.Lock()
+        self.reader = TileStore(self.storePath, readOnly=True)
+        self.version, self.checked = self.reader.version(), monotonic()
+        self.hits = self.misses = 0
+
+    def metadata(self):
+        """Return {name: value} of the metadata of tileStore."""
+        with self.lock:
+            return self.reader.metadata()
+
+    def tile(self, z, x, y):
+        """Return .png bytes of tile z/x/y, None if not rendered."""
+        with self.lock:
+            # Tiles written since the last check (another connection committed)
+            if monotonic() - self.checked > self.checkInterval:
+                version = self.reader.version()
+                if version != self.version:
+                    self.cache.clear()
+                    self.version = version
+                self.checked = monotonic()
+            if (z, x, y) in self.cache:
+                self.hits += 1
+                self.cache.move_to_end((z, x, y))
+                return self.cache[z, x, y]
+            # Read under the lock : never cached after a newer version emptied the cache
+            data = self.reader.get(z, x, y)
+            self.misses += 1
+            # Tiles not rendered yet may be by the next run of python main.py tiles
+            if data is not None:
+                self.cache[z, x, y] = data
+                if len(self.cache) > self.tileCacheSize:
+                    self.cache.popitem(last=False)
+        return data
+
+    def tileJSON(self, host):
+        """Return {dict} TileJSON of tileStore, tiles on host."""
+        metadata = self.metadata()
+        return {'tilejson': '2.2.0', 'name': metadata.get('name', ''),
+                'description': metadata.get('description', ''),
+                'attribution': metadata.get('attribution', ''),
+                'tiles': [f'http://{host}/{{z}}/{{x}}/{{y}}.png'],
+                'minzoom': int(metadata.get('minzoom', 0)), 'maxzoom': int(metadata.get('maxzoom', 22)),
+                'bounds': [float(value) for value in metadata.get('bounds', '-180,-85,180,85').split(',')]}
+
+    def handler(self):
+        """Return the BaseHTTPRequestHandler class of this server."""
+        server = self
+
+        class TileHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                match = TILE_PATH.match(self.path.split('?')[0])
+                if match:
+                    data = server.tile(*map(int, match.groups()))
+                    if data is None:
+                        self.send_error(404, 'Tile not rendered')
+                        return
+                    self.answer(data, 'image/png')
+                elif self.path == '/metadata.json':
+                    tileJSON = server.tileJSON(self.headers.get('Host', f'localhost:{server.tilePort}'))
+                    self.answer(json.dumps(tileJSON).encode('utf8'), 'application/json')
+                elif self.path in ('/', '/index.html'):
+                    page = PAGE.format(title=server.metadata().get('name', 'Tiles'))
+                    self.answer(page.encode('utf8'), 'text/html; charset=utf-8')
+                else:
+                    self.send_error(404)
+
+            def answer(self, data, contentType):
+                self.send_response(200)
+                self.send_header('Content-Type', contentType)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Every request would flood the console
+                logging.debug(f'{self.address_string()} - {format % args}')
+
+        return TileHandler
+
+    def exeSeq(self):
+        """Serve tiles on tilePort until Ctrl+C."""
+        httpd = ThreadingHTTPServer(('', self.tilePort), self.handler())
+        logging.warning(f'Serving "{self.storePath}" on http://localhost:{self.tilePort}/ (Ctrl+C to stop) !')
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.reader.close()
+            logging.warning(f'End of serving : {self.hits} tiles from memory, {self.misses} from "{self.tileStore}" !')
+
+
+if __name__ == '__main__':
+    print(TileServer.__doc__)
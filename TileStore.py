@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:36 2026
+
+@author: yan-s
+"""
+
+import sqlite3
+import logging
+from urllib.parse import quote
+
+
+class TileStore:
+    """MBTiles (SQLite) file of .png tiles, written by TileRenderer & read by TileServer :
+
+0) __init__() : Open (or create) the .mbtiles file & its tables, or open it read only.
+1) setMetadata() : Write name, bounds, zooms... in the metadata table.
+2) metadata() : Return the metadata table as a {dict}.
+3) keys() : Return {(z, x, y): key} of every tile stored.
+4) put() : Write rendered tiles & their keys, in one transaction.
+5) delete() : Remove tiles no longer covered (BBox or zooms changed).
+6) get() : Return the .png bytes of a z/x/y tile, None if missing.
+7) version() : Return a number changing whenever another connection wrote.
+8) close() : Close the connection.
+
+Note : Tiles are z/x/y (XYZ, row 0 at the North) everywhere but in the file, -
+where rows are TMS (tile_row = 2^z - 1 - y) as MBTiles says.
+The 'keys' table (not part of MBTiles, ignored by other readers) holds a digest -
+of what each tile shows, so only tiles whose content changed are rendered again.
+Journal is WAL, the server reads while tiles are written.
+    """
+
+    def __init__(self, path, readOnly=False):
+        """Open path, create tables if new (readOnly : tables left as they are)."""
+        self.path = path
+        if readOnly:
+            # Server : nothing written, the connection may be shared by threads (under a lock)
+            self.connection = sqlite3.connect(f'file:{quote(path)}?mode=ro', uri=True, timeout=30,
+                                              check_same_thread=False)
+            return
+        # Tiles are written by the main process only, the server reads through one read only store
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT);
+            CREATE UNIQUE INDEX IF NOT EXISTS name ON metadata (name);
+            CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER,
+                                              tile_row INTEGER, tile_data BLOB);
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+            CREATE TABLE IF NOT EXISTS keys (zoom_level INTEGER, tile_column INTEGER,
+                                             tile_row INTEGER, key TEXT,
+                                             PRIMARY KEY (zoom_level, tile_column, tile_row));
+        """)
+
+    def setMetadata(self, metadata):
+        """Write every (name, value) of {dict} metadata."""
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                                        [(name, str(value)) for name, value in metadata.items()])
+
+    def metadata(self):
+        """Return {name: value} of the metadata table."""
+        return dict(self.connection.execute('SELECT name, value FROM metadata'))
+
+    def keys(self):
+        """Return {(z, x, y): key} of every tile stored."""
+        return {(z, x, (1 << z) - 1 - row): key for z, x, row, key
+                in self.connection.execute('SELECT zoom_level, tile_column, tile_row, key FROM keys')}
+
+    def put(self, tiles):
+        """Write [(z, x, y, png bytes, key), ...] in one transaction."""
+        rows = [(z, x, (1 << z) - 1 - y, data, key) for z, x, y, data, key in tiles]
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                                        [row[:4] for row in rows])
+            self.connection.executemany('INSERT OR REPLACE INTO keys VALUES (?, ?, ?, ?)',
+                                        [row[:3] + row[4:] for row in rows])
+
+    def delete(self, tiles):
+        """Remove [(z, x, y), ...] & their keys."""
+        rows = [(z, x, (1 << z) - 1 - y) for z, x, y in tiles]
+        with self.connection:
+            for table in ('tiles', 'keys'):
+                self.connection.executemany(f'DELETE FROM {table} WHERE zoom_level = ? AND '
+                                            f'tile_column = ? AND tile_row = ?', rows)
+        if rows:
+            logging.debug(f'{len(rows)} tiles removed from "{self.path}"')
+
+    def get(self, z, x, y):
+        """Return .png bytes of tile z/x/y (XYZ), None if not rendered."""
+        row = self.connection.execute('SELECT tile_data FROM tiles WHERE zoom_level = ? AND '
+                                      'tile_column = ? AND tile_row = ?',
+                                      (z, x, (1 << z) - 1 - y)).fetchone()
+        return row[0] if row else None
+
+    def version(self):
+        """Return PRAGMA data_version, changed by every commit of another connection -
+(compare values of the same connection only, a new one always starts at the same value).
+        """
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        """Close the connection."""
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    print(TileStore.__doc__)
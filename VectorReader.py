@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:05:37 2026
+
+@author: yan-s
+"""
+
+from PointTable import PointTable
+from ShapeTable import ShapeTable
+
+import logging
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from os.path import exists
+
+
+# One feature of a vector file, 'folder' is the path of nested <Folder> names (.kml)
+Placemark = namedtuple('Placemark', ['name', 'folder', 'geometries'])
+# One geometry of a Placemark, 'kind' is 'Point', 'LineString' or 'Polygon' -
+# and 'parts' a list of coordinates, [(lon, lat, alt), ...] or (n, 3) arrays -
+# (1 part for Point & LineString, outer ring then holes for Polygon)
+Geometry = namedtuple('Geometry', ['kind', 'parts'])
+
+# Attributes guessed as 'Name' when nameField is not set (lower case)
+NAME_FIELDS = ('name', 'nom', 'label', 'title', 'titre')
+
+
+class VectorReader(ABC):
+    """Common interface of the readers of vector files (.kml, .shp, .geojson) :
+
+0) __init__() : Set source (path or file object), header {dict} & nameField.
+1) __iter__() : Yield every Placemark of the source, one at a time (done by each reader).
+2) pointRows() : Yield a [Name, Longitude, Latitude, Altitude, Folder] row for every Point.
+3) pointTable() : Return the PointTable of every Point.
+4) tables() : Return the PointTable of every Point & the ShapeTable of every line & polygon, in one pass.
+5) nameOf() : Return 'Name' of a feature from its attributes.
+
+Note : A reader streams its file, a Placemark is released once yielded, -
+so memory doesn't depend on the size of the file.
+Readers of each extension are listed in KmlCSV.READERS, a reader without __iter__() -
+can't be instantiated.
+    """
+
+    def __init__(self, source, header=None, nameField=''):
+        """Set source, header (filled with 'title'... if given) & attribute used as 'Name'."""
+        # Just a safeguard
+        if isinstance(source, str) and not exists(source):
+            logging.error(f'This file doesn\'t exist : "{source}" !')
+            quit()
+        self.source = source
+        self.header = header if header is not None else {}
+        self.nameField = nameField
+
+    @abstractmethod
+    def __iter__(self):
+        """Yield every Placemark of the source."""
+
+    def pointRows(self):
+        """Yield a [Name, Longitude, Latitude, Altitude, Folder] row for every Point."""
+        for placemark in self:
+            for geometry in placemark.geometries:
+                if geometry.kind == 'Point':
+                    lon, lat, alt = geometry.parts[0][0]
+                    yield [placemark.name, lon, lat, alt, placemark.folder]
+
+    def pointTable(self, source=''):
+        """Return the PointTable of every Point, tagged with source (file name)."""
+        return PointTable.fromRows(self.pointRows(), source)
+
+    def tables(self, source=''):
+        """Return (PointTable, ShapeTable) of the source, tagged with source (file name)."""
+        # Lines & polygons kept aside as compact arrays while points are streamed
+        shapes = []
+
+        def rows():
+            for placemark in self:
+                for geometry in placemark.geometries:
+                    if geometry.kind == 'Point':
+                        lon, lat, alt = geometry.parts[0][0]
+                        yield [placemark.name, lon, lat, alt, placemark.folder]
+                    else:
+                        parts = [np.asarray(part, dtype=np.float64) for part in geometry.parts]
+                        shapes.append((placemark.name, placemark.folder, Geometry(geometry.kind, parts)))
+
+        points = PointTable.fromRows(rows(), source)
+        return points, ShapeTable.fromGeometries(shapes, source)
+
+    def nameOf(self, attributes, default=''):
+        """Return attributes[nameField], else the first attribute named like NAME_FIELDS."""
+        if self.nameField:
+            return str(attributes.get(self.nameField, default))
+        for key, value in attributes.items():
+            if key.lower() in NAME_FIELDS and value is not None:
+                return str(value)
+        return str(default)
+
+
+if __name__ == '__main__':
+    print(VectorReader.__doc__)
@@ -1,206 +1,496 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Aug  5 09:44:49 2022
-
-@author: yan-s
-"""
-
-import os
-import logging
-
-
-class VariableGlobal:
-    """Download satellite map from sentinelhub & plot data from googleEarth .kml file on it.
-
-What it does :    
-Script downloading with sentinelhub api map in color with minimal cloud exposure of a box (not too large) input.
-Transform a .kml file from GoogleEarth into a .csv file with name and coordinates.
-Finally, plot name with coordonates on the sentinelhub map download.
-    
-How it does:
-    using https://docs.sentinel-hub.com/api/latest/
-
-Libraries needed :
-    os
-    cv2
-    csv
-    time
-    utils
-    pandas
-    logging
-    matplotlib
-    sentinelhub (https://sentinelhub-py.readthedocs.io/en/latest/install.html)
-    
-Minimal input:
-    -Sentinelhub Credentials ; Get credentials at https://www.sentinel-hub.com/ .
-    -A path to .kml file created with GoogleEarth ; https://earth.google.com/web/ .
-    or a csv file with at least 3 columns untitled 'Name', 'Longitude' & 'Latitude' (case sensitive) and using wgs84 coordinate system.
-    -A Boundary Box corresponding (not too large) using wgs84 coordinate system ; https://geojson.io/#map=2/20.0/0.0 .
-    
-Return/create :
-    -Directory called "SentinelDownload" containing :
-        -A finale .png file.
-        -Possibly a .csv file.
-        -Subdirectories from sentinelhub containing .json, .tiff & .png file.
-
-Way of improvment :
-    -System to import shapefile https://gis.stackexchange.com/a/396133 .
-    -Function for calculate if coordinates outside of BBox.
-    -Better documentation.
-    -Customisation option.
-
-Note :
-    Use wgs84 coordinate system.
-    Choose BoundaryBox not too large.
-    Personnal .csv file MUST have column entitled 'Name', 'Longitude' & 'Latitude' (Case sensitive).
-    Add 'Name' in :
-        -self.listyDown for annotate 'Name' underneath the point (could leave empty)
-        -self.listyUp for annotate 'Name' above the point.
-    If 'Name' are UPPER, will annotate them in color.
-    For maximum ease in customisation, all variables are in the main script (here).
-    """
-
-    def __init__(self):
-        """Basically control inputs of all scripts w/ pseudo-global variables"""
-        
-        "Logging()"
-        # Set format for logging outputs
-        logging.basicConfig(level=logging.DEBUG,
-                            format='[%(levelname)s] %(asctime)s - %(message)s')
-        # Block unwanted imported module logging
-        logging.getLogger('PIL').setLevel(logging.WARNING)
-        logging.getLogger('requests').setLevel(logging.WARNING)
-        logging.getLogger('urllib3').setLevel(logging.WARNING)
-        logging.getLogger('sentinelhub').setLevel(logging.WARNING)
-        logging.getLogger('http.client').setLevel(logging.WARNING)
-        logging.getLogger('matplotlib.font_manager').setLevel(logging.ERROR)
-        logging.getLogger('requests.packages.urllib3').setLevel(logging.WARNING)
-
-        "SentinelHubDownload()"
-        
-        # Get credentials at https://www.sentinel-hub.com/
-        self.instanceID = ''
-        self.clientID = ''
-        self.clientSecret = ''
-
-        # https://geojson.io/#map=2/20.0/0.0
-        # Provide BBox with wgs84 coordinate system
-        self.BBox = [-16.900000, 13.600000, -16.300000, 14.200000]
-
-        # Ratio meters/pixel (With this Sat Bands, 30m is max)
-        self.resolution = 30
-
-        #Time interval of wanted imagery
-        self.timeInterval = "2019-06-01"
-        self.intervalTime = "2022-07-25"
-        
-        "KmlCSV()"
-        
-        # Give path to .csv file
-        # Be sure that columns' name are 'Name', 'Longitude' & 'Latitude'
-        # And that coordinates use wgs84 coordinate system
-        self.csvSrc = r''
-        # Or set path to .kml file to be converted to .csv file
-        self.kmlSrc = r'../Sine Saloum 2.0.kml'
-        
-        "PlotDATA()"
-        
-        # The figsize parameter takes a tuple of -
-        # the height and width of the plot layout
-        # Edit it, change the size of the annotations
-        self.figSize = (32.0, 24.0)
-        
-        # Increase DotPerInch for higher resolutions (& more processing time)
-        self.dpi = 100.0
-        
-        #Figure Title & Label (at the bottom of Fig)
-        self.figTitle = 'Le Sine Saloum'
-        self.xLabel = '05/08/2022'
-        
-        # Want Grid, else set to false
-        self.grid = True
-        
-        #If true, plot major & minor locator
-        self.locator = True
-        # Set major
-        self.xMajor = 0.05
-        self.yMajor = 0.05
-        # Set minor
-        self.xMinor = 4
-        self.yMinor = 4
-        
-        # Dirty Scale (Set to False if don't want it)
-        self.scale = True
-        self.xy = (-16.40, 13.6625)
-        self.xyText = (-16.3495, 13.6625)
-        self.arrowStyle = '<|-|>'
-        self.nomenclature = '5 500m'
-        self.xyNomenclature = (-16.3835, 13.664)
-        
-        # Name of city name whos will be moved a litlle upward
-        self.listyUp = ['Bambougar Massemba', 'Bangalere', 'Biogane', 'Mar Lodj',
-                   'Palmarin Ngethé', 'Soum']
-        # Name of city name whos will be moved a litlle downward
-        self.listyDown = ['Bambougar Malech', 'Bassar', 'Fayako', 'Diathanor', 'Gagué Mode',
-                     'Joal-Fadiout', 'Ndangane Sambou', 'Velingara']
-        
-        # Coordinates correction & color of "Name":
-        # To prevent the "Name" from becoming entangled on the map, -
-        # we move some of them a little upward, or downward  -
-        # (depend if in listyUp or listyDown).
-        
-        # UPPER names (could be river or island)
-        self.upperLonCorrection = -0.0005
-        self.upperLatCorrection = 0.001
-        self.upperColor = 'red'
-        # Upward names
-        self.upwardLonCorrection = -0.01
-        self.upwardLatCorrection = 0.001
-        self.upwardColor = 'black'
-        # Downward names
-        self.downwardLonCorrection = -0.013
-        self.downwardLatCorrection = -0.004
-        self.downwardColor = 'black'
-        # Normals ones
-        self.normalLonCorrection = 0
-        self.normalLatCorrection = 0.001
-        self.normalColor = 'black'
-        # ArrowColor
-        self.arrowColor = 'blue'        
-        
-        """Basic directory system."""
-        # Get the name of the current directory
-        currentDirectory = os.path.basename(os.getcwd())
-        # Check if already in the right directory
-        if currentDirectory != 'SentinelDownload':
-            # Will triger only once, while the working directory 
-            # will now be in the "SentinelDownload" directory
-            logging.warning('Start of SentinelHub downloading !')
-            try:
-                # Create directory
-                os.mkdir('SentinelDownload')
-                logging.debug('Directory "SentinelDownload" succesfully created !')
-            except FileExistsError:
-                logging.debug('Directory "SentinelDownload" already exist !')
-            finally:
-                # Move in
-                os.chdir('SentinelDownload/')
-        # Update the working directory
-        self.workingDirectory = os.getcwd()
-
-
-#
-if __name__ == '__main__':
-    # Trigger the executions sequences.
-    try:
-        # Import other class()
-        from SentinelHubDownload import SentinelHubDownload
-        from PlotDATA import PlotDATA
-        # Trigger the execution Sequence of SentinelHubDownload()
-        exeSeq = SentinelHubDownload()
-        exeSeq.exeSeq()
-        # Trigger the execution Sequence of PlotData()
-        exeSeq = PlotDATA()
-        exeSeq.exeSeq()
-    except Exception as e:
-        print(e)
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Aug  5 09:44:49 2022
+
+@author: yan-s
+"""
+
+import os
+import logging
+
+
+class VariableGlobal:
+    """Download satellite map from sentinelhub & plot data from googleEarth .kml file on it.
+
+What it does :    
+Script downloading with sentinelhub api map in color with minimal cloud exposure of a box (not too large) input.
+Transform a .kml file from GoogleEarth into a .csv file with name and coordinates.
+Finally, plot name with coordonates on the sentinelhub map download.
+    
+How it does:
+    using https://docs.sentinel-hub.com/api/latest/
+
+Libraries needed :
+    os
+    tifffile (render)
+    csv
+    time
+    utils (download, only with preview)
+    pandas (render)
+    numpy
+    logging
+    matplotlib (render)
+    aiohttp (download, only with downloadBackend = 'asyncio')
+    sentinelhub (download, https://sentinelhub-py.readthedocs.io/en/latest/install.html)
+
+Commands :
+    python main.py convert : Only convert kmlSrc (numpy is enough).
+    python main.py download : Only download the raster.
+    python main.py render : Only plot data on the raster already downloaded.
+    python main.py [all] [--batch] : Everything (default).
+    python main.py tiles : Render z/x/y tiles of the raster already downloaded.
+    python main.py serve : Serve the tiles on http://localhost:8000/.
+    
+Minimal input:
+    -Sentinelhub Credentials ; Get credentials at https://www.sentinel-hub.com/ .
+    -A path to .kml file created with GoogleEarth ; https://earth.google.com/web/ (or .kmz, .shp, .geojson files, a glob or a list of them).
+    or a csv file with at least 3 columns untitled 'Name', 'Longitude' & 'Latitude' (case sensitive) and using wgs84 coordinate system.
+    -A Boundary Box corresponding (not too large) using wgs84 coordinate system ; https://geojson.io/#map=2/20.0/0.0 .
+    
+Return/create :
+    -Directory called "SentinelDownload" containing :
+        -A finale .png file (or .webp, .jpg, GeoTIFF .tif, see imageFormat).
+        -Possibly a .csv file.
+        -A "cache" directory with converted .kml files (python main.py --no-cache / --clear-cache).
+        -A "renders" directory with the basemap layer of the last maps & keys of maps written (python main.py --no-cache).
+        -A "rasters" directory with one subdirectory per download containing .json, .tiff, overviews .npy & (basemapPNG) .png file.
+        -With --batch, one map file per job of batchJobs (see BatchRun.py).
+        -A "profile.json" file, time & memory of every stage of the run (see Profiler.py).
+        -With the tiles command, a "tiles.mbtiles" file of z/x/y .png tiles (see TileRenderer.py).
+
+Way of improvment :
+    -Better documentation.
+    -Customisation option.
+
+Note :
+    Use wgs84 coordinate system.
+    Choose BoundaryBox not too large.
+    Personnal .csv file MUST have column entitled 'Name', 'Longitude' & 'Latitude' (Case sensitive).
+    Add 'Name' in :
+        -self.listyDown for annotate 'Name' underneath the point (could leave empty)
+        -self.listyUp for annotate 'Name' above the point.
+    Or set self.autoLabels to True for placing 'Name' without overlap automatically.
+    If 'Name' are UPPER, will annotate them in color.
+    For maximum ease in customisation, all variables are in the main script (here).
+    """
+
+    # Set by the command line, ex: {'useCache': False}
+    options = {}
+
+    def __init__(self):
+        """Basically control inputs of all scripts w/ pseudo-global variables"""
+        
+        "Logging()"
+        # Set format for logging outputs
+        logging.basicConfig(level=logging.DEBUG,
+                            format='[%(levelname)s] %(asctime)s - %(message)s')
+        # Block unwanted imported module logging
+        logging.getLogger('PIL').setLevel(logging.WARNING)
+        logging.getLogger('requests').setLevel(logging.WARNING)
+        logging.getLogger('urllib3').setLevel(logging.WARNING)
+        logging.getLogger('sentinelhub').setLevel(logging.WARNING)
+        logging.getLogger('http.client').setLevel(logging.WARNING)
+        logging.getLogger('matplotlib.font_manager').setLevel(logging.ERROR)
+        logging.getLogger('requests.packages.urllib3').setLevel(logging.WARNING)
+
+        "SentinelHubDownload()"
+        
+        # Get credentials at https://www.sentinel-hub.com/
+        self.instanceID = ''
+        self.clientID = ''
+        self.clientSecret = ''
+        # Leave empty for https://services.sentinel-hub.com
+        self.shBaseUrl = ''
+        self.shTokenUrl = ''
+
+        # https://geojson.io/#map=2/20.0/0.0
+        # Provide BBox with wgs84 coordinate system
+        self.BBox = [-16.900000, 13.600000, -16.300000, 14.200000]
+
+        # Ratio meters/pixel (With this Sat Bands, 30m is max)
+        self.resolution = 30
+
+        # Larger BBox are downloaded in tiles of at most maxTilePixels -
+        # (Process API limit is 2500 pixels) by downloadWorkers threads, -
+        # failed tiles are retried downloadRetries times, waiting -
+        # retryBackoff seconds, then twice more each time
+        self.maxTilePixels = 2500
+        self.downloadWorkers = 4
+        self.downloadRetries = 3
+        self.retryBackoff = 1.0
+        # 'threads' (sentinelhub client) or 'asyncio' (aiohttp, pauses every -
+        # request when Sentinel Hub answers 429 Too Many Requests)
+        self.downloadBackend = 'threads'
+
+        #Time interval of wanted imagery
+        self.timeInterval = "2019-06-01"
+        self.intervalTime = "2022-07-25"
+
+        # Collection (name of sentinelhub DataCollection) & mosaicking order -
+        # ('mostRecent', 'leastRecent' or 'leastCC' = least cloud coverage)
+        self.dataCollection = 'SENTINEL2_L1C'
+        self.mosaickingOrder = 'leastCC'
+
+        # Evalscript of the wanted imagery, see more at :
+        # https://docs.sentinel-hub.com/api/latest/evalscript/
+        self.evalscript = """
+        //VERSION=3
+        function setup() {
+          return {
+            input: ["B02", "B03", "B04", "CLM"],
+            output: 
+                { bands: 3 }
+          }
+        }
+
+        function evaluatePixel(sample) {
+          if (sample.CLM == 1) {
+            return [0.75 + sample.B04, sample.B03, sample.B02]
+          }
+          return [3.5*sample.B04, 3.5*sample.B03, 3.5*sample.B02];
+        }
+        """
+
+        # Cloud free composite made here of compositeScenes scenes (0 : none, one -
+        # request with mosaickingOrder) : timeInterval is split in compositeScenes -
+        # parts, each downloaded as one scene (mosaickingOrder) with its cloud mask, -
+        # then each pixel is the median of its clear scenes ('median') or taken -
+        # from the least cloudy scene where it is clear ('best')
+        self.compositeScenes = 0
+        self.compositeMethod = 'median'
+        # Rows of every scene read at once (memory : compositeScenes x rows x width x 4 bytes)
+        self.compositeRows = 512
+        # Evalscript of composite scenes, 4th band is 1 where the pixel is cloudy or has no data
+        self.compositeEvalscript = """
+        //VERSION=3
+        function setup() {
+          return {
+            input: ["B02", "B03", "B04", "CLM", "dataMask"],
+            output:
+                { bands: 4 }
+          }
+        }
+
+        function evaluatePixel(sample) {
+          return [3.5*sample.B04, 3.5*sample.B03, 3.5*sample.B02,
+                  sample.CLM == 1 || sample.dataMask == 0 ? 1 : 0];
+        }
+        """
+
+        # Plot downloaded map in the console, from an overview of at least -
+        # previewPixels in width & height (not the whole raster)
+        self.preview = True
+        self.previewPixels = 1000
+
+        # Downloaded rasters are kept in SentinelDownload/rasters, one directory -
+        # per BBox, resolution, time interval, evalscript, collection & mosaicking order
+        self.rasterDirectory = 'rasters'
+        
+        "KmlCSV()"
+        
+        # Give path to .csv file
+        # Be sure that columns' name are 'Name', 'Longitude' & 'Latitude'
+        # And that coordinates use wgs84 coordinate system
+        self.csvSrc = r''
+        # Or set path to .kml file to be converted to .csv file, -
+        # also a .kmz, .shp (with its .dbf), .geojson file, -
+        # a glob (r'../layers/*.km[lz]') or a list of them
+        self.kmlSrc = r'../Sine Saloum 2.0.kml'
+        # Attribute of shapefile (.dbf) & GeoJSON features used as 'Name', -
+        # empty to take the first one called 'name', 'nom', 'label' or 'title'
+        self.nameField = ''
+        # Number of processes reading several .kml/.kmz files at once
+        self.ingestWorkers = os.cpu_count()
+        # Also save points from the .kml file in a .csv file (not needed for plotting)
+        self.csvExport = True
+        # Keep converted .kml files in SentinelDownload/cache, -
+        # only converted again if the .kml file changed
+        self.useCache = True
+        self.cacheDirectory = 'cache'
+        
+        "PlotDATA()"
+        
+        # The figsize parameter takes a tuple of -
+        # the height and width of the plot layout
+        # Edit it, change the size of the annotations
+        self.figSize = (32.0, 24.0)
+        
+        # Increase DotPerInch for higher resolutions (& more processing time)
+        self.dpi = 100.0
+
+        # Keep the basemap layer of maps (raster, axes, title, lines & polygons) in -
+        # SentinelDownload/renders : when only points or label settings change, -
+        # they are drawn on it, a map whose inputs didn't change isn't rendered again
+        self.renderCache = True
+        self.renderDirectory = 'renders'
+
+        # Format of the map : 'png', 'webp', 'jpeg' or 'geotiff' (only the axes, -
+        # georeferenced in wgs84 for GIS tools, tiled with overviews)
+        self.imageFormat = 'png'
+        # zlib level of .png maps, 1 (fastest, biggest) to 9 (smallest, slowest)
+        self.pngLevel = 3
+        # Quality of .webp & .jpeg maps (0 - 100)
+        self.imageQuality = 90
+        # Threads encoding strips of .png & tiles of GeoTIFF maps, None for one per CPU
+        self.encodeWorkers = None
+        
+        # Also save the basemap as a .png file beside its .tiff file (not needed for plotting)
+        self.basemapPNG = False
+        # Only show a part of BBox ([lon min, lat min, lon max, lat max]), -
+        # leave empty for the whole BBox. The basemap is read from overviews -
+        # (2x, 4x... downsampled) saved beside the .tiff file, matching figSize & dpi
+        self.viewBBox = []
+
+        #Figure Title & Label (at the bottom of Fig)
+        self.figTitle = 'Le Sine Saloum'
+        self.xLabel = '05/08/2022'
+        
+        # Want Grid, else set to false
+        self.grid = True
+        
+        #If true, plot major & minor locator
+        self.locator = True
+        # Set major
+        self.xMajor = 0.05
+        self.yMajor = 0.05
+        # Set minor
+        self.xMinor = 4
+        self.yMinor = 4
+        
+        # Dirty Scale (Set to False if don't want it)
+        self.scale = True
+        self.xy = (-16.40, 13.6625)
+        self.xyText = (-16.3495, 13.6625)
+        self.arrowStyle = '<|-|>'
+        self.nomenclature = '5 500m'
+        self.xyNomenclature = (-16.3835, 13.664)
+        
+        # Name of city name whos will be moved a litlle upward
+        self.listyUp = ['Bambougar Massemba', 'Bangalere', 'Biogane', 'Mar Lodj',
+                   'Palmarin Ngethé', 'Soum']
+        # Name of city name whos will be moved a litlle downward
+        self.listyDown = ['Bambougar Malech', 'Bassar', 'Fayako', 'Diathanor', 'Gagué Mode',
+                     'Joal-Fadiout', 'Ndangane Sambou', 'Velingara']
+        
+        # Or let the script place every "Name" without overlap -
+        # (listyUp/listyDown names & UPPER names are placed first, -
+        # names without free space around their point are dropped)
+        self.autoLabels = False
+        
+        # Coordinates correction & color of "Name":
+        # To prevent the "Name" from becoming entangled on the map, -
+        # we move some of them a little upward, or downward  -
+        # (depend if in listyUp or listyDown).
+        
+        # UPPER names (could be river or island)
+        self.upperLonCorrection = -0.0005
+        self.upperLatCorrection = 0.001
+        self.upperColor = 'red'
+        # Upward names
+        self.upwardLonCorrection = -0.01
+        self.upwardLatCorrection = 0.001
+        self.upwardColor = 'black'
+        # Downward names
+        self.downwardLonCorrection = -0.013
+        self.downwardLatCorrection = -0.004
+        self.downwardColor = 'black'
+        # Normals ones
+        self.normalLonCorrection = 0
+        self.normalLatCorrection = 0.001
+        self.normalColor = 'black'
+        # ArrowColor
+        self.arrowColor = 'blue'        
+        
+        # Lines (LineString) & polygons of the .kml, .shp or .geojson files
+        self.lineColor = 'blue'
+        self.lineWidth = 1.0
+        self.polygonEdgeColor = 'black'
+        # 'none' for empty polygons
+        self.polygonFaceColor = (1.0, 1.0, 0.0, 0.2)
+        self.polygonLineWidth = 0.8
+        # Details of lines & polygons smaller than shapeTolerance pixels aren't drawn -
+        # (Douglas-Peucker simplification), 0 to draw every vertex
+        self.shapeTolerance = 0.5
+
+        """BatchRun()"""
+        # Maps to produce in one run (python main.py --batch), list of {dict} of variables to change
+        # Ex : [{'timeInterval': '2022-01-01', 'intervalTime': '2022-01-31'}, {'BBox': [...], ...}]
+        # Empty : one map per month between timeInterval & intervalTime
+        self.batchJobs = []
+        # Number of downloads at the same time (downloadWorkers requests with asyncio)
+        self.batchDownloads = 4
+        # Number of processes rendering maps
+        self.batchRenders = os.cpu_count()
+        
+        """TileRenderer()"""
+        # Web-Mercator z/x/y .png tiles of basemap, lines, polygons & points (python main.py tiles), -
+        # every zoom from tileZooms[0] to tileZooms[1], saved in this MBTiles (SQLite) file -
+        # of SentinelDownload. Run again, only tiles whose content changed are rendered
+        self.tileZooms = (8, 14)
+        self.tileStore = 'tiles.mbtiles'
+        # Width & height of a tile in pixels
+        self.tileSize = 256
+        # Number of processes rendering tiles
+        self.tileWorkers = os.cpu_count()
+        # Names are written from this zoom on (points are always drawn)
+        self.tileLabelZoom = 11
+
+        """TileServer()"""
+        # python main.py serve : tiles on http://localhost:tilePort/{z}/{x}/{y}.png -
+        # & a map to browse them on http://localhost:tilePort/
+        self.tilePort = 8000
+        # Number of tiles kept in memory by the server (LRU)
+        self.tileCacheSize = 4096
+
+        """Profiler()"""
+        # Every stage of the execution sequences is timed (wall & CPU time, memory, items), -
+        # report of the run saved in this .json file of SentinelDownload, empty for none
+        # (processes of --batch save their own, profile.<pid>.json, merged in it at the end)
+        self.profileReport = 'profile.json'
+        # Name of one stage run under cProfile (ex: 'plot' or 'PlotDATA.plot'), -
+        # statistics saved in <stage>.prof & the slowest functions logged
+        self.profileStage = ''
+        
+        """Basic directory system."""
+        # Get the name of the current directory
+        currentDirectory = os.path.basename(os.getcwd())
+        # Check if already in the right directory
+        if currentDirectory != 'SentinelDownload':
+            # Will triger only once, while the working directory 
+            # will now be in the "SentinelDownload" directory
+            logging.warning('Start of SentinelHub downloading !')
+            try:
+                # Create directory
+                os.mkdir('SentinelDownload')
+                logging.debug('Directory "SentinelDownload" succesfully created !')
+            except FileExistsError:
+                logging.debug('Directory "SentinelDownload" already exist !')
+            finally:
+                # Move in
+                os.chdir('SentinelDownload/')
+        # Update the working directory
+        self.workingDirectory = os.getcwd()
+
+        # Values given on the command line replace the ones above
+        self.__dict__.update(VariableGlobal.options)
+
+
+def convert():
+    """Only convert kmlSrc (.kml, .kmz, .shp, .geojson) in the cache & a .csv file."""
+    # Neither sentinelhub nor matplotlib are imported
+    from KmlCSV import KmlCSV
+    from Profiler import Profiler
+    try:
+        KmlCSV()
+    finally:
+        # Saved even if the conversion failed, None if it stopped before its first stage
+        if Profiler.current is not None:
+            Profiler.current.save()
+
+
+def download():
+    """Only download the raster of BBox & time interval in the raster cache."""
+    from SentinelHubDownload import SentinelHubDownload
+    # Trigger the execution Sequence of SentinelHubDownload()
+    exeSeq = SentinelHubDownload()
+    if exeSeq.downloadBackend == 'asyncio':
+        # Same download, requests sent with asyncio & aiohttp
+        from AsyncSentinelHubDownload import AsyncSentinelHubDownload
+        exeSeq = AsyncSentinelHubDownload()
+    exeSeq.exeSeq()
+
+
+def render():
+    """Only plot data on the raster already downloaded (no sentinelhub needed)."""
+    from PlotDATA import PlotDATA
+    # Trigger the execution Sequence of PlotData()
+    exeSeq = PlotDATA()
+    exeSeq.exeSeq()
+
+
+def tiles():
+    """Only render Web-Mercator tiles on the raster already downloaded, in tileStore."""
+    from TileRenderer import TileRenderer
+    exeSeq = TileRenderer()
+    exeSeq.exeSeq()
+
+
+def serve():
+    """Serve tiles of tileStore over HTTP until Ctrl+C."""
+    from TileServer import TileServer
+    exeSeq = TileServer()
+    exeSeq.exeSeq()
+
+
+def runAll(batch=False):
+    """Download then render, or every map of batchJobs in one run."""
+    if batch:
+        # Trigger the execution Sequence of BatchRun(), every map in one run
+        from BatchRun import BatchRun
+        exeSeq = BatchRun()
+        exeSeq.exeSeq()
+    else:
+        download()
+        render()
+
+
+#
+if __name__ == '__main__':
+    import sys
+    import argparse
+    # Same class as the one imported by the other scripts (not __main__.VariableGlobal)
+    from main import VariableGlobal
+    # Options of every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--no-cache', action='store_true',
+                        help='Convert the .kml file again & render the whole map, without reading or writing caches')
+    common.add_argument('--clear-cache', action='store_true',
+                        help='Remove converted .kml layers before running')
+    common.add_argument('--profile', metavar='STAGE', default=None,
+                        help='Run STAGE (ex: plot or PlotDATA.plot) under cProfile')
+    parser = argparse.ArgumentParser(description='Plot googleEarth .kml data on a sentinelhub map.')
+    commands = parser.add_subparsers(dest='command', metavar='{convert,download,render,all,tiles,serve}')
+    commands.add_parser('convert', parents=[common],
+                        help='Only convert kmlSrc to the cache & a .csv file (no sentinelhub, no matplotlib)')
+    commands.add_parser('download', parents=[common],
+                        help='Only download the raster of BBox & time interval')
+    commands.add_parser('render', parents=[common],
+                        help='Only plot data on the raster already downloaded')
+    allParser = commands.add_parser('all', parents=[common],
+                                    help='Download then render (default command)')
+    allParser.add_argument('--batch', action='store_true',
+                           help='Produce every map of batchJobs (or one per month) in one run')
+    commands.add_parser('tiles', parents=[common],
+                        help='Render z/x/y tiles on the raster already downloaded (only changed ones)')
+    commands.add_parser('serve', parents=[common],
+                        help='Serve rendered tiles over HTTP (tilePort)')
+    # No command (ex: python main.py --batch) is 'all', as before
+    argv = sys.argv[1:]
+    if not argv or (argv[0].startswith('-') and argv[0] not in ('-h', '--help')):
+        argv = ['all'] + argv
+    args = parser.parse_args(argv)
+    if args.profile:
+        VariableGlobal.options['profileStage'] = args.profile
+    if args.no_cache:
+        VariableGlobal.options['useCache'] = False
+        VariableGlobal.options['renderCache'] = False
+    if args.clear_cache:
+        from LayerCache import LayerCache
+        settings = VariableGlobal()
+        LayerCache(f'{settings.workingDirectory}/{settings.cacheDirectory}').clear()
+    # Trigger the executions sequences, modules of the others aren't imported.
+    try:
+        if args.command == 'convert':
+            convert()
+        elif args.command == 'download':
+            download()
+        elif args.command == 'render':
+            render()
+        elif args.command == 'tiles':
+            tiles()
+        elif args.command == 'serve':
+            serve()
+        else:
+            runAll(args.batch)
+    except Exception as e:
+        print(e)